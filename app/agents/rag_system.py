@@ -1,73 +1,659 @@
 import streamlit as st
-from typing import List, Dict, Any, Optional
-from groq import Groq
+from typing import List, Dict, Any, Optional, Tuple, Iterator
 from app.utils.config import Config
+from app.utils.llm_gateway import get_llm_gateway
+from app.utils.concurrency import ReadWriteLock
+from app.utils.text_index import BM25Index, expand_query, tokenize
+from app.utils.document_records import DocumentRecord, ContentSegment, VectorMatrix, content_hash
+from app.utils.snapshots import (
+    SnapshotFollower, new_snapshot_version, publish_snapshot, read_manifest, prune_snapshots
+)
+from app.utils.quantization import QuantizedVectorMatrix
+from app.utils.embedding_cache import QueryEmbeddingCache, normalize_query
+from app.utils.answer_cache import SemanticAnswerCache
+from app.utils.metadata_index import MetadataIndex, FILTER_FIELDS
+from app.utils.reranker import get_shared_reranker
+from app.utils.chunking import split_into_chunks
+from app.utils.context_builder import ContextAssembler, format_source
+from app.utils.conversation_memory import ConversationMemory
+from app.utils.deadline import Deadline, DeadlineExceeded
+from app.utils.admission import get_admission_controller, AdmissionRejected, INTERACTIVE, BULK
+from app.utils.near_duplicates import NearDuplicateIndex
+from app.utils.fact_table import FactTable, LOCATION_FILTER_FIELDS, normalize_county
+from app.utils.spatial_index import parse_proximity
 import numpy as np
-from sentence_transformers import SentenceTransformer
+from app.utils.embedding_backends import load_embedding_model, PRIMARY_EMBEDDING_MODEL, FALLBACK_EMBEDDING_MODEL
+from app.utils.embedding_service import EmbeddingService
 import json
 import os
+import re
+import heapq
 import pickle
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 
+EMBEDDING_ASPECTS = ['full_text', 'well_info', 'technical_data', 'geological_data', 'numerical_data']
+
+_COLLECTION_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+_shared_embedding_model = None
+_shared_embedding_model_lock = threading.Lock()
+
+
+def get_shared_embedding_model():
+    """Load the sentence transformer once per process and return (model, model_name)"""
+    global _shared_embedding_model
+    with _shared_embedding_model_lock:
+        if _shared_embedding_model is None:
+            try:
+                # Use the best sentence transformer model on the configured CPU backend
+                model_name = PRIMARY_EMBEDDING_MODEL
+                model = load_embedding_model(model_name, Config.EMBEDDING_BACKEND, Config.EMBEDDING_THREADS)
+            except:
+                # Fallback
+                model_name = FALLBACK_EMBEDDING_MODEL
+                model = load_embedding_model(model_name, Config.EMBEDDING_BACKEND, Config.EMBEDDING_THREADS)
+            # Backend is part of the name so cached query embeddings never mix backends
+            _shared_embedding_model = (model, f"{model_name}:{Config.EMBEDDING_BACKEND}")
+        return _shared_embedding_model
+
+
+_shared_embedding_service = None
+
+
+def get_shared_embedding_service() -> EmbeddingService:
+    """Process-wide micro-batching service in front of the shared embedding model"""
+    global _shared_embedding_service
+    model, _ = get_shared_embedding_model()
+    with _shared_embedding_model_lock:
+        if _shared_embedding_service is None:
+            _shared_embedding_service = EmbeddingService(
+                model, Config.EMBEDDING_MAX_BATCH_SIZE, Config.EMBEDDING_BATCH_WINDOW_MS
+            )
+        return _shared_embedding_service
+
+
 class AdvancedEmbeddingStore:
     """Advanced embedding store with hybrid search capabilities"""
     
-    def __init__(self, embedding_model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
-        try:
-            # Use the best sentence transformer model
-            self.embedding_model = SentenceTransformer('all-mpnet-base-v2')  # Better than all-MiniLM-L6-v2
-        except:
-            # Fallback
-            self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-        
-        self.documents = []
-        self.embeddings = []
-        self.metadata = []
-        self.document_texts = []
+    def __init__(self, embedding_model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+                 storage_dir: Optional[str] = None):
+        self.embedding_model, self.embedding_model_name = get_shared_embedding_model()
+        # Documents and queries are encoded through the shared micro-batching service
+        self.embedder = get_shared_embedding_service()
+        
+        # Searches run concurrently across sessions; ingestion and reloads are serialized
+        self._lock = ReadWriteLock()
+        self.query_cache = QueryEmbeddingCache(Config.QUERY_EMBEDDING_CACHE_SIZE)
+        self.documents: List[DocumentRecord] = []
         self.embedding_dim = None
+        self.keyword_index = BM25Index(k1=Config.BM25_K1, b=Config.BM25_B)
+        self.metadata_index = MetadataIndex()
+        
+        # One row per document in each aspect matrix (unit-normalized float32)
+        self.quantization = Config.EMBEDDING_QUANTIZATION
+        self.vector_store_dir = os.path.join(storage_dir, 'vectors') if storage_dir else Config.VECTOR_STORE_DIR
+        self.aspect_vectors = self._create_aspect_matrices()
+        
+        # Document content is kept once: in memory, compressed, or lazily in an on-disk segment
+        self.content_storage = Config.DOCUMENT_CONTENT_STORAGE
+        self.content_segment = None
+        self.segment_path = os.path.join(storage_dir, 'documents.seg') if storage_dir else Config.DOCUMENT_SEGMENT_PATH
+        if self.content_storage == 'segment':
+            self.content_segment = ContentSegment(self.segment_path)
+        
+        # Upserts are keyed by source (filename); deleted positions stay as tombstones until compaction
+        self.sources: Dict[str, List[int]] = {}
+        self.source_hashes: Dict[str, str] = {}
+        self.deleted = set()
+        self._generation = 0
+        # Bumped on every change to searchable content; cached answers are keyed by it
+        self.version = 0
+        # Set when serving an immutable snapshot as a read replica
+        self.snapshot_version = None
+        self._compaction_lock = threading.Lock()
+        self.compaction_history = {
+            'compactions_run': 0,
+            'records_reclaimed': 0,
+            'last_compaction_seconds': 0.0,
+            'last_compaction_at': None
+        }
+        
+        # MinHash/LSH signatures of raw and synthesized text per source; near-duplicates are linked, not indexed
+        self.raw_duplicates = NearDuplicateIndex(Config.NEAR_DUPLICATE_THRESHOLD, Config.MINHASH_PERMUTATIONS)
+        self.synthesis_duplicates = NearDuplicateIndex(Config.NEAR_DUPLICATE_THRESHOLD, Config.MINHASH_PERMUTATIONS)
+        self.duplicate_links: Dict[str, Dict[str, Any]] = {}
+        
+        # Typed records (well identifiers, formation tops, dates, tests) from the extraction prompts
+        self.fact_table = FactTable()
+    
+    def _create_aspect_matrices(self, file_suffix: str = '') -> Dict[str, VectorMatrix]:
+        """Create one vector matrix per aspect, quantized when configured"""
+        if self.quantization in ('int8', 'binary'):
+            return {
+                aspect: QuantizedVectorMatrix(
+                    self.quantization, os.path.join(self.vector_store_dir, f"{aspect}{file_suffix}.f32")
+                )
+                for aspect in EMBEDDING_ASPECTS
+            }
+        return {aspect: VectorMatrix() for aspect in EMBEDDING_ASPECTS}
+    
+    @property
+    def document_texts(self) -> List[str]:
+        """Live document contents in insertion order"""
+        return [doc.content for doc in self.documents if doc.doc_id not in self.deleted]
+    
+    @property
+    def metadata(self) -> List[Dict[str, Any]]:
+        """Live document metadata in insertion order"""
+        return [doc.metadata for doc in self.documents if doc.doc_id not in self.deleted]
         
     def add_documents(self, processed_files: List[Dict[str, Any]]) -> int:
-        """Add documents with advanced embeddings"""
-        added_count = 0
+        """Add documents with advanced embeddings, replacing earlier versions of the same source"""
+        outcomes = {'added': 0, 'replaced': 0, 'unchanged': 0, 'duplicate': 0, 'skipped': 0}
         
         for file_data in processed_files:
-            if 'text' in file_data and not file_data['metadata'].get('error', False):
-                text_content = file_data['text'].strip()
-                if text_content and len(text_content) > 50:
-                    
-                    # Create multiple embeddings for different aspects
-                    embeddings = self._create_multi_aspect_embeddings(text_content)
-                    
-                    doc_entry = {
-                        'content': text_content,
-                        'metadata': file_data['metadata'],
-                        'embeddings': embeddings,
-                        'doc_id': len(self.documents),
-                        'added_at': datetime.now().isoformat()
-                    }
-                    
-                    self.documents.append(doc_entry)
-                    self.document_texts.append(text_content)
-                    self.metadata.append(file_data['metadata'])
-                    added_count += 1
-        
-        st.success(f"✅ Added {added_count} documents with advanced embeddings")
-        return added_count
+            outcomes[self.upsert_document(file_data)] += 1
+        
+        st.success(
+            f"✅ Added {outcomes['added']} and replaced {outcomes['replaced']} documents with advanced embeddings"
+            f" ({outcomes['unchanged']} unchanged, {outcomes['duplicate']} linked as near-duplicates)"
+        )
+        return outcomes['added'] + outcomes['replaced']
+    
+    def upsert_document(self, file_data: Dict[str, Any]) -> str:
+        """Index a processed file, tombstoning the previous version of its source; returns the outcome"""
+        if 'text' not in file_data or file_data['metadata'].get('error', False):
+            return 'skipped'
+        
+        self._ensure_writable()
+        source_key = self._source_key(file_data['metadata'])
+        if file_data['metadata'].get('duplicate_of'):
+            # Already matched on raw text by the file processor, before any LLM stage ran
+            with self._lock.write_lock():
+                self._link_duplicate(source_key, file_data['metadata']['duplicate_of'],
+                                     file_data['metadata'].get('similarity', 1.0), 'raw_text')
+            return 'duplicate'
+        
+        text_content = file_data['text'].strip()
+        analysis_failed = file_data['metadata'].get('analysis_failed', False)
+        if analysis_failed:
+            # Failed or timed-out LLM analyses are never indexed; the extracted source text still is
+            chunks = self._build_source_chunks(file_data)
+            text_hash = content_hash('\n\n'.join(chunk for chunk, _ in chunks))
+        elif len(text_content) > 50:
+            # Synthesis plus linked page-level and raw-source chunks
+            chunks = [(text_content, {'chunk_type': 'synthesis'})] + self._build_source_chunks(file_data)
+            text_hash = content_hash(text_content)
+        else:
+            chunks = []
+        if not chunks:
+            return 'skipped'
+        
+        with self._lock.read_lock():
+            if self.source_hashes.get(source_key) == text_hash:
+                return 'unchanged'
+        
+        raw_signature = synthesis_signature = None
+        if Config.NEAR_DUPLICATE_DETECTION:
+            raw_text = self._raw_source_text(file_data)
+            raw_signature = self.raw_duplicates.signature(raw_text) if raw_text else None
+            synthesis_signature = None if analysis_failed else self.synthesis_duplicates.signature(text_content)
+            with self._lock.read_lock():
+                match = self._find_duplicate(source_key, raw_signature, synthesis_signature)
+            if match is not None:
+                with self._lock.write_lock():
+                    self._link_duplicate(source_key, *match)
+                return 'duplicate'
+        
+        # Create multiple embeddings for different aspects, all chunks in one batch
+        embeddings = self._create_multi_aspect_embeddings_batch([text for text, _ in chunks])
+        
+        with self._lock.write_lock():
+            replaced = self._tombstone_source(source_key)
+            parent_id = len(self.documents)
+            for (chunk_text, chunk_fields), chunk_embeddings in zip(chunks, embeddings):
+                metadata = dict(file_data['metadata'], source_key=source_key, content_hash=text_hash, **chunk_fields)
+                if chunk_fields['chunk_type'] != 'synthesis' and not analysis_failed:
+                    metadata['parent_doc_id'] = parent_id
+                self._index_record(chunk_text, metadata, chunk_embeddings)
+            self.sources[source_key] = list(range(parent_id, len(self.documents)))
+            self.source_hashes[source_key] = text_hash
+            self.raw_duplicates.add(source_key, raw_signature)
+            self.synthesis_duplicates.add(source_key, synthesis_signature)
+            self.fact_table.add_records(source_key, file_data.get('facts', []))
+        
+        self._maybe_schedule_compaction()
+        return 'replaced' if replaced else 'added'
+    
+    def delete_document(self, source_key: str) -> int:
+        """Tombstone every record of a source; returns the number of records removed from search
+        
+        Near-duplicates linked to the source were never indexed themselves, so their links go with it
+        (see duplicates_of) and they must be re-uploaded to be searchable.
+        """
+        self._ensure_writable()
+        with self._lock.write_lock():
+            removed = self._tombstone_source(source_key)
+            for duplicate_key in self._linked_duplicates(source_key):
+                del self.duplicate_links[duplicate_key]
+        self._maybe_schedule_compaction()
+        return removed
+    
+    def duplicates_of(self, source_key: str) -> List[str]:
+        """Sources linked as near-duplicates of the given source instead of being indexed"""
+        with self._lock.read_lock():
+            return self._linked_duplicates(source_key)
+    
+    def _linked_duplicates(self, source_key: str) -> List[str]:
+        return sorted(key for key, link in self.duplicate_links.items() if link['duplicate_of'] == source_key)
+    
+    def find_near_duplicate(self, raw_text: str, source_key: Optional[str] = None) -> Optional[Tuple[str, float]]:
+        """Indexed source whose raw text is a near-duplicate of the given text, as (source_key, similarity)"""
+        if not Config.NEAR_DUPLICATE_DETECTION or not raw_text:
+            return None
+        signature = self.raw_duplicates.signature(raw_text)
+        with self._lock.read_lock():
+            return self.raw_duplicates.query(signature, exclude=source_key)
+    
+    def _find_duplicate(self, source_key: str, raw_signature, synthesis_signature) -> Optional[Tuple[str, float, str]]:
+        """Raw text is the stronger signal; synthesized text catches scans without extractable text"""
+        match = self.raw_duplicates.query(raw_signature, exclude=source_key)
+        if match is not None:
+            return match[0], match[1], 'raw_text'
+        match = self.synthesis_duplicates.query(synthesis_signature, exclude=source_key)
+        if match is not None:
+            return match[0], match[1], 'synthesis'
+        return None
+    
+    def _link_duplicate(self, source_key: str, duplicate_of: str, similarity: float, signal: str):
+        """Record a near-duplicate instead of indexing it (caller holds the write lock)"""
+        # A re-upload that now duplicates another source drops its own indexed version
+        self._tombstone_source(source_key)
+        self.duplicate_links[source_key] = {
+            'duplicate_of': duplicate_of,
+            'similarity': similarity,
+            'signal': signal
+        }
+    
+    def _raw_source_text(self, file_data: Dict[str, Any]) -> str:
+        return file_data.get('raw_text') or file_data.get('raw_las') or file_data.get('raw_data') or ''
+    
+    def lookup_facts(self, query: str) -> Optional[Tuple[str, List[Dict[str, Any]]]]:
+        """Answer an exact entity/attribute question from the fact table, None when it needs the agents"""
+        with self._lock.read_lock():
+            match = self.fact_table.match_query(query)
+            if match is None:
+                return None
+            description, rows = match
+            return description, self.fact_table.rows(rows)
+    
+    def locate(self, reference: Any) -> Optional[Tuple[float, float, str]]:
+        """(latitude, longitude, label) for coordinates or a well with an extracted location"""
+        with self._lock.read_lock():
+            return self.fact_table.locate(reference)
+    
+    def location_values(self, field: str) -> List[str]:
+        """Distinct extracted values of a well location attribute (county, state, legal description)"""
+        with self._lock.read_lock():
+            return sorted({value for value in (self.fact_table.columns['value'][row]
+                                               for row in self.fact_table.lookup(attribute=field)) if value})
+    
+    def compare_depths(self, query: str) -> Optional[Tuple[str, str]]:
+        """Cross-well formation top comparison for a comparison question, from the fact table's interval index"""
+        with self._lock.read_lock():
+            return self.fact_table.compare_depths(query)
+    
+    def _ensure_writable(self):
+        if self.snapshot_version is not None:
+            raise RuntimeError(f"Knowledge base is a read-only replica of snapshot {self.snapshot_version}")
+    
+    def _source_key(self, metadata: Dict[str, Any]) -> str:
+        return metadata.get('source_key') or metadata.get('filename', '')
+    
+    def _tombstone_source(self, source_key: str) -> int:
+        """Hide a source's records from search (caller holds the write lock)"""
+        positions = self.sources.pop(source_key, [])
+        self.source_hashes.pop(source_key, None)
+        self.raw_duplicates.remove(source_key)
+        self.synthesis_duplicates.remove(source_key)
+        self.duplicate_links.pop(source_key, None)
+        self.fact_table.remove_source(source_key)
+        for position in positions:
+            self.deleted.add(position)
+            self.metadata_index.remove_document(position)
+            self.keyword_index.remove_document(position, self.documents[position].content)
+        if positions:
+            self.version += 1
+        return len(positions)
+    
+    def _rebuild_sources(self):
+        """Recreate the source map from live record metadata (caller holds the write lock)"""
+        self.sources = {}
+        self.source_hashes = {}
+        for doc in self.documents:
+            if doc.doc_id in self.deleted:
+                continue
+            source_key = self._source_key(doc.metadata)
+            self.sources.setdefault(source_key, []).append(doc.doc_id)
+            if doc.metadata.get('chunk_type', 'synthesis') == 'synthesis':
+                self.source_hashes[source_key] = doc.metadata.get('content_hash') or content_hash(doc.content)
+    
+    def _rebuild_duplicate_indexes(self, documents: List[DocumentRecord]):
+        """Recompute signatures for stores saved before near-duplicate detection (caller holds the write lock)"""
+        raw_texts: Dict[str, List[str]] = {}
+        self.raw_duplicates = NearDuplicateIndex(Config.NEAR_DUPLICATE_THRESHOLD, Config.MINHASH_PERMUTATIONS)
+        self.synthesis_duplicates = NearDuplicateIndex(Config.NEAR_DUPLICATE_THRESHOLD, Config.MINHASH_PERMUTATIONS)
+        self.duplicate_links = {}
+        for doc in documents:
+            source_key = self._source_key(doc.metadata)
+            chunk_type = doc.metadata.get('chunk_type', 'synthesis')
+            if chunk_type == 'synthesis':
+                self.synthesis_duplicates.add(source_key, self.synthesis_duplicates.signature(doc.content))
+            elif chunk_type in ('raw_text', 'raw_las', 'raw_data'):
+                raw_texts.setdefault(source_key, []).append(doc.content)
+        for source_key, chunks in raw_texts.items():
+            self.raw_duplicates.add(source_key, self.raw_duplicates.signature('\n\n'.join(chunks)))
+    
+    def _maybe_schedule_compaction(self):
+        """Start a background compaction once tombstones make up a large enough share of the store"""
+        tombstones = len(self.deleted)
+        if tombstones < Config.COMPACTION_MIN_TOMBSTONES:
+            return
+        if tombstones / max(len(self.documents), 1) < Config.COMPACTION_TOMBSTONE_RATIO:
+            return
+        if not self._compaction_lock.locked():
+            threading.Thread(target=self.compact, name="knowledge-base-compaction", daemon=True).start()
+    
+    def compact(self) -> Dict[str, Any]:
+        """Rebuild dense matrices and indexes without tombstones; searches keep using the old ones until the swap"""
+        with self._compaction_lock:
+            start_time = time.perf_counter()
+            with self._lock.read_lock():
+                generation = self._generation
+                snapshot_count = len(self.documents)
+                snapshot_deleted = set(self.deleted)
+                documents = self.documents[:snapshot_count]
+                aspect_vectors = self.aspect_vectors
+            
+            if not snapshot_deleted or self.snapshot_version is not None:
+                return self.compaction_stats()
+            
+            # Rows below the snapshot count are never modified in place, so they can be copied without the lock
+            live_positions = [position for position in range(snapshot_count) if position not in snapshot_deleted]
+            state = self._empty_compaction_state()
+            self._append_compacted(state, documents, aspect_vectors, live_positions)
+            
+            with self._lock.write_lock():
+                if self._generation != generation:
+                    # The store was reloaded meanwhile; the rebuilt copy is stale
+                    return self.compaction_stats()
+                
+                # Catch up with records added and deleted while the copy was built
+                appended = [
+                    position for position in range(snapshot_count, len(self.documents))
+                    if position not in self.deleted
+                ]
+                self._append_compacted(state, self.documents, self.aspect_vectors, appended)
+                mapping = state['mapping']
+                deleted = set()
+                for position in self.deleted - snapshot_deleted:
+                    if position in mapping:
+                        deleted.add(mapping[position])
+                        state['metadata_index'].remove_document(mapping[position])
+                        state['keyword_index'].remove_document(mapping[position], self.documents[position].content)
+                
+                reclaimed = len(self.documents) - len(state['documents'])
+                superseded = self.aspect_vectors
+                self.documents = state['documents']
+                self.aspect_vectors = state['aspect_vectors']
+                if state['segment'] is not None:
+                    # New content is appended after the live payloads; the old file goes on the next save
+                    self.content_segment = state['segment']
+                for matrix in superseded.values():
+                    if matrix.quantized:
+                        matrix.close()
+                self.keyword_index = state['keyword_index']
+                self.metadata_index = state['metadata_index']
+                self.deleted = deleted
+                self._rebuild_sources()
+                self._generation += 1
+                self.version += 1
+                
+                self.compaction_history['compactions_run'] += 1
+                self.compaction_history['records_reclaimed'] += reclaimed
+                self.compaction_history['last_compaction_seconds'] = time.perf_counter() - start_time
+                self.compaction_history['last_compaction_at'] = datetime.now().isoformat()
+        
+        return self.compaction_stats()
+    
+    def export_snapshot(self, snapshot_root: str) -> str:
+        """Write live records, vectors and indexes as an immutable, checksummed snapshot directory"""
+        version = new_snapshot_version()
+        staging_dir = os.path.join(snapshot_root, f".staging-{version}")
+        os.makedirs(os.path.join(staging_dir, 'vectors'))
+        
+        with self._lock.read_lock():
+            live_positions = [position for position in range(len(self.documents)) if position not in self.deleted]
+            documents = [self.documents[position] for position in live_positions]
+            rows = {aspect: matrix.rows(live_positions) for aspect, matrix in self.aspect_vectors.items()}
+            fact_table = pickle.dumps(self.fact_table)
+        
+        # Snapshot positions are dense, so indexes are rebuilt for them
+        mapping = {position: index for index, position in enumerate(live_positions)}
+        keyword_index = BM25Index(k1=Config.BM25_K1, b=Config.BM25_B)
+        metadata_index = MetadataIndex()
+        records = []
+        with open(os.path.join(staging_dir, 'documents.seg'), 'wb') as segment:
+            for index, doc in enumerate(documents):
+                metadata = dict(doc.metadata)
+                if 'parent_doc_id' in metadata:
+                    metadata['parent_doc_id'] = mapping.get(metadata['parent_doc_id'], metadata['parent_doc_id'])
+                payload = doc.payload()
+                records.append({
+                    'doc_id': index,
+                    'metadata': metadata,
+                    'added_at': doc.added_at,
+                    'offset': segment.tell(),
+                    'length': len(payload)
+                })
+                segment.write(payload)
+                content = doc.content
+                keyword_index.add_document(index, content)
+                metadata_index.add_document(index, metadata, content)
+        
+        for aspect, aspect_rows in rows.items():
+            dim = next((len(row) for row in aspect_rows if row is not None), self.embedding_dim or 0)
+            vectors = np.zeros((len(aspect_rows), dim), dtype=np.float32)
+            present = np.zeros(len(aspect_rows), dtype=bool)
+            for index, row in enumerate(aspect_rows):
+                if row is not None:
+                    vectors[index] = row
+                    present[index] = True
+            np.save(os.path.join(staging_dir, 'vectors', f"{aspect}.npy"), vectors)
+            np.save(os.path.join(staging_dir, 'vectors', f"{aspect}.present.npy"), present)
+        
+        with open(os.path.join(staging_dir, 'documents.pkl'), 'wb') as f:
+            pickle.dump(records, f)
+        with open(os.path.join(staging_dir, 'indexes.pkl'), 'wb') as f:
+            pickle.dump({
+                'keyword_index': keyword_index,
+                'metadata_index': metadata_index,
+                'fact_table': pickle.loads(fact_table)
+            }, f)
+        
+        return publish_snapshot(snapshot_root, staging_dir, version, {
+            'created_at': datetime.now().isoformat(),
+            'document_count': len(records),
+            'embedding_model': self.embedding_model_name,
+            'embedding_dim': self.embedding_dim,
+            'aspects': list(rows)
+        })
+    
+    def load_snapshot(self, snapshot_dir: str, verify: bool = True):
+        """Serve an immutable snapshot read-only (vectors memory-mapped); in-flight searches finish on the previous data"""
+        manifest = read_manifest(snapshot_dir, verify)
+        if manifest['embedding_model'] != self.embedding_model_name:
+            raise ValueError(
+                f"Snapshot {manifest['version']} was built with {manifest['embedding_model']}, "
+                f"this node uses {self.embedding_model_name}"
+            )
+        
+        segment = ContentSegment(os.path.join(snapshot_dir, 'documents.seg'), read_only=True)
+        with open(os.path.join(snapshot_dir, 'documents.pkl'), 'rb') as f:
+            documents = [
+                DocumentRecord.from_segment(
+                    record['doc_id'], record['metadata'], record['added_at'],
+                    segment, record['offset'], record['length']
+                )
+                for record in pickle.load(f)
+            ]
+        
+        # numpy cannot memory-map an empty array, so empty snapshots are loaded normally
+        mmap_mode = 'r' if manifest['document_count'] else None
+        aspect_vectors = {}
+        for aspect in manifest['aspects']:
+            vectors = np.load(os.path.join(snapshot_dir, 'vectors', f"{aspect}.npy"), mmap_mode=mmap_mode)
+            present = np.load(os.path.join(snapshot_dir, 'vectors', f"{aspect}.present.npy"))
+            aspect_vectors[aspect] = VectorMatrix.from_arrays(vectors if vectors.shape[1] else None, present)
+        
+        with open(os.path.join(snapshot_dir, 'indexes.pkl'), 'rb') as f:
+            indexes = pickle.load(f)
+        
+        # Readers hold the read lock for a whole search, so the swap waits for in-flight queries
+        with self._lock.write_lock():
+            self.documents = documents
+            self.aspect_vectors = aspect_vectors
+            self.keyword_index = indexes['keyword_index']
+            self.metadata_index = indexes['metadata_index']
+            self.fact_table = indexes.get('fact_table') or FactTable()
+            self.embedding_dim = manifest['embedding_dim']
+            self.deleted = set()
+            self.duplicate_links = {}
+            self._rebuild_sources()
+            self._generation += 1
+            self.version += 1
+            self.snapshot_version = manifest['version']
+    
+    def _empty_compaction_state(self) -> Dict[str, Any]:
+        file_suffix = f".{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+        segment = None
+        if self.content_segment is not None:
+            # Live payloads are rewritten into a fresh segment so deleted ones stop taking disk space
+            root, ext = os.path.splitext(self.segment_path)
+            segment = ContentSegment(f"{root}{file_suffix}{ext}")
+        return {
+            'documents': [],
+            'aspect_vectors': self._create_aspect_matrices(file_suffix),
+            'segment': segment,
+            'keyword_index': BM25Index(k1=Config.BM25_K1, b=Config.BM25_B),
+            'metadata_index': MetadataIndex(),
+            'mapping': {}
+        }
+    
+    def _append_compacted(self, state: Dict[str, Any], documents: List[DocumentRecord],
+                          aspect_vectors: Dict[str, VectorMatrix], positions: List[int]):
+        """Copy the given records and their vectors into a compaction state at dense positions"""
+        rows = {aspect: matrix.rows(positions) for aspect, matrix in aspect_vectors.items()}
+        mapping = state['mapping']
+        
+        for index, position in enumerate(positions):
+            doc = documents[position]
+            new_position = len(state['documents'])
+            mapping[position] = new_position
+            
+            metadata = dict(doc.metadata)
+            if 'parent_doc_id' in metadata:
+                metadata['parent_doc_id'] = mapping.get(metadata['parent_doc_id'], metadata['parent_doc_id'])
+            
+            content = doc.content
+            state['documents'].append(doc.relocated(new_position, metadata, state['segment']))
+            for aspect, matrix in state['aspect_vectors'].items():
+                matrix.append(rows[aspect][index])
+            state['keyword_index'].add_document(new_position, content)
+            state['metadata_index'].add_document(new_position, metadata, content)
+    
+    def compaction_stats(self) -> Dict[str, Any]:
+        """Live and tombstoned record counts plus compaction history"""
+        return {
+            'sources': len(self.sources),
+            'live_records': len(self.documents) - len(self.deleted),
+            'tombstoned_records': len(self.deleted),
+            'near_duplicates_linked': len(self.duplicate_links),
+            'fact_records': len(self.fact_table),
+            'compaction_running': self._compaction_lock.locked(),
+            'snapshot_version': self.snapshot_version,
+            'version': self.version,
+            **self.compaction_history
+        }
+    
+    def _index_record(self, text_content: str, metadata: Dict[str, Any],
+                      embeddings: Dict[str, np.ndarray]) -> DocumentRecord:
+        """Append a record to the store and every index (caller holds the write lock)"""
+        doc_entry = DocumentRecord(
+            doc_id=len(self.documents),
+            content=text_content,
+            metadata=metadata,
+            added_at=datetime.now().isoformat(),
+            storage=self.content_storage,
+            segment=self.content_segment
+        )
+        
+        self.documents.append(doc_entry)
+        for aspect, matrix in self.aspect_vectors.items():
+            matrix.append(embeddings.get(aspect))
+        self.keyword_index.add_document(doc_entry.doc_id, text_content)
+        self.metadata_index.add_document(doc_entry.doc_id, metadata, text_content)
+        self.version += 1
+        return doc_entry
+    
+    def _build_source_chunks(self, file_data: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Per-page vision analyses and chunked raw sources returned by the processors"""
+        if not Config.INDEX_SOURCE_CHUNKS:
+            return []
+        
+        chunks = []
+        for page_analysis in file_data.get('vision_analyses', []):
+            analysis = page_analysis.get('analysis', '').strip()
+            if page_analysis.get('success') and len(analysis) > 50:
+                chunks.append((analysis, {'chunk_type': 'page_vision', 'page': page_analysis['page']}))
+        
+        for source_key in ('raw_text', 'raw_las', 'raw_data'):
+            raw_content = file_data.get(source_key)
+            if not raw_content:
+                continue
+            for index, chunk in enumerate(split_into_chunks(raw_content, Config.CHUNK_MAX_CHARS, Config.CHUNK_OVERLAP_CHARS)):
+                if len(chunk) > 50:
+                    chunks.append((chunk, {'chunk_type': source_key, 'chunk_index': index}))
+        
+        return chunks
     
     def _create_multi_aspect_embeddings(self, text: str) -> Dict[str, np.ndarray]:
         """Create embeddings for different aspects of the text"""
-        embeddings = {}
-        
-        # Full text embedding
-        embeddings['full_text'] = self.embedding_model.encode(text[:1000])  # Limit for efficiency
+        return self._create_multi_aspect_embeddings_batch([text])[0]
+    
+    def _create_multi_aspect_embeddings_batch(self, texts: List[str]) -> List[Dict[str, np.ndarray]]:
+        """Create aspect embeddings for several texts with a single encode call"""
+        # Full text plus each non-empty key section of every text
+        aspect_keys = []
+        aspect_texts = []
+        for index, text in enumerate(texts):
+            aspect_keys.append((index, 'full_text'))
+            aspect_texts.append(text[:1000])  # Limit for efficiency
+            for section_name, section_text in self._extract_key_sections(text).items():
+                if section_text:
+                    aspect_keys.append((index, section_name))
+                    aspect_texts.append(section_text[:500])
         
-        # Extract and embed key sections
-        sections = self._extract_key_sections(text)
-        for section_name, section_text in sections.items():
-            if section_text:
-                embeddings[section_name] = self.embedding_model.encode(section_text[:500])
+        vectors = self.embedder.encode(aspect_texts, normalize_embeddings=True).astype(np.float32)
+        self.embedding_dim = vectors.shape[1]
         
+        embeddings = [{} for _ in texts]
+        for (index, aspect), vector in zip(aspect_keys, vectors):
+            embeddings[index][aspect] = vector
         return embeddings
     
     def _extract_key_sections(self, text: str) -> Dict[str, str]:
@@ -98,202 +684,704 @@ class AdvancedEmbeddingStore:
         
         return sections
     
-    def advanced_search(self, query: str, limit: int = 5, search_type: str = "hybrid") -> List[Dict[str, Any]]:
-        """Advanced search with multiple strategies"""
+    def advanced_search(self, query: str, limit: int = 5, search_type: str = "hybrid",
+                        filters: Optional[Dict[str, Any]] = None,
+                        query_embedding: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """Advanced search with multiple strategies, optionally restricted by metadata filters"""
         if not self.documents:
             return []
         
-        # Create query embedding
-        query_embedding = self.embedding_model.encode(query)
+        # Create query embedding (cached per normalized query) unless the caller already has one
+        if query_embedding is None:
+            query_embedding = self.encode_query(query)
         
-        results = []
+        with self._lock.read_lock():
+            return self._build_results(*self._rank_documents(
+                query, query_embedding, limit, search_type, filters=filters
+            ))
+    
+    def multi_search(self, query: str, search_types: List[str] = None, limit: int = 5,
+                     filters: Optional[Dict[str, Any]] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Run several search strategies from a single query encoding"""
+        search_types = search_types or ['vector', 'keyword', 'hybrid']
+        if not self.documents:
+            return {search_type: [] for search_type in search_types}
         
-        for doc in self.documents:
-            scores = {}
-            
-            # Vector similarity scores for different aspects
-            for aspect, embedding in doc['embeddings'].items():
-                similarity = np.dot(query_embedding, embedding) / (
-                    np.linalg.norm(query_embedding) * np.linalg.norm(embedding)
-                )
-                scores[f'vector_{aspect}'] = similarity
-            
-            # Keyword matching score
-            keyword_score = self._calculate_keyword_score(query, doc['content'])
-            scores['keyword'] = keyword_score
-            
-            # Semantic coherence score
-            semantic_score = self._calculate_semantic_score(query, doc['content'])
-            scores['semantic'] = semantic_score
-            
-            # Combined hybrid score
-            if search_type == "hybrid":
-                final_score = (
-                    scores['vector_full_text'] * 0.4 +
-                    scores.get('vector_well_info', 0) * 0.2 +
-                    scores.get('vector_technical_data', 0) * 0.2 +
-                    scores['keyword'] * 0.1 +
-                    scores['semantic'] * 0.1
+        query_embedding = self.encode_query(query)
+        with self._lock.read_lock():
+            components = self._score_components(query, query_embedding, filters=filters)
+            return {
+                search_type: self._build_results(*self._rank_documents(
+                    query, query_embedding, limit, search_type, components=components
+                ))
+                for search_type in search_types
+            }
+    
+    def batch_search(self, queries: List[str], query_embeddings: np.ndarray, limit: int = 5,
+                     search_type: str = "hybrid",
+                     filters: Optional[List[Optional[Dict[str, Any]]]] = None) -> List[List[Dict[str, Any]]]:
+        """Search several queries at once, with one matrix product per aspect for all their vector scores"""
+        if not self.documents:
+            return [[] for _ in queries]
+        filters = filters or [None] * len(queries)
+        
+        with self._lock.read_lock():
+            batch_scores = {
+                aspect: matrix.batch_similarities(query_embeddings)
+                for aspect, matrix in self.aspect_vectors.items()
+            }
+            results = []
+            for index, query in enumerate(queries):
+                components = self._score_components(
+                    query, query_embeddings[index], filters=filters[index],
+                    vector_scores={aspect: scores[:, index] for aspect, scores in batch_scores.items()}
                 )
-            elif search_type == "vector":
-                final_score = scores['vector_full_text']
-            elif search_type == "keyword":
-                final_score = scores['keyword']
-            else:
-                final_score = scores['vector_full_text']
+                results.append(self._build_results(*self._rank_documents(
+                    query, query_embeddings[index], limit, search_type, components=components
+                )))
+            return results
+    
+    def encode_queries(self, queries: List[str]) -> np.ndarray:
+        """Unit-normalized embeddings for several queries; uncached ones are encoded in a single call"""
+        embeddings = [self.query_cache.get(self.embedding_model_name, query) for query in queries]
+        missing = [index for index, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            encoded = self.embedder.encode(
+                [normalize_query(queries[index]) or queries[index] for index in missing], normalize_embeddings=True
+            ).astype(np.float32)
+            for index, embedding in zip(missing, encoded):
+                self.query_cache.put(self.embedding_model_name, queries[index], embedding)
+                embeddings[index] = embedding
+        return np.vstack(embeddings)
+    
+    def encode_query(self, query: str) -> np.ndarray:
+        """Unit-normalized query embedding, served from the LRU cache when possible"""
+        return self.query_cache.get_or_encode(
+            self.embedding_model_name,
+            query,
+            lambda text: self.embedder.encode(text, normalize_embeddings=True).astype(np.float32)
+        )
+    
+    def _score_components(self, query: str, query_embedding: np.ndarray, exact: bool = False,
+                          filters: Optional[Dict[str, Any]] = None,
+                          vector_scores: Optional[Dict[str, np.ndarray]] = None):
+        """Per-aspect vector scores plus keyword and semantic scores for the candidate documents"""
+        # Metadata and well-location filters are resolved from indexes before any scoring
+        positions = self._filter_positions(filters)
+        if positions is None and self.deleted:
+            positions = self.metadata_index.live_positions()
+        if positions is None:
+            positions = np.arange(len(self.documents))
+            candidates = None
+        else:
+            candidates = positions
+        
+        # Keyword and synonym-expanded BM25 scores, computed over posting lists only
+        keyword_scores = self._scores_to_array(self._calculate_keyword_scores(query), positions)
+        semantic_scores = self._scores_to_array(self._calculate_semantic_scores(query), positions)
+        
+        # Vector similarity scores for every aspect, one matrix product each
+        # (approximate on quantized matrices unless an exact pass is requested)
+        if exact:
+            aspect_scores = {
+                aspect: matrix.exact_similarities(query_embedding, positions)
+                for aspect, matrix in self.aspect_vectors.items()
+            }
+        elif vector_scores is not None:
+            # Scores for every row were already computed in a batched matrix product
+            aspect_scores = {aspect: scores[positions] for aspect, scores in vector_scores.items()}
+        else:
+            aspect_scores = {
+                aspect: matrix.similarities(query_embedding, candidates)
+                for aspect, matrix in self.aspect_vectors.items()
+            }
+        
+        return positions, aspect_scores, keyword_scores, semantic_scores
+    
+    def _filter_positions(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Positions matching metadata filters and location filters (near, county, state, township);
+        None means no filtering (caller holds the read lock)"""
+        filters = filters or {}
+        positions = self.metadata_index.evaluate(
+            {field: values for field, values in filters.items() if field not in LOCATION_FILTER_FIELDS}
+        )
+        location_filters = {
+            field: values for field, values in filters.items()
+            if field in LOCATION_FILTER_FIELDS and values not in (None, '', [])
+        }
+        if not location_filters:
+            return positions
+        
+        # Records of every source with facts about a matching well, plus records naming one of them
+        wells = self.fact_table.location_wells(location_filters)
+        located = [
+            position
+            for source in self.fact_table.sources_for_wells(wells)
+            for position in self.sources.get(source, ())
+        ]
+        if wells:
+            located.extend(self.metadata_index.evaluate({'well': wells}).tolist())
+        located = np.unique(np.array(located, dtype=np.int64))
+        return located if positions is None else np.intersect1d(positions, located)
+    
+    def _rank_documents(self, query: str, query_embedding: np.ndarray, limit: int, search_type: str,
+                        exact: bool = False, components=None, filters: Optional[Dict[str, Any]] = None):
+        """Rank documents, using quantized coarse scoring plus exact rescoring when enabled"""
+        positions, aspect_scores, keyword_scores, semantic_scores = (
+            components or self._score_components(query, query_embedding, exact, filters)
+        )
+        quantized = any(matrix.quantized for matrix in self.aspect_vectors.values())
+        
+        if quantized and not exact:
+            # Coarse pass over the quantized matrices, then exact float similarities for the candidates only
+            coarse_scores = self._combine_scores(aspect_scores, keyword_scores, semantic_scores, search_type)
+            candidate_count = max(limit * 4, Config.QUANTIZATION_RESCORE_CANDIDATES)
+            selected = self._top_positions(coarse_scores, candidate_count)
+            positions = positions[selected]
+            keyword_scores = keyword_scores[selected]
+            semantic_scores = semantic_scores[selected]
+            aspect_scores = {
+                aspect: matrix.exact_similarities(query_embedding, positions)
+                for aspect, matrix in self.aspect_vectors.items()
+            }
+        
+        final_scores = self._combine_scores(aspect_scores, keyword_scores, semantic_scores, search_type)
+        
+        # Sort by score and keep the top results
+        order = self._top_positions(final_scores, limit)
+        return (
+            positions[order],
+            final_scores[order],
+            {aspect: scores[order] for aspect, scores in aspect_scores.items()},
+            keyword_scores[order],
+            semantic_scores[order]
+        )
+    
+    def _combine_scores(self, aspect_scores: Dict[str, np.ndarray], keyword_scores: np.ndarray,
+                        semantic_scores: np.ndarray, search_type: str) -> np.ndarray:
+        """Combine per-strategy scores for the requested search type"""
+        if search_type == "hybrid":
+            return (
+                aspect_scores['full_text'] * 0.4 +
+                aspect_scores['well_info'] * 0.2 +
+                aspect_scores['technical_data'] * 0.2 +
+                keyword_scores * 0.1 +
+                semantic_scores * 0.1
+            )
+        elif search_type == "keyword":
+            return keyword_scores
+        return aspect_scores['full_text']
+    
+    def _top_positions(self, scores: np.ndarray, limit: int) -> np.ndarray:
+        """Indices of the highest scores, best first"""
+        if len(scores) > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+        else:
+            top = np.arange(len(scores))
+        return top[np.argsort(-scores[top], kind='stable')]
+    
+    def _build_results(self, positions: np.ndarray, final_scores: np.ndarray, aspect_scores: Dict[str, np.ndarray],
+                       keyword_scores: np.ndarray, semantic_scores: np.ndarray) -> List[Dict[str, Any]]:
+        """Materialize ranked positions into result dicts"""
+        results = []
+        for rank, position in enumerate(positions):
+            doc = self.documents[position]
+            scores = {
+                f'vector_{aspect}': float(aspect_scores[aspect][rank])
+                for aspect, matrix in self.aspect_vectors.items()
+                if matrix.present[position]
+            }
+            scores['keyword'] = float(keyword_scores[rank])
+            scores['semantic'] = float(semantic_scores[rank])
             
             results.append({
-                'content': doc['content'],
-                'metadata': doc['metadata'],
-                'score': final_score,
+                'content': doc.content,
+                'metadata': doc.metadata,
+                'score': float(final_scores[rank]),
                 'detailed_scores': scores,
-                'doc_id': doc['doc_id']
+                'doc_id': doc.doc_id
             })
         
-        # Sort by score and return top results
-        results.sort(key=lambda x: x['score'], reverse=True)
-        return results[:limit]
-    
-    def _calculate_keyword_score(self, query: str, text: str) -> float:
-        """Calculate keyword matching score"""
-        query_words = set(query.lower().split())
-        text_words = set(text.lower().split())
-        
-        if not query_words:
-            return 0.0
-        
-        intersection = query_words.intersection(text_words)
-        return len(intersection) / len(query_words)
-    
-    def _calculate_semantic_score(self, query: str, text: str) -> float:
-        """Calculate semantic coherence score"""
-        # Simple implementation - could be enhanced with more sophisticated NLP
-        query_lower = query.lower()
-        text_lower = text.lower()
-        
-        # Look for semantic relationships (basic implementation)
-        semantic_keywords = {
-            'well': ['drill', 'bore', 'hole', 'shaft'],
-            'formation': ['layer', 'unit', 'zone', 'horizon'],
-            'depth': ['footage', 'interval', 'level'],
-            'oil': ['petroleum', 'hydrocarbon', 'crude'],
-            'gas': ['natural gas', 'methane', 'hydrocarbon']
-        }
-        
-        score = 0.0
-        for query_word in query_lower.split():
-            if query_word in text_lower:
-                score += 1.0
-            else:
-                # Check for semantic matches
-                for key, synonyms in semantic_keywords.items():
-                    if query_word == key and any(syn in text_lower for syn in synonyms):
-                        score += 0.5
-                        break
+        return results
+    
+    def quantization_recall_report(self, queries: List[str], k: int = 5, search_type: str = "hybrid") -> Dict[str, Any]:
+        """Recall@k of the quantized search against exact float search"""
+        recalls = []
+        for query in queries:
+            query_embedding = self.encode_query(query)
+            with self._lock.read_lock():
+                approximate = set(self._rank_documents(query, query_embedding, k, search_type)[0].tolist())
+                exact = set(self._rank_documents(query, query_embedding, k, search_type, exact=True)[0].tolist())
+            recalls.append(len(approximate & exact) / max(len(exact), 1))
         
-        return score / max(len(query_lower.split()), 1)
+        resident_bytes = sum(matrix.memory_bytes() for matrix in self.aspect_vectors.values())
+        float_bytes = sum(matrix.float_bytes() for matrix in self.aspect_vectors.values())
+        return {
+            'quantization': self.quantization,
+            f'recall@{k}': float(np.mean(recalls)) if recalls else 0.0,
+            'per_query_recall': recalls,
+            'resident_vector_bytes': resident_bytes,
+            'float_vector_bytes': float_bytes,
+            'memory_reduction': float_bytes / max(resident_bytes, 1)
+        }
+    
+    def _scores_to_array(self, scores: Dict[int, float], positions: np.ndarray) -> np.ndarray:
+        """Gather sparse per-document scores into a dense array aligned with positions"""
+        dense = np.zeros(len(self.documents), dtype=np.float32)
+        for doc_id, score in scores.items():
+            dense[doc_id] = score
+        return dense[positions]
+    
+    def _calculate_keyword_scores(self, query: str) -> Dict[int, float]:
+        """Calculate normalized BM25 keyword scores for documents matching the query"""
+        return self.keyword_index.normalized_scores({term: 1.0 for term in tokenize(query)})
+    
+    def _calculate_semantic_scores(self, query: str) -> Dict[int, float]:
+        """Calculate BM25 scores with geological synonym query expansion"""
+        return self.keyword_index.normalized_scores(expand_query(query))
     
     def get_all_text(self) -> str:
         """Get all document text combined"""
         return "\n\n=== DOCUMENT SEPARATOR ===\n\n".join(self.document_texts)
     
+    def memory_usage(self) -> Dict[str, int]:
+        """Approximate resident bytes used by vectors and document payloads"""
+        vector_bytes = sum(matrix.memory_bytes() for matrix in self.aspect_vectors.values())
+        payload_bytes = sum(len(doc._payload or b'') for doc in self.documents)
+        return {
+            'vector_bytes': vector_bytes,
+            'content_bytes': payload_bytes,
+            'bytes_per_document': (vector_bytes + payload_bytes) // max(len(self.documents), 1)
+        }
+    
     def save_embeddings(self, filepath: str):
         """Save embeddings to disk"""
-        data = {
-            'documents': self.documents,
-            'document_texts': self.document_texts,
-            'metadata': self.metadata
-        }
-        with open(filepath, 'wb') as f:
-            pickle.dump(data, f)
+        with self._lock.read_lock():
+            data = {
+                'documents': self.documents,
+                'aspect_vectors': self.aspect_vectors,
+                'deleted': sorted(self.deleted),
+                'raw_duplicates': self.raw_duplicates,
+                'synthesis_duplicates': self.synthesis_duplicates,
+                'duplicate_links': self.duplicate_links,
+                'fact_table': self.fact_table
+            }
+            # Write to a per-thread temp file and swap in atomically so concurrent saves never interleave
+            temp_path = f"{filepath}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'wb') as f:
+                pickle.dump(data, f)
+            os.replace(temp_path, filepath)
+            self._remove_superseded_vector_files()
+            self._remove_superseded_segment_files()
+    
+    def _remove_superseded_vector_files(self):
+        """Delete float rescoring files left by earlier compactions once the saved store no longer references them"""
+        if not os.path.isdir(self.vector_store_dir):
+            return
+        current = {os.path.abspath(matrix.float_path) for matrix in self.aspect_vectors.values() if matrix.quantized}
+        for name in os.listdir(self.vector_store_dir):
+            path = os.path.abspath(os.path.join(self.vector_store_dir, name))
+            if name.endswith('.f32') and path not in current:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+    
+    def _remove_superseded_segment_files(self):
+        """Delete content segments replaced by earlier compactions once the saved store no longer references them"""
+        if self.content_segment is None or self._compaction_lock.locked():
+            # A running compaction is still filling its new segment
+            return
+        root, ext = os.path.splitext(self.segment_path)
+        directory = os.path.dirname(root) or '.'
+        prefix = os.path.basename(root)
+        current = os.path.abspath(self.content_segment.filepath)
+        for name in os.listdir(directory):
+            path = os.path.abspath(os.path.join(directory, name))
+            if (name == prefix + ext or (name.startswith(prefix + '.') and name.endswith(ext))) and path != current:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
     
     def load_embeddings(self, filepath: str):
         """Load embeddings from disk"""
-        if os.path.exists(filepath):
-            with open(filepath, 'rb') as f:
-                data = pickle.load(f)
+        if not os.path.exists(filepath):
+            return
+        with open(filepath, 'rb') as f:
+            data = pickle.load(f)
+        
+        with self._lock.write_lock():
+            if 'aspect_vectors' in data:
                 self.documents = data['documents']
-                self.document_texts = data['document_texts']
-                self.metadata = data['metadata']
+                self.aspect_vectors = data['aspect_vectors']
+            else:
+                # Legacy format: list of dicts with per-document embedding dicts
+                self.documents = []
+                self.aspect_vectors = self._create_aspect_matrices()
+                for doc in data['documents']:
+                    self.documents.append(DocumentRecord(
+                        doc_id=doc['doc_id'],
+                        content=doc['content'],
+                        metadata=doc['metadata'],
+                        added_at=doc.get('added_at', ''),
+                        storage=self.content_storage,
+                        segment=self.content_segment
+                    ))
+                    for aspect, matrix in self.aspect_vectors.items():
+                        vector = doc['embeddings'].get(aspect)
+                        if vector is not None:
+                            vector = np.asarray(vector, dtype=np.float32)
+                            vector = vector / max(np.linalg.norm(vector), 1e-12)
+                        matrix.append(vector)
+            
+            if self.content_segment is not None:
+                # Keep appending to the segment the saved records live in, which compaction may have replaced
+                self.content_segment = next(
+                    (doc.segment for doc in self.documents if doc.segment is not None), self.content_segment
+                )
+            
+            self.deleted = set(data.get('deleted', []))
+            live_documents = [doc for doc in self.documents if doc.doc_id not in self.deleted]
+            self.keyword_index.rebuild(
+                (doc.doc_id, doc.content) for doc in live_documents
+            )
+            self.metadata_index.rebuild(
+                (doc.doc_id, doc.metadata, doc.content) for doc in live_documents
+            )
+            self._rebuild_sources()
+            self._generation += 1
+            self.version += 1
+            
+            if 'raw_duplicates' in data:
+                self.raw_duplicates = data['raw_duplicates']
+                self.synthesis_duplicates = data['synthesis_duplicates']
+                self.duplicate_links = data['duplicate_links']
+            else:
+                self._rebuild_duplicate_indexes(live_documents)
+            self.fact_table = data.get('fact_table') or FactTable()
+
+class EmbeddingCollections:
+    """Named embedding stores (e.g. per basin or client), each with its own segments and indexes"""
+    
+    def __init__(self, root_dir: str = Config.COLLECTIONS_DIR, max_workers: int = Config.COLLECTION_SEARCH_WORKERS):
+        self.root_dir = root_dir
+        self.collections: Dict[str, AdvancedEmbeddingStore] = {}
+        self.followers: Dict[str, SnapshotFollower] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="collection-search")
+    
+    def _validate_name(self, name: str) -> str:
+        if not _COLLECTION_NAME_PATTERN.match(name or ''):
+            raise ValueError(f"Invalid collection name '{name}': use letters, digits, '-' and '_'")
+        return name
+    
+    def store_path(self, name: str) -> str:
+        """Pickle path for a collection; the default collection keeps the original location"""
+        if name == Config.DEFAULT_COLLECTION:
+            return 'data/advanced_embeddings.pkl'
+        return os.path.join(self.root_dir, name, 'advanced_embeddings.pkl')
+    
+    def get(self, name: str = Config.DEFAULT_COLLECTION) -> AdvancedEmbeddingStore:
+        """Collection store, loaded from disk or created on first use"""
+        name = self._validate_name(name)
+        with self._lock:
+            if name not in self.collections:
+                storage_dir = None if name == Config.DEFAULT_COLLECTION else os.path.join(self.root_dir, name)
+                store = AdvancedEmbeddingStore(storage_dir=storage_dir)
+                if Config.READ_REPLICA:
+                    # Read replicas never ingest; they follow the snapshots published for the collection
+                    self.followers[name] = SnapshotFollower(
+                        self.snapshot_root(name), store.load_snapshot, Config.SNAPSHOT_POLL_SECONDS
+                    )
+                else:
+                    store.load_embeddings(self.store_path(name))
+                self.collections[name] = store
+            return self.collections[name]
+    
+    def snapshot_root(self, name: str) -> str:
+        return os.path.join(Config.SNAPSHOT_DIR, self._validate_name(name))
+    
+    def export_snapshot(self, name: str = Config.DEFAULT_COLLECTION) -> str:
+        """Publish the collection as a new immutable snapshot and prune old ones"""
+        snapshot_root = self.snapshot_root(name)
+        os.makedirs(snapshot_root, exist_ok=True)
+        snapshot_dir = self.get(name).export_snapshot(snapshot_root)
+        prune_snapshots(snapshot_root, Config.SNAPSHOT_RETAIN)
+        return snapshot_dir
+    
+    def names(self) -> List[str]:
+        """Loaded collections plus any saved (or, on read replicas, published) on disk"""
+        names = set(self.collections) | {Config.DEFAULT_COLLECTION}
+        if Config.READ_REPLICA and os.path.isdir(Config.SNAPSHOT_DIR):
+            names |= {entry for entry in os.listdir(Config.SNAPSHOT_DIR) if _COLLECTION_NAME_PATTERN.match(entry)}
+        if os.path.isdir(self.root_dir):
+            names |= {
+                entry for entry in os.listdir(self.root_dir)
+                if os.path.exists(os.path.join(self.root_dir, entry, 'advanced_embeddings.pkl'))
+            }
+        return sorted(names)
+    
+    def save(self, name: str = Config.DEFAULT_COLLECTION):
+        filepath = self.store_path(name)
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        self.get(name).save_embeddings(filepath)
+    
+    def search(self, query: str, collections: Optional[List[str]] = None, limit: int = 5,
+               search_type: str = "hybrid", filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Fan the search out to the selected collections in parallel and merge the top-k by score"""
+        stores = {name: self.get(name) for name in (collections or [Config.DEFAULT_COLLECTION])}
+        if not any(store.documents for store in stores.values()):
+            return []
+        
+        # Every collection shares the embedding model, so the query is encoded once
+        query_embedding = next(iter(stores.values())).encode_query(query)
+        futures = {
+            name: self._executor.submit(store.advanced_search, query, limit, search_type, filters, query_embedding)
+            for name, store in stores.items()
+        }
+        
+        merged = []
+        for name, future in futures.items():
+            for result in future.result():
+                result['collection'] = name
+                merged.append(result)
+        return heapq.nlargest(limit, merged, key=lambda result: result['score'])
+    
+    def batch_search(self, queries: List[str], collections: Optional[List[str]] = None, limit: int = 5,
+                     search_type: str = "hybrid",
+                     filters: Optional[List[Optional[Dict[str, Any]]]] = None) -> List[List[Dict[str, Any]]]:
+        """Batched search over the selected collections: one encode call and one scoring pass per collection"""
+        stores = {name: self.get(name) for name in (collections or [Config.DEFAULT_COLLECTION])}
+        if not queries or not any(store.documents for store in stores.values()):
+            return [[] for _ in queries]
+        
+        query_embeddings = next(iter(stores.values())).encode_queries(queries)
+        futures = {
+            name: self._executor.submit(store.batch_search, queries, query_embeddings, limit, search_type, filters)
+            for name, store in stores.items()
+        }
+        
+        merged = [[] for _ in queries]
+        for name, future in futures.items():
+            for index, results in enumerate(future.result()):
+                for result in results:
+                    result['collection'] = name
+                    merged[index].append(result)
+        return [heapq.nlargest(limit, results, key=lambda result: result['score']) for results in merged]
+    
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            collections = dict(self.collections)
+        return {name: store.compaction_stats() for name, store in collections.items()}
+    
+    def filter_options(self, names: Optional[List[str]] = None) -> Dict[str, List[str]]:
+        """Filter values merged across the named collections (every collection by default)"""
+        stores = [self.get(name) for name in (names or self.names())]
+        options = {
+            field: sorted({value for store in stores for value in store.metadata_index.values(field)})
+            for field in FILTER_FIELDS
+        }
+        for option, field in (('county', 'county'), ('state', 'state'), ('township', 'legal_description')):
+            options[option] = sorted({value for store in stores for value in store.location_values(field)})
+        return options
+
 
 class AdvancedGeologicalAgent:
     """Advanced geological analysis agent with pure LLM approach"""
     
     def __init__(self, groq_api_key: str, name: str, role: str, specialization: str):
-        self.client = Groq(api_key=groq_api_key)
+        self.llm_gateway = get_llm_gateway(groq_api_key)
         self.name = name
         self.role = role
         self.specialization = specialization
         self.model = Config.TEXT_MODEL
     
-    def analyze_with_context(self, query: str, context_documents: List[Dict], search_results: List[Dict]) -> str:
+    def analyze_with_context(self, query: str, context_text: str, conversation_text: str = "",
+                             deadline: Optional[Deadline] = None) -> str:
         """Advanced analysis with comprehensive context"""
+        return self._complete(self._analysis_messages(query, context_text, conversation_text), 2000, deadline=deadline)
+    
+    def analyze_with_context_stream(self, query: str, context_text: str, conversation_text: str = "",
+                                    deadline: Optional[Deadline] = None) -> Iterator[str]:
+        """Same analysis as analyze_with_context, yielding completion tokens as they arrive"""
+        return self._complete_stream(self._analysis_messages(query, context_text, conversation_text), 2000, deadline)
+    
+    def merge_panel_answers(self, query: str, panel_answers: Dict[str, str],
+                            deadline: Optional[Deadline] = None) -> str:
+        """Short synthesis of several specialists' answers to the same query"""
+        return self._complete(self._panel_messages(query, panel_answers), Config.PANEL_MERGE_MAX_TOKENS, deadline=deadline)
+    
+    def merge_panel_answers_stream(self, query: str, panel_answers: Dict[str, str],
+                                   deadline: Optional[Deadline] = None) -> Iterator[str]:
+        return self._complete_stream(self._panel_messages(query, panel_answers), Config.PANEL_MERGE_MAX_TOKENS, deadline)
+    
+    def rewrite_query(self, query: str, conversation_text: str, deadline: Optional[Deadline] = None) -> str:
+        """Standalone search query for a follow-up question, or the question itself if rewriting fails"""
         try:
-            # Prepare context from search results
-            context_text = ""
-            for i, result in enumerate(search_results):
-                context_text += f"\n--- RELEVANT DOCUMENT {i+1} (Score: {result['score']:.3f}) ---\n"
-                context_text += f"Source: {result['metadata']['filename']}\n"
-                context_text += f"Content: {result['content'][:2000]}\n"  # Limit each document
-            
-            system_prompt = f"""
-            You are {self.name}, an expert {self.role} specializing in {self.specialization}.
-            
-            EXPERTISE AREAS:
-            - Advanced geological interpretation and analysis
-            - Well log analysis and petrophysical evaluation
-            - Formation evaluation and reservoir characterization
-            - Petroleum geology and hydrocarbon assessment
-            - Drilling and completion engineering
-            - Geospatial analysis and structural geology
-            
-            ANALYSIS APPROACH:
-            - Use ONLY the information provided in the context documents
-            - Provide specific, precise answers with exact values and details
-            - Cross-reference information between multiple sources when available
-            - Identify and resolve conflicts between different data sources
-            - Maintain geological and engineering accuracy in all interpretations
-            
-            RESPONSE REQUIREMENTS:
-            - Extract specific data points (names, numbers, dates, locations)
-            - Provide comprehensive analysis with supporting evidence
-            - Structure responses clearly with headers and bullet points
-            - Include confidence levels and uncertainty assessments
-            - Cite specific sources when referencing data
-            
-            CONTEXT DOCUMENTS:
-            {context_text}
-            """
-            
-            user_prompt = f"""
-            Based on the geological documents provided in the context, please analyze and respond to this query:
-            
-            {query}
-            
-            Requirements:
-            - Provide specific, detailed answers using the document content
-            - Extract exact values, names, and technical data
-            - Explain the geological significance of findings
-            - Structure your response professionally with clear sections
-            - If information is not available in the documents, state this clearly
-            
-            Focus on precision, accuracy, and comprehensive analysis.
-            """
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
+            rewritten = self._complete([
+                {"role": "system", "content": (
+                    "Rewrite the user's follow-up question as a single standalone search query about geological "
+                    "documents. Resolve pronouns and references (wells, formations, depths) from the conversation. "
+                    "Return only the query."
+                )},
+                {"role": "user", "content": f"CONVERSATION:\n{conversation_text}\n\nFOLLOW-UP QUESTION: {query}"}
+            ], 100, model=Config.CONVERSATION_MODEL, deadline=deadline)
+        except DeadlineExceeded:
+            return query
+        rewritten = rewritten.strip().strip('"')
+        if not rewritten or rewritten.startswith(f"Error in {self.name} analysis") or '\n' in rewritten:
+            return query
+        return rewritten
+    
+    def summarize_conversation(self, summary: str, turns: List[Tuple[str, str]], max_tokens: int,
+                               deadline: Optional[Deadline] = None) -> str:
+        """Fold older exchanges into the running conversation summary"""
+        turns_text = "".join(f"\nUser: {question}\nAssistant: {answer}\n" for question, answer in turns)
+        try:
+            updated = self._complete([
+                {"role": "system", "content": (
+                    "Update the running summary of a conversation about geological documents with the new exchanges. "
+                    "Keep well names, formations, depths, values and conclusions the user may refer back to; "
+                    f"drop pleasantries and formatting. Stay under {int(max_tokens * 0.75)} words."
+                )},
+                {"role": "user", "content": f"CURRENT SUMMARY:\n{summary or '(empty)'}\n\nNEW EXCHANGES:{turns_text}"}
+            ], max_tokens, model=Config.CONVERSATION_MODEL, deadline=deadline)
+        except DeadlineExceeded:
+            updated = f"Error in {self.name} analysis: deadline reached"
+        if updated.startswith(f"Error in {self.name} analysis"):
+            # Keep at least the questions so later references still resolve
+            return " ".join([summary] + [f"User asked: {question}" for question, _ in turns]).strip()
+        return updated
+    
+    def _complete(self, messages: List[Dict[str, str]], max_tokens: int, model: Optional[str] = None,
+                  deadline: Optional[Deadline] = None) -> str:
+        """Completion text; running out of time raises DeadlineExceeded so callers can degrade"""
+        try:
+            response = self.llm_gateway.create_completion(
+                deadline=deadline,
+                model=model or self.model,
+                messages=messages,
                 temperature=0.1,
-                max_tokens=2000
+                max_tokens=max_tokens
             )
             
             return response.choices[0].message.content
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             return f"Error in {self.name} analysis: {str(e)}"
+    
+    def _complete_stream(self, messages: List[Dict[str, str]], max_tokens: int,
+                         deadline: Optional[Deadline] = None) -> Iterator[str]:
+        try:
+            stream = self.llm_gateway.create_completion(
+                deadline=deadline,
+                model=self.model,
+                messages=messages,
+                temperature=0.1,
+                max_tokens=max_tokens,
+                stream=True
+            )
+            
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            yield f"Error in {self.name} analysis: {str(e)}"
+    
+    def _panel_messages(self, query: str, panel_answers: Dict[str, str]) -> List[Dict[str, str]]:
+        """Prompts for merging specialist answers into one response"""
+        answers_text = ""
+        for name, answer in panel_answers.items():
+            answers_text += f"\n--- ANSWER FROM {name} ---\n{answer}\n"
+        
+        system_prompt = f"""
+        You are {self.name}, an expert {self.role} chairing a panel of geological specialists.
+        
+        Each specialist analyzed the same context documents from their own discipline.
+        Merge their answers into one concise response:
+        - Keep every specific value, name and citation the specialists agree on
+        - Point out disagreements between specialists and which evidence supports each view
+        - Do not add facts that none of the specialists reported
+        - Attribute discipline-specific interpretations to the specialist who made them
+        
+        SPECIALIST ANSWERS:
+        {answers_text}
+        """
+        
+        user_prompt = f"""
+        Query: {query}
+        
+        Provide the merged panel answer with clear sections, keeping it shorter than the individual answers.
+        """
+        
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+    
+    def _analysis_messages(self, query: str, context_text: str, conversation_text: str = "") -> List[Dict[str, str]]:
+        """System and user prompts for a context-grounded analysis"""
+        system_prompt = f"""
+        You are {self.name}, an expert {self.role} specializing in {self.specialization}.
+        
+        EXPERTISE AREAS:
+        - Advanced geological interpretation and analysis
+        - Well log analysis and petrophysical evaluation
+        - Formation evaluation and reservoir characterization
+        - Petroleum geology and hydrocarbon assessment
+        - Drilling and completion engineering
+        - Geospatial analysis and structural geology
+        
+        ANALYSIS APPROACH:
+        - Use ONLY the information provided in the context documents
+        - Provide specific, precise answers with exact values and details
+        - Cross-reference information between multiple sources when available
+        - Identify and resolve conflicts between different data sources
+        - Maintain geological and engineering accuracy in all interpretations
+        - Treat a COMPUTED DEPTH COMPARISON table as exact; interpret it rather than recomputing depths
+        
+        RESPONSE REQUIREMENTS:
+        - Extract specific data points (names, numbers, dates, locations)
+        - Provide comprehensive analysis with supporting evidence
+        - Structure responses clearly with headers and bullet points
+        - Include confidence levels and uncertainty assessments
+        - Cite specific sources when referencing data
+        
+        CONTEXT DOCUMENTS:
+        {context_text}
+        """
+        
+        if conversation_text:
+            system_prompt += f"""
+        EARLIER CONVERSATION (for resolving references only; answer from the context documents):
+        {conversation_text}
+        """
+        
+        user_prompt = f"""
+        Based on the geological documents provided in the context, please analyze and respond to this query:
+        
+        {query}
+        
+        Requirements:
+        - Provide specific, detailed answers using the document content
+        - Extract exact values, names, and technical data
+        - Explain the geological significance of findings
+        - Structure your response professionally with clear sections
+        - If information is not available in the documents, state this clearly
+        
+        Focus on precision, accuracy, and comprehensive analysis.
+        """
+        
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
 
 class AdvancedGeologicalRAGSystem:
     """Advanced RAG system with pure LLM approach and best-in-class search"""
@@ -302,8 +1390,25 @@ class AdvancedGeologicalRAGSystem:
         self.groq_api_key = groq_api_key
         self.hf_api_key = hf_api_key
         
-        # Advanced embedding store
-        self.embedding_store = AdvancedEmbeddingStore()
+        # Named collections; the default one backs the single-collection API
+        self.collections = EmbeddingCollections()
+        self.embedding_store = self.collections.get(Config.DEFAULT_COLLECTION)
+        
+        # Repeated questions over unchanged retrieved chunks reuse the previous completion
+        self.answer_cache = None
+        if Config.ANSWER_CACHE_ENABLED:
+            self.answer_cache = SemanticAnswerCache(Config.ANSWER_CACHE_SIZE, Config.ANSWER_CACHE_SIMILARITY)
+        
+        # Shared by every session: fair queuing per user, chat ahead of ingestion
+        self.admission = get_admission_controller()
+        
+        # Panel mode runs the chosen specialists concurrently over the same context
+        self._panel_executor = ThreadPoolExecutor(max_workers=Config.PANEL_MAX_WORKERS, thread_name_prefix="agent-panel")
+        
+        # Agent prompts carry the best retrieved passages that fit the token budget
+        self.context_assembler = ContextAssembler(
+            Config.CONTEXT_TOKEN_BUDGET, Config.CONTEXT_CHARS_PER_TOKEN, Config.CONTEXT_PASSAGE_CHARS
+        )
         
         # Create specialized agents
         self.agents = {
@@ -333,70 +1438,642 @@ class AdvancedGeologicalRAGSystem:
             )
         }
         
-    def add_documents_to_knowledge_base(self, processed_files: List[Dict[str, Any]]) -> int:
+    def add_documents_to_knowledge_base(self, processed_files: List[Dict[str, Any]],
+                                        collection: str = Config.DEFAULT_COLLECTION) -> int:
         """Add documents to advanced knowledge base"""
         try:
-            docs_added = self.embedding_store.add_documents(processed_files)
+            docs_added = self.collections.get(collection).add_documents(processed_files)
             
             # Save embeddings for persistence
-            os.makedirs('data', exist_ok=True)
-            self.embedding_store.save_embeddings('data/advanced_embeddings.pkl')
+            self.collections.save(collection)
             
             return docs_added
         except Exception as e:
             st.error(f"❌ Error adding documents to knowledge base: {str(e)}")
             return 0
     
-    def query_agents(self, query: str, agent_type: str = 'synthesis', search_type: str = "hybrid") -> str:
-        """Query agents with advanced search and context"""
+    def delete_from_knowledge_base(self, source_key: str, collection: str = Config.DEFAULT_COLLECTION) -> int:
+        """Remove a document (and its chunks) from the knowledge base"""
         try:
-            # Advanced multi-strategy search
-            search_results = self.embedding_store.advanced_search(
-                query, 
-                limit=5, 
-                search_type=search_type
-            )
+            removed = self.collections.get(collection).delete_document(source_key)
+            if removed:
+                self.collections.save(collection)
+            return removed
+        except Exception as e:
+            st.error(f"❌ Error deleting document from knowledge base: {str(e)}")
+            return 0
+    
+    def publish_snapshot(self, collection: str = Config.DEFAULT_COLLECTION) -> str:
+        """Export the collection as an immutable snapshot that read replicas pick up"""
+        return self.collections.export_snapshot(collection)
+    
+    def compact_knowledge_base(self, collection: str = Config.DEFAULT_COLLECTION) -> Dict[str, Any]:
+        """Reclaim space held by deleted and replaced documents"""
+        stats = self.collections.get(collection).compact()
+        self.collections.save(collection)
+        return stats
+    
+    def find_near_duplicate(self, raw_text: str, source_key: str,
+                            collection: str = Config.DEFAULT_COLLECTION) -> Optional[Tuple[str, float]]:
+        """Near-duplicate of the raw text within the collection the file is being added to"""
+        return self.collections.get(collection).find_near_duplicate(raw_text, source_key)
+    
+    def query_agents(self, query: str, agent_type: str = 'synthesis', search_type: str = "hybrid",
+                     filters: Optional[Dict[str, Any]] = None, rerank: Optional[bool] = None,
+                     collections: Optional[List[str]] = None, panel_agents: Optional[List[str]] = None,
+                     memory: Optional[ConversationMemory] = None, deadline: Optional[Deadline] = None,
+                     user: Optional[str] = None) -> str:
+        """Query agents with advanced search and context; agent_type 'panel' consults several specialists at once"""
+        # One deadline covers the whole request, queueing included; past it the answer degrades to retrieved passages
+        deadline = deadline or Deadline.start(Config.QUERY_DEADLINE_SECONDS)
+        try:
+            with self.admission.admit(user, INTERACTIVE, deadline=deadline):
+                return self._query_agents(
+                    query, agent_type, search_type, filters, rerank, collections, panel_agents, memory, deadline
+                )
+        except AdmissionRejected as e:
+            return f"⏳ {str(e)}"
+    
+    def _query_agents(self, query: str, agent_type: str, search_type: str, filters: Optional[Dict[str, Any]],
+                      rerank: Optional[bool], collections: Optional[List[str]], panel_agents: Optional[List[str]],
+                      memory: Optional[ConversationMemory], deadline: Optional[Deadline]) -> str:
+        try:
+            # Follow-ups are rewritten into standalone queries from the session's conversation memory
+            search_query, conversation_text = self._resolve_follow_up(query, memory, deadline)
+            
+            # Exact lookups (identifiers, tops, dates) are answered from the fact table without the LLM
+            if Config.FACT_FAST_PATH and not filters:
+                fact_answer = self.answer_from_facts(search_query, collections)
+                if fact_answer is not None:
+                    self._remember(memory, query, fact_answer)
+                    return fact_answer
+            
+            versions = self._collection_versions(collections)
+            filters = self._scope_to_location(search_query, filters, collections)
+            search_results = self.retrieve(search_query, search_type, filters, rerank, collections)
             
             if not search_results:
+                if filters:
+                    return f"❌ No documents match the selected filters: {filters}"
                 return "❌ No relevant documents found. Please ensure you have uploaded and processed geological documents."
             
-            # Get agent
-            agent = self.agents.get(agent_type, self.agents['synthesis'])
+            try:
+                answer = self._answer_from_results(
+                    search_query, agent_type, search_type, search_results, versions, panel_agents,
+                    conversation_text, deadline
+                )
+            except DeadlineExceeded:
+                return self._retrieval_only_answer(search_results, deadline) + self._search_footer(
+                    search_results, search_type, filters, collections,
+                    rewritten_query=search_query if search_query != query else None
+                )
+            self._remember(memory, query, answer['response'], deadline)
+            return answer['response'] + self._search_footer(
+                search_results, search_type, filters, collections, answer['cache_similarity'],
+                context_report=answer['context_report'], panel_report=answer['panel_report'],
+                rewritten_query=search_query if search_query != query else None
+            )
             
-            # Advanced analysis with context
-            response = agent.analyze_with_context(query, self.embedding_store.documents, search_results)
+        except Exception as e:
+            return f"❌ Error processing query: {str(e)}"
+    
+    def _answer_from_results(self, query: str, agent_type: str, search_type: str,
+                             search_results: List[Dict[str, Any]], versions: Dict[str, int],
+                             panel_agents: Optional[List[str]] = None, conversation_text: str = "",
+                             deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Agent (or panel) answer for retrieved chunks, served from the answer cache when possible
+
+        Raises DeadlineExceeded when no agent answered in time.
+        """
+        panel = self._resolve_panel(panel_agents) if agent_type == 'panel' else None
+        cache_key, query_embedding, cached = self._lookup_answer_cache(
+            query, f"panel:{','.join(panel)}" if panel else agent_type, search_type, search_results, versions
+        )
+        if cached is not None:
+            return {'response': cached[0], 'cache_similarity': cached[1], 'context_report': None, 'panel_report': None}
+        
+        # Get agent; a panel's answers are merged by the synthesis expert
+        agent = self.agents['synthesis'] if panel else self.agents.get(agent_type, self.agents['synthesis'])
+        
+        # Advanced analysis with context
+        context_text, context_report = self._build_context(query, search_results, list(versions))
+        panel_report = None
+        if panel:
+            panel_answers, panel_report = self._consult_panel(
+                query, context_text, panel, conversation_text,
+                deadline.stage(Config.PANEL_SPECIALIST_SHARE) if deadline else None
+            )
+            if len(panel_answers) == 1:
+                response = next(iter(panel_answers.values()))
+            else:
+                merge_start = time.perf_counter()
+                try:
+                    response = agent.merge_panel_answers(query, panel_answers, deadline)
+                except DeadlineExceeded:
+                    # The specialists finished; hand over their answers unmerged
+                    response = self._join_panel_answers(panel_answers)
+                    panel_report['merge_timed_out'] = True
+                panel_report['merge_seconds'] = time.perf_counter() - merge_start
+        else:
+            response = agent.analyze_with_context(query, context_text, conversation_text, deadline)
+        # Answers shaped by a conversation are looked up but never stored for other sessions
+        if not conversation_text:
+            self._store_answer(cache_key, query_embedding, response, panel_report)
+        
+        return {'response': response, 'cache_similarity': None, 'context_report': context_report, 'panel_report': panel_report}
+    
+    def batch_query(self, items: List[Any], search_type: str = "hybrid", rerank: Optional[bool] = None,
+                    collections: Optional[List[str]] = None, max_workers: Optional[int] = None,
+                    user: str = 'batch') -> List[Dict[str, Any]]:
+        """Answer many (question, agent, filters) items: one batched retrieval, then concurrent agent calls
+
+        Agent calls are admitted as bulk work, so a report run queues behind interactive chat. Each item
+        has its own deadline from when its agent call starts; items turned away by admission control are
+        answered_by 'rejected' (with a retry_after hint) and items that ran out of time 'deferred'.
+        """
+        rerank = Config.RERANK_ENABLED if rerank is None else rerank
+        requests = []
+        for item in items:
+            if isinstance(item, str):
+                item = {'question': item}
+            elif not isinstance(item, dict):
+                item = dict(zip(('question', 'agent', 'filters'), item))
+            requests.append({
+                'question': item['question'],
+                'agent': item.get('agent') or 'synthesis',
+                'filters': {field: values for field, values in (item.get('filters') or {}).items() if values}
+            })
+        results = [dict(request, answer=None, answered_by=None, sources=[], seconds=0.0) for request in requests]
+        
+        # Exact lookups come from the fact table; bad filters fail their own item, not the batch
+        versions = self._collection_versions(collections)
+        pending = []
+        for index, request in enumerate(requests):
+            unknown = [field for field in request['filters'] if field not in FILTER_FIELDS + LOCATION_FILTER_FIELDS]
+            if unknown:
+                results[index].update(answered_by='error', error=f"Unknown filter fields: {', '.join(unknown)}")
+                continue
+            if Config.FACT_FAST_PATH and not request['filters']:
+                fact_answer = self.answer_from_facts(request['question'], collections)
+                if fact_answer is not None:
+                    results[index].update(answer=fact_answer, answered_by='fact_table')
+                    continue
+            pending.append(index)
+        
+        retrieval_start = time.perf_counter()
+        retrieved = self.collections.batch_search(
+            [requests[index]['question'] for index in pending],
+            collections=collections,
+            limit=Config.RERANK_CANDIDATES if rerank else 5,
+            search_type=search_type,
+            filters=[requests[index]['filters'] or None for index in pending]
+        )
+        retrieval_seconds = (time.perf_counter() - retrieval_start) / max(len(pending), 1)
+        
+        def answer(index: int, search_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+            start_time = time.perf_counter()
+            deadline = Deadline.start(Config.BATCH_ITEM_DEADLINE_SECONDS)
+            request = requests[index]
+            try:
+                if rerank and search_results:
+                    search_results = get_shared_reranker().rerank(request['question'], search_results, Config.RERANK_TOP_K)
+                if not search_results:
+                    return {'answered_by': 'none', 'answer': None, 'seconds': time.perf_counter() - start_time}
+                
+                with self.admission.admit(user, BULK, deadline=deadline):
+                    outcome = self._answer_from_results(
+                        request['question'], request['agent'], search_type, search_results, versions,
+                        deadline=deadline
+                    )
+                return {
+                    'answer': outcome['response'],
+                    'answered_by': 'cache' if outcome['cache_similarity'] is not None else request['agent'],
+                    'sources': [
+                        {
+                            'source': format_source(result['metadata']),
+                            'collection': result.get('collection'),
+                            'doc_id': result['doc_id'],
+                            'score': result['score']
+                        }
+                        for result in search_results
+                    ],
+                    'context_tokens': (outcome['context_report'] or {}).get('tokens_used'),
+                    'seconds': retrieval_seconds + time.perf_counter() - start_time
+                }
+            except AdmissionRejected as e:
+                return {'answered_by': 'rejected', 'error': str(e), 'retry_after': e.retry_after,
+                        'seconds': time.perf_counter() - start_time}
+            except DeadlineExceeded as e:
+                return {'answered_by': 'deferred', 'error': str(e), 'seconds': time.perf_counter() - start_time}
+            except Exception as e:
+                return {'answered_by': 'error', 'error': str(e), 'seconds': time.perf_counter() - start_time}
+        
+        # Completions run concurrently; the LLM gateway's shared slot limit caps what reaches Groq
+        with ThreadPoolExecutor(max_workers=max_workers or Config.BATCH_QUERY_WORKERS,
+                                thread_name_prefix="batch-query") as executor:
+            futures = {index: executor.submit(answer, index, search_results)
+                       for index, search_results in zip(pending, retrieved)}
+            for index, future in futures.items():
+                results[index].update(future.result())
+        
+        return results
+    
+    def query_agents_stream(self, query: str, agent_type: str = 'synthesis', search_type: str = "hybrid",
+                            filters: Optional[Dict[str, Any]] = None, rerank: Optional[bool] = None,
+                            collections: Optional[List[str]] = None,
+                            panel_agents: Optional[List[str]] = None,
+                            memory: Optional[ConversationMemory] = None,
+                            deadline: Optional[Deadline] = None, user: Optional[str] = None) -> Iterator[str]:
+        """Streaming query_agents: retrieval runs up front, then the analysis is yielded token by token"""
+        deadline = deadline or Deadline.start(Config.QUERY_DEADLINE_SECONDS)
+        try:
+            # The admission slot is held until the stream is exhausted or closed
+            with self.admission.admit(user, INTERACTIVE, deadline=deadline):
+                yield from self._query_agents_stream(
+                    query, agent_type, search_type, filters, rerank, collections, panel_agents, memory, deadline
+                )
+        except AdmissionRejected as e:
+            yield f"⏳ {str(e)}"
+    
+    def _query_agents_stream(self, query: str, agent_type: str, search_type: str,
+                             filters: Optional[Dict[str, Any]], rerank: Optional[bool],
+                             collections: Optional[List[str]], panel_agents: Optional[List[str]],
+                             memory: Optional[ConversationMemory], deadline: Optional[Deadline]) -> Iterator[str]:
+        try:
+            original_query = query
+            query, conversation_text = self._resolve_follow_up(query, memory, deadline)
+            rewritten_query = query if query != original_query else None
             
-            # Add search metadata
-            search_info = f"\n\n---\n**Search Information:**\n"
-            search_info += f"- Found {len(search_results)} relevant documents\n"
-            search_info += f"- Search type: {search_type}\n"
-            search_info += f"- Top document: {search_results[0]['metadata']['filename']} (score: {search_results[0]['score']:.3f})\n"
+            if Config.FACT_FAST_PATH and not filters:
+                fact_answer = self.answer_from_facts(query, collections)
+                if fact_answer is not None:
+                    self._remember(memory, original_query, fact_answer)
+                    yield fact_answer
+                    return
             
-            return response + search_info
+            versions = self._collection_versions(collections)
+            filters = self._scope_to_location(query, filters, collections)
+            search_results = self.retrieve(query, search_type, filters, rerank, collections)
+            
+            if not search_results:
+                if filters:
+                    yield f"❌ No documents match the selected filters: {filters}"
+                else:
+                    yield "❌ No relevant documents found. Please ensure you have uploaded and processed geological documents."
+                return
+            
+            panel = self._resolve_panel(panel_agents) if agent_type == 'panel' else None
+            cache_key, query_embedding, cached = self._lookup_answer_cache(
+                query, f"panel:{','.join(panel)}" if panel else agent_type, search_type, search_results, versions
+            )
+            if cached is not None:
+                self._remember(memory, original_query, cached[0])
+                yield cached[0] + self._search_footer(
+                    search_results, search_type, filters, collections, cached[1], rewritten_query=rewritten_query
+                )
+                return
+            
+            agent = self.agents['synthesis'] if panel else self.agents.get(agent_type, self.agents['synthesis'])
+            context_text, context_report = self._build_context(query, search_results, collections)
+            panel_report = None
+            panel_answers = {}
+            tokens = []
+            timed_out = False
+            try:
+                if panel:
+                    # Specialists run to completion in parallel; only the merge is streamed
+                    panel_answers, panel_report = self._consult_panel(
+                        query, context_text, panel, conversation_text,
+                        deadline.stage(Config.PANEL_SPECIALIST_SHARE) if deadline else None
+                    )
+                    if len(panel_answers) == 1:
+                        token_stream = iter(panel_answers.values())
+                    else:
+                        token_stream = agent.merge_panel_answers_stream(query, panel_answers, deadline)
+                else:
+                    token_stream = agent.analyze_with_context_stream(query, context_text, conversation_text, deadline)
+                
+                merge_start = time.perf_counter()
+                for token in token_stream:
+                    tokens.append(token)
+                    yield token
+                if panel_report is not None and len(panel_answers) > 1:
+                    panel_report['merge_seconds'] = time.perf_counter() - merge_start
+            except DeadlineExceeded:
+                timed_out = True
+                if tokens:
+                    yield f"\n\n⏱️ *Answer cut off at the {deadline} deadline.*"
+                else:
+                    fallback = (
+                        self._join_panel_answers(panel_answers) if len(panel_answers) > 1
+                        else self._retrieval_only_answer(search_results, deadline)
+                    )
+                    tokens.append(fallback)
+                    yield fallback
+                if panel_report is not None:
+                    panel_report['merge_timed_out'] = True
+            response = ''.join(tokens)
+            # Degraded answers are never cached
+            if not conversation_text and not timed_out:
+                self._store_answer(cache_key, query_embedding, response, panel_report)
+            
+            # Search metadata goes out once the analysis has finished streaming
+            yield self._search_footer(
+                search_results, search_type, filters, collections,
+                context_report=context_report, panel_report=panel_report, rewritten_query=rewritten_query
+            )
+            self._remember(memory, original_query, response, deadline)
             
         except Exception as e:
-            return f"❌ Error processing query: {str(e)}"
+            yield f"❌ Error processing query: {str(e)}"
+    
+    def _resolve_panel(self, panel_agents: Optional[List[str]]) -> List[str]:
+        """Known specialist agent types for a panel, in a stable order"""
+        requested = panel_agents or Config.PANEL_AGENTS
+        panel = [agent_type for agent_type in self.agents if agent_type in requested]
+        return panel or ['synthesis']
+    
+    def _consult_panel(self, query: str, context_text: str, panel: List[str], conversation_text: str = "",
+                       deadline: Optional[Deadline] = None) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """Run each specialist on the shared context concurrently; failed specialists are left out of the merge
+
+        Specialists still running at the deadline are dropped; DeadlineExceeded is raised if none finished.
+        """
+        def analyze(agent: AdvancedGeologicalAgent) -> Tuple[Optional[str], float]:
+            start_time = time.perf_counter()
+            try:
+                answer = agent.analyze_with_context(query, context_text, conversation_text, deadline)
+            except DeadlineExceeded:
+                answer = None
+            return answer, time.perf_counter() - start_time
+        
+        futures = {agent_type: self._panel_executor.submit(analyze, self.agents[agent_type]) for agent_type in panel}
+        answers = {}
+        errors = {}
+        timed_out = []
+        timings = {}
+        for agent_type, future in futures.items():
+            agent = self.agents[agent_type]
+            answer, timings[agent.name] = future.result()
+            if answer is None:
+                timed_out.append(agent.name)
+            elif answer.startswith(f"Error in {agent.name} analysis"):
+                errors[agent.name] = answer
+            else:
+                answers[agent.name] = answer
+        
+        if not answers:
+            if timed_out:
+                raise DeadlineExceeded(f"No panel member finished before the {deadline} deadline")
+            # Nothing to merge: surface the first failure as the answer
+            answers = dict(list(errors.items())[:1])
+        return answers, {'agent_seconds': timings, 'failed': list(errors), 'timed_out': timed_out}
+    
+    def _join_panel_answers(self, panel_answers: Dict[str, str]) -> str:
+        """Specialists' answers one after another, for when there is no time left to merge them"""
+        return "\n\n".join(f"**{name}:**\n{answer}" for name, answer in panel_answers.items())
+    
+    def _retrieval_only_answer(self, search_results: List[Dict[str, Any]], deadline: Deadline) -> str:
+        """Degraded answer when the agents run out of time: the retrieved passages themselves"""
+        answer = (
+            f"⏱️ **The analysis did not finish within {deadline}.** "
+            f"The most relevant passages found for your question:\n\n"
+        )
+        for i, result in enumerate(search_results, 1):
+            snippet = re.sub(r'\s+', ' ', result['content']).strip()
+            if len(snippet) > 400:
+                snippet = snippet[:400].rsplit(' ', 1)[0] + " [...]"
+            answer += f"**{i}. {format_source(result['metadata'])}** (score: {result['score']:.3f})\n> {snippet}\n\n"
+        return answer.rstrip()
+    
+    def _resolve_follow_up(self, query: str, memory: Optional[ConversationMemory],
+                           deadline: Optional[Deadline] = None) -> Tuple[str, str]:
+        """Standalone search query and conversation text for a query; standalone questions use neither"""
+        if memory is None or not memory.is_follow_up(query):
+            return query, ""
+        conversation_text = memory.render()
+        rewrite_deadline = deadline.stage(Config.QUERY_REWRITE_SHARE) if deadline else None
+        return self.agents['synthesis'].rewrite_query(query, conversation_text, rewrite_deadline), conversation_text
+    
+    def _remember(self, memory: Optional[ConversationMemory], question: str, answer: str,
+                  deadline: Optional[Deadline] = None):
+        """Record the exchange and fold turns that no longer fit into the rolling summary"""
+        if memory is None:
+            return
+        memory.add_turn(question, answer)
+        overflow = memory.pop_overflow()
+        if overflow:
+            memory.set_summary(self.agents['synthesis'].summarize_conversation(
+                memory.summary, overflow, memory.summary_token_budget(), deadline
+            ))
+    
+    def _build_context(self, query: str, search_results: List[Dict[str, Any]],
+                       collections: Optional[List[str]]) -> Tuple[str, Dict[str, Any]]:
+        """Budgeted passages for the agent prompt, led by a computed depth comparison when the query asks for one"""
+        context_text, context_report = self.context_assembler.assemble(query, search_results)
+        comparison = self.depth_comparison(query, collections)
+        context_report['depth_comparison'] = comparison is not None
+        if comparison is not None:
+            context_text = f"\n--- COMPUTED DEPTH COMPARISON (structured fact table) ---\n{comparison}\n" + context_text
+        return context_text, context_report
+    
+    def depth_comparison(self, query: str, collections: Optional[List[str]] = None) -> Optional[str]:
+        """Cross-well formation top comparison computed from the depth interval index, or None"""
+        tables = []
+        for name in collections or [Config.DEFAULT_COLLECTION]:
+            comparison = self.collections.get(name).compare_depths(query)
+            if comparison is not None:
+                title, table = comparison
+                label = f"{title} ({name} collection)" if collections and len(collections) > 1 else title
+                tables.append(f"{label}:\n{table}")
+        return "\n".join(tables) if tables else None
+    
+    def _collection_versions(self, collections: Optional[List[str]]) -> Dict[str, int]:
+        """Content version of each collection a query reads, taken before retrieval"""
+        return {name: self.collections.get(name).version for name in collections or [Config.DEFAULT_COLLECTION]}
+    
+    def _lookup_answer_cache(self, query: str, agent_type: str, search_type: str,
+                             search_results: List[Dict[str, Any]], versions: Dict[str, int]):
+        """Answer cache key, query embedding and cached (answer, similarity) for a retrieval"""
+        if self.answer_cache is None:
+            return None, None, None
+        
+        # Served from the query embedding cache: retrieval has just encoded the same query
+        query_embedding = self.collections.get(next(iter(versions))).encode_query(query)
+        chunk_ids = [
+            (result.get('collection', Config.DEFAULT_COLLECTION), result['doc_id']) for result in search_results
+        ]
+        cache_key = SemanticAnswerCache.make_key(agent_type, search_type, chunk_ids, versions)
+        return cache_key, query_embedding, self.answer_cache.get(cache_key, query_embedding)
+    
+    def _store_answer(self, cache_key, query_embedding: np.ndarray, response: str,
+                      panel_report: Optional[Dict[str, Any]] = None):
+        """Cache a completed answer unless any agent involved failed or ran out of time"""
+        if cache_key is None or not response:
+            return
+        if panel_report and (panel_report['failed'] or panel_report.get('timed_out') or panel_report.get('merge_timed_out')):
+            return
+        if any(response.startswith(f"Error in {agent.name} analysis") for agent in self.agents.values()):
+            return
+        self.answer_cache.put(cache_key, query_embedding, response)
+    
+    def _search_footer(self, search_results: List[Dict[str, Any]], search_type: str,
+                       filters: Optional[Dict[str, Any]], collections: Optional[List[str]],
+                       cache_similarity: Optional[float] = None,
+                       context_report: Optional[Dict[str, Any]] = None,
+                       panel_report: Optional[Dict[str, Any]] = None,
+                       rewritten_query: Optional[str] = None) -> str:
+        """Search metadata appended to agent answers"""
+        search_info = f"\n\n---\n**Search Information:**\n"
+        if rewritten_query:
+            search_info += f"- Follow-up searched as: \"{rewritten_query}\"\n"
+        if cache_similarity is not None:
+            search_info += f"- Served from the answer cache (query similarity {cache_similarity:.3f})\n"
+        search_info += f"- Found {len(search_results)} relevant documents\n"
+        search_info += f"- Search type: {search_type}\n"
+        if 'rerank_score' in search_results[0]:
+            search_info += f"- Reranked with cross-encoder (top {len(search_results)} of {Config.RERANK_CANDIDATES} candidates)\n"
+        if filters:
+            search_info += f"- Filters: {filters}\n"
+        if collections:
+            search_info += f"- Collections: {', '.join(collections)}\n"
+        search_info += f"- Top document: {format_source(search_results[0]['metadata'])} (score: {search_results[0]['score']:.3f})\n"
+        if context_report:
+            search_info += (
+                f"- Context: {context_report['tokens_used']:,} of {context_report['token_budget']:,} tokens, "
+                f"{context_report['passages_used']} of {context_report['passages_available']} passages"
+            )
+            if context_report['duplicate_paragraphs_dropped']:
+                search_info += f", {context_report['duplicate_paragraphs_dropped']} duplicate paragraphs dropped"
+            search_info += "\n"
+            if context_report.get('depth_comparison'):
+                search_info += "- Cross-well depths computed from the interval index and given to the agent\n"
+        if panel_report:
+            timings = ', '.join(f"{name} {seconds:.1f} s" for name, seconds in panel_report['agent_seconds'].items())
+            search_info += f"- Panel: {timings}"
+            if panel_report.get('merge_timed_out'):
+                search_info += "; merge did not finish before the deadline"
+            elif 'merge_seconds' in panel_report:
+                search_info += f"; merged in {panel_report['merge_seconds']:.1f} s"
+            search_info += "\n"
+            if panel_report['failed']:
+                search_info += f"- Panel members that failed: {', '.join(panel_report['failed'])}\n"
+            if panel_report.get('timed_out'):
+                search_info += f"- Panel members cut off by the deadline: {', '.join(panel_report['timed_out'])}\n"
+        return search_info
+    
+    def answer_from_facts(self, query: str, collections: Optional[List[str]] = None) -> Optional[str]:
+        """Markdown table answer from the structured fact table, or None to fall back to the agents"""
+        start_time = time.perf_counter()
+        description = None
+        rows = []
+        for name in collections or [Config.DEFAULT_COLLECTION]:
+            match = self.collections.get(name).lookup_facts(query)
+            if match is not None:
+                description = match[0]
+                rows.extend(match[1])
+        if not rows:
+            return None
+        
+        answer = f"**{description}**\n\n| Well | Attribute | Value | Source |\n|---|---|---|---|\n"
+        for row in sorted(rows, key=lambda row: (row['well'].lower(), row['numeric'] is None, row['numeric'] or 0)):
+            value = row['value']
+            if row['record_type'] == 'interval' and row['numeric'] is not None:
+                value = f"{value}: {row['numeric']:,.1f}–{row['numeric_end']:,.1f} {row['unit']}".rstrip()
+            elif row['record_type'] in ('formation_top', 'test_result') and row['numeric'] is not None:
+                value = f"{value}: {row['numeric']:,.1f} {row['unit']}".rstrip()
+                if row['numeric_end'] is not None:
+                    value += f" (base {row['numeric_end']:,.1f} {row['unit']})"
+            answer += f"| {row['well']} | {row['attribute'].replace('_', ' ')} | {value} | {row['source']} |\n"
+        
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        answer += f"\n\n---\n**Search Information:**\n"
+        answer += f"- Answered from the structured fact table ({len(rows)} records, {elapsed_ms:.1f} ms)\n"
+        answer += "- Ask for an interpretation or explanation to get a full agent analysis\n"
+        return answer
     
     def get_system_stats(self) -> Dict[str, Any]:
         """Get comprehensive system statistics"""
         return {
             'agents_count': len(self.agents),
-            'documents_loaded': len(self.embedding_store.documents),
-            'knowledge_base_loaded': len(self.embedding_store.documents) > 0,
+            'documents_loaded': self.embedding_store.metadata_index.count_matching({'chunk_type': 'synthesis'}),
+            'chunks_indexed': len(self.embedding_store.documents) - len(self.embedding_store.deleted),
+            'knowledge_base_loaded': any(stats['sources'] for stats in self.collections.stats().values()),
             'vector_db_type': 'Advanced Embedding Store with Hybrid Search',
             'text_model': Config.TEXT_MODEL,
             'vision_model': Config.VISION_MODEL,
             'embedding_model': 'all-mpnet-base-v2 (Advanced)',
             'search_capabilities': ['Vector Similarity', 'Keyword Matching', 'Semantic Analysis', 'Hybrid Fusion'],
-            'processing_approach': 'Pure LLM with Heavy Vision Analysis'
+            'processing_approach': 'Pure LLM with Heavy Vision Analysis',
+            'query_embedding_cache': self.embedding_store.query_cache.stats(),
+            'embedding_service': self.embedding_store.embedder.stats(),
+            'llm_gateway': get_llm_gateway(self.groq_api_key).stats(),
+            'answer_cache': self.answer_cache.stats() if self.answer_cache is not None else None,
+            'admission': self.admission.stats(),
+            'knowledge_base': self.embedding_store.compaction_stats(),
+            'collections': self.collections.stats(),
+            'read_replica': Config.READ_REPLICA,
+            'snapshot_followers': {name: follower.stats() for name, follower in self.collections.followers.items()}
         }
     
+    def retrieve(self, query: str, search_type: str = "hybrid", filters: Optional[Dict[str, Any]] = None,
+                 rerank: Optional[bool] = None, collections: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Retrieve context chunks, optionally with a cheap wide first stage and a cross-encoder second stage"""
+        rerank = Config.RERANK_ENABLED if rerank is None else rerank
+        
+        # Advanced multi-strategy search, scoped by metadata filters and collections when given
+        search_results = self.collections.search(
+            query,
+            collections=collections,
+            limit=Config.RERANK_CANDIDATES if rerank else 5,
+            search_type=search_type,
+            filters=filters
+        )
+        
+        if rerank and search_results:
+            search_results = get_shared_reranker().rerank(query, search_results, Config.RERANK_TOP_K)
+        
+        return search_results
+    
+    def get_filter_options(self, collections: Optional[List[str]] = None) -> Dict[str, List[str]]:
+        """Indexed values available for each metadata filter field and extracted well location attribute
+        
+        Values are merged across the given collections, or across every collection when none are given.
+        """
+        return self.collections.filter_options(collections)
+    
+    def _scope_to_location(self, query: str, filters: Optional[Dict[str, Any]],
+                           collections: Optional[List[str]]) -> Optional[Dict[str, Any]]:
+        """Add a location filter for area-scoped questions ("within 5 km of Smith 14-2", "in Midland County")
+        
+        Only applied when the reference point or county is known in a searched collection, so questions
+        about places the fact table has never seen keep searching everything.
+        """
+        if not Config.LOCATION_SCOPED_RETRIEVAL or any(field in (filters or {}) for field in LOCATION_FILTER_FIELDS):
+            return filters
+        stores = [self.collections.get(name) for name in collections or [Config.DEFAULT_COLLECTION]]
+        
+        proximity = parse_proximity(query)
+        if proximity is not None:
+            for store in stores:
+                origin = store.locate(proximity[1])
+                if origin is not None:
+                    return dict(filters or {}, near=f"{round(proximity[0], 1):g} km of {origin[2]}")
+        
+        match = re.search(r'\bin\s+(?:the\s+)?((?:[A-Z][\w.\'-]*\s+){1,3})(?:county|parish)\b', query, re.IGNORECASE)
+        if match:
+            county = normalize_county(match.group(1))
+            if any(county in {normalize_county(value) for value in store.location_values('county')} for store in stores):
+                return dict(filters or {}, county=[county])
+        return filters
+    
     def test_search_capabilities(self, query: str) -> Dict[str, Any]:
         """Test search capabilities with detailed results"""
         results = {}
         
-        for search_type in ['vector', 'keyword', 'hybrid']:
-            search_results = self.embedding_store.advanced_search(query, limit=3, search_type=search_type)
+        # All strategies share one query encoding
+        all_results = self.embedding_store.multi_search(query, ['vector', 'keyword', 'hybrid'], limit=3)
+        for search_type, search_results in all_results.items():
             results[search_type] = {
                 'count': len(search_results),
                 'top_score': search_results[0]['score'] if search_results else 0,
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Batch question answering for report generation
+Usage: python -m app.batch_query questions.jsonl [output.jsonl] [well ...]
+
+Each input line is {"question": ..., "agent": ..., "filters": {...}} (only question is required).
+When wells are given, every question is asked once per well: "{well}" in the question is
+replaced by the well name and the search is scoped to that well.
+"""
+
+import sys
+import json
+import time
+from typing import List, Dict, Any
+
+from app.utils.config import Config
+
+
+def load_questions(path: str) -> List[Dict[str, Any]]:
+    """Read question items from a JSONL file, skipping blank lines"""
+    items = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if isinstance(item, str):
+                item = {'question': item}
+            if not item.get('question'):
+                raise ValueError(f"{path}:{line_number} has no question")
+            items.append(item)
+    return items
+
+
+def expand_for_wells(items: List[Dict[str, Any]], wells: List[str]) -> List[Dict[str, Any]]:
+    """One copy of every question per well, scoped to that well"""
+    expanded = []
+    for well in wells:
+        for item in items:
+            filters = dict(item.get('filters') or {})
+            filters['well'] = [well]
+            expanded.append(dict(item, question=item['question'].replace('{well}', well), filters=filters, well=well))
+    return expanded
+
+
+def main():
+    """Answer every question in a JSONL file and write one JSON result per line"""
+    if len(sys.argv) < 2:
+        print("Usage: python -m app.batch_query questions.jsonl [output.jsonl] [well ...]")
+        sys.exit(1)
+
+    is_valid, message = Config.validate_required_keys()
+    if not is_valid:
+        print(f"❌ API Configuration Error: {message}")
+        sys.exit(1)
+
+    input_path = sys.argv[1]
+    output_path = sys.argv[2] if len(sys.argv) > 2 else input_path.rsplit('.', 1)[0] + '_answers.jsonl'
+    items = load_questions(input_path)
+    if len(sys.argv) > 3:
+        items = expand_for_wells(items, sys.argv[3:])
+
+    from app.agents.rag_system import AdvancedGeologicalRAGSystem
+    rag_system = AdvancedGeologicalRAGSystem(Config.GROQ_API_KEY, Config.HUGGINGFACE_API_KEY)
+
+    print(f"🔍 Answering {len(items)} questions...")
+    start_time = time.perf_counter()
+    results = rag_system.batch_query(items)
+    elapsed = time.perf_counter() - start_time
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for item, result in zip(items, results):
+            if 'well' in item:
+                result['well'] = item['well']
+            f.write(json.dumps(result, ensure_ascii=False) + '\n')
+
+    answered = sum(1 for result in results if result['answer'])
+    failed = sum(1 for result in results if result['answered_by'] == 'error')
+    # Rejected and deferred questions were not answered because the server was busy; re-run them later
+    retry = sum(1 for result in results if result['answered_by'] in ('rejected', 'deferred'))
+    print(f"✅ {answered}/{len(results)} answered ({failed} errors, {retry} to retry) in {elapsed:.1f}s -> {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
 import streamlit as st
 import pandas as pd
 import os
+import itertools
+import uuid
 from typing import List, Dict, Any
 from app.processors.file_processor import PureLLMFileProcessor
 from app.agents.rag_system import AdvancedGeologicalRAGSystem
 from app.utils.config import Config
+from app.utils.conversation_memory import ConversationMemory
 
 # Page configuration
 st.set_page_config(
@@ -51,10 +54,25 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource(show_spinner=False)
+def get_shared_systems(groq_api_key: str, hf_api_key: str):
+    """Build the RAG system and file processor once per process, shared by every session"""
+    Config.cleanup_temp_directory()
+    rag_system = AdvancedGeologicalRAGSystem(groq_api_key, hf_api_key)
+    file_processor = PureLLMFileProcessor(groq_api_key)
+    return rag_system, file_processor
+
 def init_session_state():
     """Initialize session state variables"""
     if 'messages' not in st.session_state:
         st.session_state.messages = []
+    if 'user_id' not in st.session_state:
+        # Admission control queues work fairly per browser session
+        st.session_state.user_id = uuid.uuid4().hex
+    if 'conversation_memory' not in st.session_state:
+        st.session_state.conversation_memory = ConversationMemory(
+            Config.CONVERSATION_TOKEN_BUDGET, Config.CONVERSATION_RECENT_TURNS, Config.CONTEXT_CHARS_PER_TOKEN
+        )
     if 'rag_system' not in st.session_state:
         st.session_state.rag_system = None
     if 'file_processor' not in st.session_state:
@@ -99,14 +117,12 @@ def main():
             if not st.session_state.system_initialized:
                 try:
                     with st.spinner("🚀 Initializing Pure LLM System..."):
-                        Config.cleanup_temp_directory()
-                        
-                        st.session_state.rag_system = AdvancedGeologicalRAGSystem(
+                        # Model, knowledge base and LLM gateway are shared; sessions only keep chat state
+                        rag_system, file_processor = get_shared_systems(
                             Config.GROQ_API_KEY, Config.HUGGINGFACE_API_KEY
                         )
-                        st.session_state.file_processor = PureLLMFileProcessor(
-                            Config.GROQ_API_KEY
-                        )
+                        st.session_state.rag_system = rag_system
+                        st.session_state.file_processor = file_processor
                         st.session_state.system_initialized = True
                         
                     st.success("✅ Pure LLM system initialized!")
@@ -132,12 +148,17 @@ def main():
         st.header("📁 Advanced Document Upload")
         st.markdown("**Supports:** PDF, CSV, Excel, Images, TXT, DOCX, LAS")
         
-        uploaded_files = st.file_uploader(
-            "Upload geological documents",
-            accept_multiple_files=True,
-            type=['pdf', 'csv', 'xlsx', 'xls', 'txt', 'docx', 'png', 'jpg', 'jpeg', 'las', 'tiff', 'tif'],
-            help="Upload files for pure LLM analysis with heavy vision processing"
-        )
+        if Config.READ_REPLICA:
+            # Read replicas serve published snapshots and never ingest
+            st.info("📦 Read replica: serving published knowledge base snapshots, uploads are disabled")
+            uploaded_files = None
+        else:
+            uploaded_files = st.file_uploader(
+                "Upload geological documents",
+                accept_multiple_files=True,
+                type=['pdf', 'csv', 'xlsx', 'xls', 'txt', 'docx', 'png', 'jpg', 'jpeg', 'las', 'tiff', 'tif'],
+                help="Upload files for pure LLM analysis with heavy vision processing"
+            )
         
         # Processing options (Force vision is always enabled)
         if uploaded_files and st.session_state.system_initialized:
@@ -149,13 +170,24 @@ def main():
             
             st.info("🔥 Force vision is enabled by default for maximum extraction quality")
             
+            # Target collection (e.g. one per basin or client)
+            collection = st.text_input(
+                "🗂️ Collection",
+                value=Config.DEFAULT_COLLECTION,
+                help="Documents are indexed into this named collection; new names create a collection"
+            )
+            
             # Process files button
             if st.button("🚀 Process with Pure LLM Analysis", type="primary"):
-                process_files_pure_llm(uploaded_files)
+                process_files_pure_llm(uploaded_files, collection.strip() or Config.DEFAULT_COLLECTION)
         
         # Display processed files
         if st.session_state.processed_files:
             display_processed_files_advanced()
+        
+        # Knowledge base maintenance
+        if st.session_state.system_initialized and st.session_state.rag_system:
+            display_knowledge_base_management()
     
     # Main chat interface
     st.header("💬 Advanced Geological Chat")
@@ -176,17 +208,75 @@ def main():
         # Agent selection
         agent_type = st.selectbox(
             "🤖 Select Expert Agent",
-            ['synthesis', 'document', 'data', 'vision'],
+            ['synthesis', 'document', 'data', 'vision', 'panel'],
             format_func=lambda x: {
                 'synthesis': '🧠 Geological Synthesis Expert (Recommended)',
                 'document': '📄 Document Analysis Specialist',
                 'data': '📊 Petrophysical Data Analyst',
-                'vision': '👁️ Vision Analysis Expert'
+                'vision': '👁️ Vision Analysis Expert',
+                'panel': '👥 Expert Panel (specialists in parallel, merged answer)'
             }[x]
         )
         
+        # Panel members run concurrently on the same retrieved context
+        panel_agents = None
+        if agent_type == 'panel':
+            panel_agents = st.multiselect(
+                "👥 Panel members",
+                ['document', 'data', 'vision', 'synthesis'],
+                default=[agent for agent in Config.PANEL_AGENTS if agent in ('document', 'data', 'vision', 'synthesis')],
+                help="Each member analyzes the shared context in parallel; the synthesis expert merges their answers"
+            ) or None
+        
+        # Optional cross-encoder second stage
+        rerank = st.checkbox(
+            "🎯 Rerank top candidates with cross-encoder",
+            value=Config.RERANK_ENABLED,
+            help="Retrieves a wider candidate set and sends only the best few chunks to the agent"
+        )
+        
+        # Collections to search; results are merged by score across them
+        collections = None
+        collection_names = st.session_state.rag_system.collections.names()
+        if len(collection_names) > 1:
+            collections = st.multiselect(
+                "🗂️ Collections",
+                collection_names,
+                default=[Config.DEFAULT_COLLECTION],
+                help="Selected collections are searched in parallel"
+            ) or None
+        
         # Knowledge base status
         stats = st.session_state.rag_system.get_system_stats()
+        
+        # Optional scope filters, resolved from metadata indexes before scoring
+        filters = {}
+        if stats['knowledge_base_loaded']:
+            # Offer the values of the collections that will actually be searched
+            filter_options = st.session_state.rag_system.get_filter_options(
+                collections or [Config.DEFAULT_COLLECTION]
+            )
+            with st.expander("🎯 Scope Search (optional filters)", expanded=False):
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    filters['filename'] = st.multiselect("Files", filter_options['filename'])
+                    filters['extension'] = st.multiselect("File types", filter_options['extension'])
+                with col2:
+                    filters['well'] = st.multiselect("Wells", filter_options['well'])
+                    filters['api'] = st.multiselect("API numbers", filter_options['api'])
+                with col3:
+                    filters['year'] = st.multiselect("Years", filter_options['year'])
+                    filters['method'] = st.multiselect("Processing method", filter_options['method'])
+                col4, col5 = st.columns(2)
+                with col4:
+                    filters['near'] = st.text_input(
+                        "Near", placeholder="5 km of Smith 14-2",
+                        help="Only search documents about wells within this distance of a well or coordinates"
+                    )
+                with col5:
+                    filters['county'] = st.multiselect("Counties", filter_options['county'])
+            filters = {field: values for field, values in filters.items() if values}
+        
         if stats['knowledge_base_loaded']:
             st.success(f"✅ Advanced Knowledge Base: {stats['documents_loaded']} documents with embeddings")
             
@@ -199,6 +289,12 @@ def main():
         else:
             st.warning("⚠️ Upload and process documents to enable advanced search")
         
+        # Conversation memory carries follow-up questions across turns until the user starts over
+        if st.session_state.messages and st.button("🧹 New conversation"):
+            st.session_state.messages = []
+            st.session_state.conversation_memory.clear()
+            st.rerun()
+        
         # Display chat messages
         for message in st.session_state.messages:
             with st.chat_message(message["role"]):
@@ -206,7 +302,7 @@ def main():
         
         # Chat input
         if prompt := st.chat_input("Ask about your geological documents with advanced AI analysis..."):
-            handle_chat_input_advanced(prompt, agent_type, search_type)
+            handle_chat_input_advanced(prompt, agent_type, search_type, filters, rerank, collections, panel_agents)
         
         # Example queries
         if len(st.session_state.messages) == 0:
@@ -222,8 +318,9 @@ def main():
     else:
         st.info("🔧 Initialize the system and upload documents to start advanced analysis")
 
-def process_files_pure_llm(uploaded_files):
+def process_files_pure_llm(uploaded_files, collection=Config.DEFAULT_COLLECTION):
     """Process files with pure LLM approach"""
+    rag_system = st.session_state.rag_system
     st.session_state.processed_files = []
     progress_bar = st.progress(0)
     status_text = st.empty()
@@ -234,8 +331,20 @@ def process_files_pure_llm(uploaded_files):
         try:
             with st.spinner(f"Advanced analysis of {uploaded_file.name}..."):
                 # Force vision is always True
-                processed_data = st.session_state.file_processor.process_file(uploaded_file, force_vision=True)
+                processed_data = st.session_state.file_processor.process_file(
+                    uploaded_file,
+                    force_vision=True,
+                    duplicate_checker=lambda raw_text, filename: rag_system.find_near_duplicate(raw_text, filename, collection),
+                    user=st.session_state.user_id
+                )
                 st.session_state.processed_files.append(processed_data)
+                if processed_data['metadata'].get('partial'):
+                    st.warning(
+                        f"⏱️ {uploaded_file.name} hit the ingestion deadline or a busy queue; "
+                        f"indexing the analyses that finished"
+                    )
+                if processed_data['metadata'].get('analysis_failed'):
+                    st.warning(f"⚠️ LLM analysis of {uploaded_file.name} did not complete; indexing its extracted text only")
                 
         except Exception as e:
             error_data = {
@@ -249,19 +358,66 @@ def process_files_pure_llm(uploaded_files):
     
     # Add to knowledge base
     try:
-        docs_added = st.session_state.rag_system.add_documents_to_knowledge_base(st.session_state.processed_files)
+        docs_added = rag_system.add_documents_to_knowledge_base(st.session_state.processed_files, collection)
         
         status_text.empty()
         
         successful_files = len([f for f in st.session_state.processed_files if not f['metadata'].get('error', False)])
         st.success(f"✅ Pure LLM processing complete: {successful_files}/{len(uploaded_files)} files, {docs_added} in advanced knowledge base")
-        
-        # Clean up
-        Config.cleanup_temp_directory()
+        # Temp files are removed by the processor itself; a directory-wide cleanup here
+        # could delete files another session is still processing
             
     except Exception as e:
         st.error(f"❌ Error adding to knowledge base: {str(e)}")
 
+def display_knowledge_base_management():
+    """Delete indexed documents and compact the knowledge base"""
+    rag_system = st.session_state.rag_system
+    collection_names = [
+        name for name in rag_system.collections.names()
+        if rag_system.collections.get(name).sources or rag_system.collections.get(name).deleted
+    ]
+    if not collection_names:
+        return
+    
+    with st.expander("🗂️ Manage Knowledge Base", expanded=False):
+        # Every action below applies to the chosen collection only
+        collection = collection_names[0]
+        if len(collection_names) > 1:
+            collection = st.selectbox("🗂️ Collection", collection_names)
+        store = rag_system.collections.get(collection)
+        kb_stats = store.compaction_stats()
+        st.markdown(
+            f"**Documents:** {kb_stats['sources']} | **Live chunks:** {kb_stats['live_records']} | "
+            f"**Deleted (pending compaction):** {kb_stats['tombstoned_records']}"
+        )
+        if kb_stats['snapshot_version']:
+            st.info(f"📦 Serving read-only snapshot {kb_stats['snapshot_version']}")
+            return
+        
+        source_key = st.selectbox("Document", sorted(store.sources))
+        # Near-duplicates were linked to this document instead of being indexed, so they go with it
+        duplicates = store.duplicates_of(source_key) if source_key else []
+        if duplicates:
+            st.warning(
+                f"⚠️ {len(duplicates)} near-duplicate(s) are linked to this document and will be removed too: "
+                f"{', '.join(duplicates)}. Re-upload them to keep their content searchable."
+            )
+        if source_key and st.button("🗑️ Delete from knowledge base"):
+            removed = rag_system.delete_from_knowledge_base(source_key, collection)
+            removed_duplicates = f" and {len(duplicates)} linked near-duplicate(s)" if duplicates else ""
+            st.success(f"✅ Removed {source_key} ({removed} chunks){removed_duplicates}")
+        
+        if kb_stats['tombstoned_records'] and st.button("🧹 Compact now"):
+            with st.spinner("Compacting knowledge base..."):
+                compacted = rag_system.compact_knowledge_base(collection)
+            st.success(f"✅ Compaction done in {compacted['last_compaction_seconds']:.2f}s")
+        
+        if st.button("📦 Publish snapshot for read replicas"):
+            with st.spinner("Exporting knowledge base snapshot..."):
+                snapshot_dir = rag_system.publish_snapshot(collection)
+            st.success(f"✅ Published {snapshot_dir}")
+
 def display_processed_files_advanced():
     """Display processed files with advanced information"""
     st.header("📋 Pure LLM Processing Results")
@@ -285,6 +441,9 @@ def display_processed_files_advanced():
         if metadata.get('error', False):
             status = "❌ Error"
             color = "red"
+        elif metadata.get('duplicate_of'):
+            status = f"🔁 Near-duplicate of {metadata['duplicate_of']}"
+            color = "orange"
         elif metadata.get('has_vision_analysis', False):
             status = "🧠 Pure LLM + Vision"
             color = "green"
@@ -311,7 +470,8 @@ def display_processed_files_advanced():
                     st.markdown("**Extraction Preview:**")
                     st.text(file_data['text'][:500] + "..." if len(file_data['text']) > 500 else file_data['text'])
 
-def handle_chat_input_advanced(prompt, agent_type, search_type):
+def handle_chat_input_advanced(prompt, agent_type, search_type, filters=None, rerank=None, collections=None,
+                               panel_agents=None):
     """Handle chat input with advanced processing"""
     # Add user message
     st.session_state.messages.append({"role": "user", "content": prompt})
@@ -321,10 +481,15 @@ def handle_chat_input_advanced(prompt, agent_type, search_type):
     # Generate response
     with st.chat_message("assistant"):
         try:
+            response_stream = st.session_state.rag_system.query_agents_stream(
+                prompt, agent_type, search_type, filters, rerank, collections, panel_agents,
+                memory=st.session_state.conversation_memory, user=st.session_state.user_id
+            )
+            # Spinner covers retrieval up to the first token, then the answer renders as it streams
             with st.spinner(f"🧠 Advanced analysis with {search_type} search..."):
-                response_text = st.session_state.rag_system.query_agents(prompt, agent_type, search_type)
-                
-            st.markdown(response_text)
+                first_token = next(response_stream, "")
+            
+            response_text = st.write_stream(itertools.chain([first_token], response_stream))
             st.session_state.messages.append({"role": "assistant", "content": response_text})
             
         except Exception as e:
@@ -5,20 +5,29 @@ from io import BytesIO
 from PIL import Image
 import fitz # PyMuPDF
 import pymupdf4llm
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Optional, Tuple
 import tempfile
 import base64
-from groq import Groq
 from app.utils.config import Config
+from app.utils.llm_gateway import get_llm_gateway
+from app.utils.deadline import Deadline, DeadlineExceeded
+from app.utils.admission import get_admission_controller, AdmissionRejected, BULK
+from app.utils.fact_table import FACT_EXTRACTION_INSTRUCTIONS, extract_fact_records, las_curve_facts
 import time
 import gc
 import json
+import threading
 
 class PureLLMFileProcessor:
     """Pure LLM-based file processor - No regex, no hardcoding, LLMs do everything"""
     
     def __init__(self, groq_api_key: str):
-        self.groq_client = Groq(api_key=groq_api_key)
+        self.llm_gateway = get_llm_gateway(groq_api_key)
+        self.admission = get_admission_controller()
+        # Uploading user and admission outcomes of the file being processed on this thread
+        self._ingest = threading.local()
+        # Optional (raw_text, filename) -> (source_key, similarity) lookup against the knowledge base
+        self.duplicate_checker: Optional[Callable[[str, str], Optional[Tuple[str, float]]]] = None
         self.vision_model = Config.VISION_MODEL
         self.text_model = Config.TEXT_MODEL
         Config.ensure_directories()
@@ -43,6 +52,17 @@ class PureLLMFileProcessor:
             'tif': self.process_tiff_with_vision
         }
 
+    def _bulk_completion(self, deadline: Optional[Deadline], **kwargs):
+        """LLM call admitted as bulk work for the uploading user, so every stage and page queues fairly on its own"""
+        ingest = self._ingest
+        try:
+            with self.admission.admit(getattr(ingest, 'user', None), BULK, deadline=deadline):
+                ingest.admitted = getattr(ingest, 'admitted', 0) + 1
+                return self.llm_gateway.create_completion(deadline=deadline, **kwargs)
+        except AdmissionRejected as e:
+            ingest.rejection = e
+            raise
+
     def encode_image_to_base64(self, image_data: bytes) -> str:
         """Convert image bytes to base64 string"""
         return base64.b64encode(image_data).decode('utf-8')
@@ -88,7 +108,8 @@ class PureLLMFileProcessor:
             st.warning(f"⚠️ Could not resize image: {e}. Using original.")
             return image_data
 
-    def advanced_vision_analysis(self, image_data: bytes, context: str = "", analysis_type: str = "comprehensive") -> Dict[str, Any]:
+    def advanced_vision_analysis(self, image_data: bytes, context: str = "", analysis_type: str = "comprehensive",
+                                 deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """Advanced LLM vision analysis with specialized prompting"""
         try:
             # Resize image if needed to meet Groq's limits
@@ -159,7 +180,8 @@ Provide a comprehensive JSON-like structured analysis with:
 Be exhaustive and precise. Extract EVERYTHING visible, no matter how small or seemingly insignificant.
 """
 
-            response = self.groq_client.chat.completions.create(
+            response = self._bulk_completion(
+                deadline,
                 model=self.vision_model,
                 messages=[{
                     "role": "user",
@@ -178,6 +200,14 @@ Be exhaustive and precise. Extract EVERYTHING visible, no matter how small or se
                 'analysis_type': analysis_type
             }
 
+        except DeadlineExceeded as e:
+            return {
+                'analysis': f"Advanced vision analysis stopped: {str(e)}",
+                'success': False,
+                'timed_out': True,
+                'analysis_type': analysis_type
+            }
+
         except Exception as e:
             return {
                 'analysis': f"Advanced vision analysis failed: {str(e)}",
@@ -185,7 +215,8 @@ Be exhaustive and precise. Extract EVERYTHING visible, no matter how small or se
                 'analysis_type': analysis_type
             }
 
-    def llm_text_analysis(self, text_content: str, filename: str, content_type: str = "geological_document") -> Dict[str, Any]:
+    def llm_text_analysis(self, text_content: str, filename: str, content_type: str = "geological_document",
+                          deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """Advanced LLM text analysis for comprehensive data extraction"""
         try:
             analysis_prompt = f"""
@@ -245,9 +276,10 @@ RESPONSE REQUIREMENTS:
 - Format as clear, organized information blocks
 
 Extract EVERYTHING relevant with maximum detail and precision. Leave nothing behind.
-"""
+{FACT_EXTRACTION_INSTRUCTIONS if Config.FACT_EXTRACTION else ""}"""
 
-            response = self.groq_client.chat.completions.create(
+            response = self._bulk_completion(
+                deadline,
                 model=self.text_model,
                 messages=[
                     {"role": "user", "content": analysis_prompt}
@@ -256,12 +288,24 @@ Extract EVERYTHING relevant with maximum detail and precision. Leave nothing beh
                 max_tokens=4000
             )
 
+            # Typed records are split off so only the prose analysis is embedded and synthesized
+            analysis, facts = extract_fact_records(response.choices[0].message.content)
+
             return {
-                'analysis': response.choices[0].message.content,
+                'analysis': analysis,
+                'facts': facts,
                 'success': True,
                 'content_type': content_type
             }
 
+        except DeadlineExceeded as e:
+            return {
+                'analysis': f"LLM text analysis stopped: {str(e)}",
+                'success': False,
+                'timed_out': True,
+                'content_type': content_type
+            }
+
         except Exception as e:
             return {
                 'analysis': f"LLM text analysis failed: {str(e)}",
@@ -294,36 +338,61 @@ Extract EVERYTHING relevant with maximum detail and precision. Leave nothing beh
                 st.warning(f"⚠️ Error deleting temp file: {e}")
                 break
 
-    def process_pdf_with_heavy_vision(self, file_bytes: bytes, filename: str, force_vision: bool = True) -> Dict[str, Any]:
-        """Heavy vision processing for PDFs - analyze EVERY page with vision models"""
-        pdf_document = None
+    def pdf_markdown(self, file_bytes: bytes) -> str:
+        """Structured PDF text from pymupdf4llm (which needs a file on disk)"""
         temp_file_path = None
-        
         try:
-            # Open PDF from memory
-            pdf_document = fitz.open(stream=file_bytes, filetype="pdf")
-            
-            # Extract text using pymupdf4llm ONLY
             with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf', dir=Config.TEMP_DIR) as temp_file:
                 temp_file.write(file_bytes)
                 temp_file_path = temp_file.name
                 temp_file.flush()  # Ensure data is written
                 temp_file.close()  # Close file handle explicitly
+            return pymupdf4llm.to_markdown(temp_file_path)
+        finally:
+            if temp_file_path:
+                self.safe_temp_file_cleanup(temp_file_path)
+
+    def process_pdf_with_heavy_vision(self, file_bytes: bytes, filename: str, force_vision: bool = True,
+                                      deadline: Optional[Deadline] = None,
+                                      text_data: Optional[str] = None) -> Dict[str, Any]:
+        """Heavy vision processing for PDFs - analyze EVERY page with vision models
+
+        With a deadline, text analysis, page vision and synthesis each get a share of the time left;
+        pages not reached in time are skipped and whatever finished is synthesized. text_data is the
+        pymupdf4llm markdown when the near-duplicate check already extracted it.
+        """
+        pdf_document = None
+        
+        try:
+            # Open PDF from memory
+            pdf_document = fitz.open(stream=file_bytes, filetype="pdf")
             
-            # Get structured text
-            text_data = pymupdf4llm.to_markdown(temp_file_path)
+            # Extract text using pymupdf4llm ONLY
+            if text_data is None:
+                text_data = self.pdf_markdown(file_bytes)
             
             # LLM text analysis
-            text_analysis = self.llm_text_analysis(text_data, filename, "pdf_document")
+            text_analysis = self.llm_text_analysis(
+                text_data, filename, "pdf_document",
+                deadline.stage(Config.INGEST_TEXT_SHARE) if deadline else None
+            )
             
             # HEAVY VISION ANALYSIS - Process EVERY page with optimized resolution
             vision_analyses = []
             page_summaries = []
             total_pages = len(pdf_document)
+            pages_skipped = 0
+            # Whatever the pages leave over is kept for synthesis
+            vision_deadline = deadline.stage(Config.INGEST_VISION_SHARE) if deadline else None
             
             st.info(f"🔍 Performing heavy vision analysis on {total_pages} pages...")
             
             for page_num in range(total_pages):
+                if vision_deadline is not None and vision_deadline.expired():
+                    pages_skipped = total_pages - page_num
+                    st.warning(f"⏱️ Deadline reached: vision analysis stopped after {page_num} of {total_pages} pages")
+                    break
+                
                 try:
                     page = pdf_document.load_page(page_num)
                     
@@ -344,13 +413,15 @@ Extract EVERYTHING relevant with maximum detail and precision. Leave nothing beh
                     page_analysis = self.advanced_vision_analysis(
                         page_image_data,
                         f"Page {page_num + 1} of {total_pages} from geological document {filename}",
-                        "page_comprehensive"
+                        "page_comprehensive",
+                        vision_deadline
                     )
                     
                     vision_analyses.append({
                         'page': page_num + 1,
                         'analysis': page_analysis['analysis'],
-                        'success': page_analysis['success']
+                        'success': page_analysis['success'],
+                        'timed_out': page_analysis.get('timed_out', False)
                     })
                     
                     # Create page summary
@@ -372,19 +443,26 @@ Extract EVERYTHING relevant with maximum detail and precision. Leave nothing beh
                         'success': False
                     })
             
-            # Combine all analyses using LLM synthesis
+            # Combine all analyses using LLM synthesis; None when there was nothing to synthesize or it failed
             combined_analysis = self.synthesize_multimodal_analysis(
-                text_analysis, vision_analyses, filename
+                text_analysis, vision_analyses, filename, deadline
+            )
+            partial = bool(
+                text_analysis.get('timed_out') or pages_skipped
+                or any(va.get('timed_out') for va in vision_analyses)
+                or (deadline is not None and deadline.expired())
             )
             
             return {
-                'text': combined_analysis,
+                'text': combined_analysis or '',
                 'raw_text': text_data,
                 'text_analysis': text_analysis,
+                'facts': text_analysis.get('facts', []),
                 'vision_analyses': vision_analyses,
                 'pages': total_pages,
                 'processing_stats': {
                     'vision_calls_made': len(vision_analyses),
+                    'pages_skipped': pages_skipped,
                     'processing_type': 'heavy_vision_llm',
                     'text_analysis': 'advanced_llm',
                     'vision_analysis': 'comprehensive_per_page'
@@ -394,7 +472,9 @@ Extract EVERYTHING relevant with maximum detail and precision. Leave nothing beh
                     'type': 'pdf_heavy_vision_llm',
                     'has_vision_analysis': True,
                     'has_text_analysis': True,
-                    'processing_approach': 'pure_llm_multimodal'
+                    'processing_approach': 'pure_llm_multimodal',
+                    'partial': partial,
+                    'analysis_failed': combined_analysis is None
                 }
             }
             
@@ -410,23 +490,22 @@ Extract EVERYTHING relevant with maximum detail and precision. Leave nothing beh
                 pdf_document.close()
                 pdf_document = None
             
-            # Safe temp file cleanup
-            if temp_file_path:
-                self.safe_temp_file_cleanup(temp_file_path)
-            
             # Force garbage collection
             gc.collect()
 
-    def synthesize_multimodal_analysis(self, text_analysis: Dict, vision_analyses: List[Dict], filename: str) -> str:
-        """LLM-based synthesis of text and vision analyses"""
+    def synthesize_multimodal_analysis(self, text_analysis: Dict, vision_analyses: List[Dict], filename: str,
+                                       deadline: Optional[Deadline] = None) -> Optional[str]:
+        """LLM-based synthesis of the successful text and vision analyses; None when none succeeded or synthesis failed"""
+        # Stopped or failed analyses are error messages, not document content
+        vision_content = "\n\n".join([
+            f"Page {va['page']}: {va['analysis']}"
+            for va in vision_analyses if va['success']
+        ])
+        if not text_analysis.get('success') and not vision_content:
+            return None
+        text_content = text_analysis['analysis'] if text_analysis.get('success') else 'No text analysis available'
+        
         try:
-            # Prepare synthesis data
-            text_content = text_analysis.get('analysis', 'No text analysis available')
-            vision_content = "\n\n".join([
-                f"Page {va['page']}: {va['analysis']}"
-                for va in vision_analyses if va['success']
-            ])
-
             synthesis_prompt = f"""
 You are an expert geological analyst tasked with creating a comprehensive, unified analysis by synthesizing multiple data sources.
 
@@ -484,7 +563,8 @@ Create a comprehensive document that includes:
 Be exhaustive, precise, and comprehensive. This should be the definitive analysis of this geological document.
 """
 
-            response = self.groq_client.chat.completions.create(
+            response = self._bulk_completion(
+                deadline,
                 model=self.text_model,
                 messages=[
                     {"role": "user", "content": synthesis_prompt}
@@ -496,144 +576,149 @@ Be exhaustive, precise, and comprehensive. This should be the definitive analysi
             return response.choices[0].message.content
 
         except Exception as e:
-            # Fallback synthesis
-            return f"""
-# GEOLOGICAL DOCUMENT ANALYSIS: {filename}
-
-## TEXT ANALYSIS:
-{text_analysis.get('analysis', 'Text analysis failed')}
-
-## VISION ANALYSIS:
-{vision_content if 'vision_content' in locals() else 'Vision analysis compilation failed'}
-
-## SYNTHESIS ERROR:
-LLM synthesis failed: {str(e)}
-"""
+            # Only the raw text and page analyses get indexed for this document
+            st.warning(f"⚠️ Synthesis failed for {filename}: {e}")
+            return None
 
-    def process_csv_with_llm(self, file_bytes: bytes, filename: str) -> Dict[str, Any]:
+    def process_csv_with_llm(self, file_bytes: bytes, filename: str,
+                             deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """LLM-based CSV analysis"""
         try:
             df = pd.read_csv(BytesIO(file_bytes))
             
             # Convert to text representation
-            csv_text = f"CSV File: {filename}\n\n"
-            csv_text += f"Shape: {df.shape}\n"
-            csv_text += f"Columns: {', '.join(df.columns)}\n\n"
-            csv_text += "Data Sample:\n"
-            csv_text += df.to_string()
+            csv_text = self._csv_text(df, filename)
             
             # LLM analysis
-            analysis = self.llm_text_analysis(csv_text, filename, "csv_data")
+            analysis = self.llm_text_analysis(csv_text, filename, "csv_data", deadline)
             
             return {
-                'text': analysis['analysis'],
+                'text': analysis['analysis'] if analysis['success'] else '',
                 'raw_data': csv_text,
+                'facts': analysis.get('facts', []),
                 'metadata': {
                     'filename': filename,
                     'type': 'csv_llm_analyzed',
                     'rows': len(df),
                     'columns': len(df.columns),
-                    'analysis_method': 'pure_llm'
+                    'analysis_method': 'pure_llm',
+                    'partial': analysis.get('timed_out', False),
+                    'analysis_failed': not analysis['success']
                 }
             }
             
         except Exception as e:
             return {'text': f"Error processing CSV {filename}: {str(e)}", 'metadata': {'filename': filename, 'type': 'csv', 'error': True}}
 
-    def process_excel_with_llm(self, file_bytes: bytes, filename: str) -> Dict[str, Any]:
+    def process_excel_with_llm(self, file_bytes: bytes, filename: str,
+                               deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """LLM-based Excel analysis"""
         try:
             excel_file = pd.ExcelFile(BytesIO(file_bytes))
-            excel_text = f"Excel File: {filename}\n\nSheets: {', '.join(excel_file.sheet_names)}\n\n"
-            
-            for sheet_name in excel_file.sheet_names:
-                df = pd.read_excel(excel_file, sheet_name=sheet_name)
-                excel_text += f"Sheet '{sheet_name}':\n{df.to_string()}\n\n"
+            excel_text = self._excel_text(excel_file, filename)
             
             # LLM analysis
-            analysis = self.llm_text_analysis(excel_text, filename, "excel_data")
+            analysis = self.llm_text_analysis(excel_text, filename, "excel_data", deadline)
             
             return {
-                'text': analysis['analysis'],
+                'text': analysis['analysis'] if analysis['success'] else '',
                 'raw_data': excel_text,
+                'facts': analysis.get('facts', []),
                 'metadata': {
                     'filename': filename,
                     'type': 'excel_llm_analyzed',
                     'sheets': len(excel_file.sheet_names),
-                    'analysis_method': 'pure_llm'
+                    'analysis_method': 'pure_llm',
+                    'partial': analysis.get('timed_out', False),
+                    'analysis_failed': not analysis['success']
                 }
             }
             
         except Exception as e:
             return {'text': f"Error processing Excel {filename}: {str(e)}", 'metadata': {'filename': filename, 'type': 'excel', 'error': True}}
 
-    def process_text_with_llm(self, file_bytes: bytes, filename: str) -> Dict[str, Any]:
+    def process_text_with_llm(self, file_bytes: bytes, filename: str,
+                              deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """LLM-based text analysis"""
         try:
             text = file_bytes.decode('utf-8')
-            analysis = self.llm_text_analysis(text, filename, "text_document")
+            analysis = self.llm_text_analysis(text, filename, "text_document", deadline)
             
             return {
-                'text': analysis['analysis'],
+                'text': analysis['analysis'] if analysis['success'] else '',
                 'raw_text': text,
+                'facts': analysis.get('facts', []),
                 'metadata': {
                     'filename': filename,
                     'type': 'text_llm_analyzed',
                     'length': len(text),
-                    'analysis_method': 'pure_llm'
+                    'analysis_method': 'pure_llm',
+                    'partial': analysis.get('timed_out', False),
+                    'analysis_failed': not analysis['success']
                 }
             }
             
         except Exception as e:
             return {'text': f"Error processing text {filename}: {str(e)}", 'metadata': {'filename': filename, 'type': 'text', 'error': True}}
 
-    def process_docx_with_llm(self, file_bytes: bytes, filename: str) -> Dict[str, Any]:
+    def process_docx_with_llm(self, file_bytes: bytes, filename: str,
+                              deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """LLM-based DOCX analysis"""
         try:
             from docx import Document
             doc = Document(BytesIO(file_bytes))
+            docx_text = self._docx_text(doc, filename)
             
-            docx_text = f"Document: {filename}\n\n"
-            for paragraph in doc.paragraphs:
-                docx_text += paragraph.text + "\n"
-            
-            analysis = self.llm_text_analysis(docx_text, filename, "docx_document")
+            analysis = self.llm_text_analysis(docx_text, filename, "docx_document", deadline)
             
             return {
-                'text': analysis['analysis'],
+                'text': analysis['analysis'] if analysis['success'] else '',
                 'raw_text': docx_text,
+                'facts': analysis.get('facts', []),
                 'metadata': {
                     'filename': filename,
                     'type': 'docx_llm_analyzed',
                     'paragraphs': len(doc.paragraphs),
-                    'analysis_method': 'pure_llm'
+                    'analysis_method': 'pure_llm',
+                    'partial': analysis.get('timed_out', False),
+                    'analysis_failed': not analysis['success']
                 }
             }
             
         except Exception as e:
             return {'text': f"Error processing DOCX {filename}: {str(e)}", 'metadata': {'filename': filename, 'type': 'docx', 'error': True}}
 
-    def process_las_with_llm(self, file_bytes: bytes, filename: str) -> Dict[str, Any]:
+    def process_las_with_llm(self, file_bytes: bytes, filename: str,
+                             deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """LLM-based LAS file analysis"""
         try:
             las_content = file_bytes.decode('utf-8', errors='ignore')
-            analysis = self.llm_text_analysis(las_content, filename, "las_well_log")
+            analysis = self.llm_text_analysis(las_content, filename, "las_well_log", deadline)
+            
+            # Curve depth ranges come straight from the data section, even when the LLM call did not finish
+            facts = analysis.get('facts', [])
+            well_name = next((fact['well'] for fact in facts if fact['record_type'] == 'well'), os.path.splitext(filename)[0])
+            facts = facts + las_curve_facts(las_content, well_name)
             
             return {
-                'text': analysis['analysis'],
+                'text': analysis['analysis'] if analysis['success'] else '',
                 'raw_las': las_content,
+                'facts': facts,
                 'metadata': {
                     'filename': filename,
                     'type': 'las_llm_analyzed',
                     'analysis_method': 'pure_llm',
-                    'has_geological_data': True
+                    'has_geological_data': True,
+                    'partial': analysis.get('timed_out', False),
+                    'analysis_failed': not analysis['success']
                 }
             }
             
         except Exception as e:
             return {'text': f"Error processing LAS {filename}: {str(e)}", 'metadata': {'filename': filename, 'type': 'las', 'error': True}}
 
-    def process_image_with_vision(self, file_bytes: bytes, filename: str) -> Dict[str, Any]:
+    def process_image_with_vision(self, file_bytes: bytes, filename: str,
+                                  deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """Heavy vision analysis for images"""
         try:
             image = Image.open(BytesIO(file_bytes))
@@ -642,25 +727,29 @@ LLM synthesis failed: {str(e)}
             vision_analysis = self.advanced_vision_analysis(
                 file_bytes,
                 f"Geological image file: {filename}",
-                "comprehensive_image"
+                "comprehensive_image",
+                deadline
             )
             
             return {
-                'text': vision_analysis['analysis'],
+                'text': vision_analysis['analysis'] if vision_analysis['success'] else '',
                 'metadata': {
                     'filename': filename,
                     'type': 'image_heavy_vision',
                     'size': image.size,
                     'mode': image.mode,
                     'has_vision_analysis': vision_analysis['success'],
-                    'analysis_method': 'advanced_vision_llm'
+                    'analysis_method': 'advanced_vision_llm',
+                    'partial': vision_analysis.get('timed_out', False),
+                    'analysis_failed': not vision_analysis['success']
                 }
             }
             
         except Exception as e:
             return {'text': f"Error processing image {filename}: {str(e)}", 'metadata': {'filename': filename, 'type': 'image', 'error': True}}
 
-    def process_tiff_with_vision(self, file_bytes: bytes, filename: str) -> Dict[str, Any]:
+    def process_tiff_with_vision(self, file_bytes: bytes, filename: str,
+                                 deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """Heavy vision analysis for TIFF images"""
         try:
             image = Image.open(BytesIO(file_bytes))
@@ -678,26 +767,106 @@ LLM synthesis failed: {str(e)}
             vision_analysis = self.advanced_vision_analysis(
                 png_bytes,
                 f"TIFF geological image: {filename}",
-                "comprehensive_tiff"
+                "comprehensive_tiff",
+                deadline
             )
             
             return {
-                'text': vision_analysis['analysis'],
+                'text': vision_analysis['analysis'] if vision_analysis['success'] else '',
                 'metadata': {
                     'filename': filename,
                     'type': 'tiff_heavy_vision',
                     'size': image.size,
                     'mode': image.mode,
                     'has_vision_analysis': vision_analysis['success'],
-                    'analysis_method': 'advanced_vision_llm'
+                    'analysis_method': 'advanced_vision_llm',
+                    'partial': vision_analysis.get('timed_out', False),
+                    'analysis_failed': not vision_analysis['success']
                 }
             }
             
         except Exception as e:
             return {'text': f"Error processing TIFF {filename}: {str(e)}", 'metadata': {'filename': filename, 'type': 'tiff', 'error': True}}
 
-    def process_file(self, uploaded_file, force_vision: bool = True) -> Dict[str, Any]:
-        """Process uploaded file with pure LLM approach"""
+    def _csv_text(self, df: pd.DataFrame, filename: str) -> str:
+        csv_text = f"CSV File: {filename}\n\n"
+        csv_text += f"Shape: {df.shape}\n"
+        csv_text += f"Columns: {', '.join(map(str, df.columns))}\n\n"
+        csv_text += "Data Sample:\n"
+        csv_text += df.to_string()
+        return csv_text
+
+    def _excel_text(self, excel_file: pd.ExcelFile, filename: str) -> str:
+        excel_text = f"Excel File: {filename}\n\nSheets: {', '.join(excel_file.sheet_names)}\n\n"
+        for sheet_name in excel_file.sheet_names:
+            df = pd.read_excel(excel_file, sheet_name=sheet_name)
+            excel_text += f"Sheet '{sheet_name}':\n{df.to_string()}\n\n"
+        return excel_text
+
+    def _docx_text(self, doc, filename: str) -> str:
+        docx_text = f"Document: {filename}\n\n"
+        for paragraph in doc.paragraphs:
+            docx_text += paragraph.text + "\n"
+        return docx_text
+
+    def extract_raw_text(self, file_bytes: bytes, file_extension: str, filename: str = '') -> str:
+        """The raw text a processed file is indexed with, without any LLM call (empty for image formats)
+
+        Near-duplicate signatures are compared against the ones computed from this same text at
+        indexing time, so each format renders exactly what its processor stores.
+        """
+        if file_extension == 'pdf':
+            return self.pdf_markdown(file_bytes)
+        if file_extension == 'txt':
+            return file_bytes.decode('utf-8')
+        if file_extension == 'las':
+            return file_bytes.decode('utf-8', errors='ignore')
+        if file_extension == 'docx':
+            from docx import Document
+            return self._docx_text(Document(BytesIO(file_bytes)), filename)
+        if file_extension == 'csv':
+            return self._csv_text(pd.read_csv(BytesIO(file_bytes)), filename)
+        if file_extension in ('xlsx', 'xls'):
+            return self._excel_text(pd.ExcelFile(BytesIO(file_bytes)), filename)
+        return ""
+    
+    def check_near_duplicate(self, raw_text: str, filename: str,
+                             duplicate_checker: Optional[Callable] = None) -> Optional[Dict[str, Any]]:
+        """Result linking the file to an indexed near-duplicate, or None when it should be processed"""
+        duplicate_checker = duplicate_checker or self.duplicate_checker
+        if duplicate_checker is None or not raw_text:
+            return None
+        try:
+            match = duplicate_checker(raw_text, filename)
+        except Exception as e:
+            st.warning(f"Near-duplicate check failed for {filename}: {e}")
+            return None
+        if match is None:
+            return None
+        
+        duplicate_of, similarity = match
+        st.info(f"🔁 {filename} is a near-duplicate of {duplicate_of} ({similarity:.0%}), skipping LLM extraction")
+        return {
+            'text': f"Near-duplicate of {duplicate_of} ({similarity:.0%} similar raw text); LLM extraction skipped.",
+            'metadata': {
+                'filename': filename,
+                'type': 'near_duplicate',
+                'duplicate_of': duplicate_of,
+                'similarity': similarity,
+                'analysis_method': 'minhash_near_duplicate'
+            }
+        }
+
+    def process_file(self, uploaded_file, force_vision: bool = True,
+                     duplicate_checker: Optional[Callable[[str, str], Optional[Tuple[str, float]]]] = None,
+                     deadline: Optional[Deadline] = None, user: Optional[str] = None) -> Dict[str, Any]:
+        """Process uploaded file with pure LLM approach, within an ingestion deadline shared by every LLM call
+
+        Each LLM stage (text analysis, every page's vision call, synthesis) is admitted separately as bulk
+        work for the user, queued fairly against other users' uploads and behind interactive queries.
+        A file none of whose stages was admitted is rejected with a retry hint; one that lost some stages
+        is marked partial.
+        """
         filename = uploaded_file.name
         file_extension = filename.split('.')[-1].lower()
         
@@ -717,13 +886,44 @@ LLM synthesis failed: {str(e)}
             }
         
         if file_extension in self.supported_formats:
+            # Skip the expensive LLM stages for near-duplicates of already indexed documents
+            raw_text = None
+            if (duplicate_checker or self.duplicate_checker) is not None:
+                try:
+                    raw_text = self.extract_raw_text(file_bytes, file_extension, filename)
+                except Exception as e:
+                    st.warning(f"Near-duplicate check failed for {filename}: {e}")
+            duplicate = self.check_near_duplicate(raw_text, filename, duplicate_checker)
+            if duplicate is not None:
+                return duplicate
+            # The PDF markdown is the expensive part of the check; reuse it for processing
+            handler_options = {'text_data': raw_text} if file_extension == 'pdf' and raw_text is not None else {}
+            
+            deadline = deadline or Deadline.start(Config.INGEST_DEADLINE_SECONDS)
+            ingest = self._ingest
+            ingest.user, ingest.admitted, ingest.rejection = user, 0, None
             try:
-                return self.supported_formats[file_extension](file_bytes, filename)
+                result = self.supported_formats[file_extension](
+                    file_bytes, filename, deadline=deadline, **handler_options
+                )
             except Exception as e:
                 return {
                     'text': f"Error processing {filename}: {str(e)}",
                     'metadata': {'filename': filename, 'type': file_extension, 'error': True}
                 }
+            finally:
+                ingest.user = None
+            
+            if ingest.rejection is not None:
+                if not ingest.admitted:
+                    return {
+                        'text': f"⏳ {filename} was not processed: {str(ingest.rejection)}",
+                        'metadata': {'filename': filename, 'type': file_extension, 'error': True,
+                                     'retry_after': ingest.rejection.retry_after}
+                    }
+                # Stages that were turned away are missing from the analysis, like stages cut by the deadline
+                result['metadata']['partial'] = True
+            return result
         else:
             return {
                 'text': f"Unsupported file format: {file_extension}",
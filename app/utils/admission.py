@@ -0,0 +1,184 @@
+import itertools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.utils.config import Config
+from app.utils.deadline import Deadline
+
+INTERACTIVE = 'interactive'
+BULK = 'bulk'
+ANONYMOUS_USER = 'anonymous'
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be queued or waited too long; retry_after is a hint in seconds"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Server busy ({reason}); retry in {retry_after} s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Ticket:
+    __slots__ = ('user', 'work_class', 'start_tag', 'finish_tag', 'sequence', 'admitted', 'enqueued_at')
+
+    def __init__(self, user: str, work_class: str, start_tag: float, finish_tag: float, sequence: int):
+        self.user = user
+        self.work_class = work_class
+        self.start_tag = start_tag
+        self.finish_tag = finish_tag
+        self.sequence = sequence
+        self.admitted = False
+        self.enqueued_at = time.monotonic()
+
+
+class AdmissionController:
+    """Weighted fair queuing of LLM work per (class, user), with interactive queries weighted over bulk ingestion
+
+    Each (class, user) flow gets start-time fair queuing tags, so a user with hundreds of queued pages
+    waits its turn behind other users instead of ahead of them. Bulk work may only hold part of the
+    active slots, which leaves room for chat queries while long ingestion jobs run.
+    """
+
+    def __init__(self, max_active: int = 8, bulk_max_active: int = 4, max_queue_per_user: int = 16,
+                 max_queue: int = 64, interactive_weight: float = 8.0, queue_timeout: float = 60.0):
+        self.max_active = max_active
+        self.class_limits = {INTERACTIVE: max_active, BULK: max(1, min(bulk_max_active, max_active))}
+        self.class_weights = {INTERACTIVE: interactive_weight, BULK: 1.0}
+        self.max_queue_per_user = max_queue_per_user
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._condition = threading.Condition(threading.Lock())
+        self._queue: List[_Ticket] = []
+        self._queued_per_user: Dict[str, int] = {}
+        self._last_finish: Dict[Tuple[str, str], float] = {}
+        self._virtual_time = 0.0
+        self._sequence = itertools.count()
+        self._active = {INTERACTIVE: 0, BULK: 0}
+        # Running averages used for retry hints
+        self._service_seconds = {INTERACTIVE: 5.0, BULK: 60.0}
+        self._wait_seconds = {INTERACTIVE: 0.0, BULK: 0.0}
+        self.admitted = {INTERACTIVE: 0, BULK: 0}
+        self.rejected = {INTERACTIVE: 0, BULK: 0}
+
+    @contextmanager
+    def admit(self, user: str, work_class: str = INTERACTIVE, cost: float = 1.0,
+              deadline: Optional[Deadline] = None):
+        """Hold an active slot for the body; raises AdmissionRejected when saturated or out of time"""
+        ticket = self._enqueue(user or ANONYMOUS_USER, work_class, cost)
+        self._wait(ticket, deadline)
+        start_time = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(ticket, time.monotonic() - start_time)
+
+    def _enqueue(self, user: str, work_class: str, cost: float) -> _Ticket:
+        with self._condition:
+            if self._queued_per_user.get(user, 0) >= self.max_queue_per_user:
+                self._reject(work_class, f"{self.max_queue_per_user} requests already queued for this user")
+            if len(self._queue) >= self.max_queue:
+                self._reject(work_class, "request queue is full")
+
+            flow = (work_class, user)
+            start_tag = max(self._virtual_time, self._last_finish.get(flow, 0.0))
+            finish_tag = start_tag + max(cost, 0.0) / self.class_weights[work_class]
+            self._last_finish[flow] = finish_tag
+
+            ticket = _Ticket(user, work_class, start_tag, finish_tag, next(self._sequence))
+            self._queue.append(ticket)
+            self._queued_per_user[user] = self._queued_per_user.get(user, 0) + 1
+            self._dispatch()
+            return ticket
+
+    def _wait(self, ticket: _Ticket, deadline: Optional[Deadline]):
+        give_up_at = time.monotonic() + (deadline.remaining() if deadline is not None else self.queue_timeout)
+        with self._condition:
+            while not ticket.admitted:
+                remaining = give_up_at - time.monotonic()
+                if remaining <= 0:
+                    self._queue.remove(ticket)
+                    self._dequeued(ticket)
+                    self._reject(ticket.work_class, "timed out waiting in the request queue")
+                self._condition.wait(remaining)
+
+    def _dispatch(self):
+        """Start queued tickets in tag order while their class has free slots (caller holds the lock)"""
+        started = False
+        while self._queue and sum(self._active.values()) < self.max_active:
+            startable = [ticket for ticket in self._queue
+                         if self._active[ticket.work_class] < self.class_limits[ticket.work_class]]
+            if not startable:
+                break
+            ticket = min(startable, key=lambda ticket: (ticket.finish_tag, ticket.sequence))
+            self._queue.remove(ticket)
+            self._dequeued(ticket)
+            self._virtual_time = max(self._virtual_time, ticket.start_tag)
+            self._active[ticket.work_class] += 1
+            self.admitted[ticket.work_class] += 1
+            self._wait_seconds[ticket.work_class] = (
+                0.9 * self._wait_seconds[ticket.work_class] + 0.1 * (time.monotonic() - ticket.enqueued_at)
+            )
+            ticket.admitted = True
+            started = True
+        if started:
+            # Flows whose last finish tag the virtual clock has passed carry no credit or debt
+            for flow in [flow for flow, finish in self._last_finish.items() if finish <= self._virtual_time]:
+                del self._last_finish[flow]
+            self._condition.notify_all()
+
+    def _dequeued(self, ticket: _Ticket):
+        self._queued_per_user[ticket.user] -= 1
+        if not self._queued_per_user[ticket.user]:
+            del self._queued_per_user[ticket.user]
+
+    def _release(self, ticket: _Ticket, seconds: float):
+        with self._condition:
+            self._active[ticket.work_class] -= 1
+            self._service_seconds[ticket.work_class] = 0.8 * self._service_seconds[ticket.work_class] + 0.2 * seconds
+            self._dispatch()
+
+    def _reject(self, work_class: str, reason: str):
+        """Count and raise a rejection with a retry hint (caller holds the lock)"""
+        self.rejected[work_class] += 1
+        queued = sum(1 for ticket in self._queue if ticket.work_class == work_class)
+        retry_after = math.ceil((queued + 1) * self._service_seconds[work_class] / self.class_limits[work_class])
+        raise AdmissionRejected(reason, max(1, retry_after))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                work_class: {
+                    'active': self._active[work_class],
+                    'limit': self.class_limits[work_class],
+                    'queued': sum(1 for ticket in self._queue if ticket.work_class == work_class),
+                    'admitted': self.admitted[work_class],
+                    'rejected': self.rejected[work_class],
+                    'avg_wait_seconds': self._wait_seconds[work_class],
+                    'avg_service_seconds': self._service_seconds[work_class]
+                }
+                for work_class in (INTERACTIVE, BULK)
+            }
+
+
+_controller: Optional[AdmissionController] = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> AdmissionController:
+    """Process-wide admission controller shared by every session"""
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = AdmissionController(
+                Config.ADMISSION_MAX_ACTIVE,
+                Config.ADMISSION_BULK_MAX_ACTIVE,
+                Config.ADMISSION_MAX_QUEUE_PER_USER,
+                Config.ADMISSION_MAX_QUEUE,
+                Config.ADMISSION_INTERACTIVE_WEIGHT,
+                Config.ADMISSION_QUEUE_TIMEOUT_SECONDS
+            )
+        return _controller
@@ -0,0 +1,75 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple, Iterable, List
+import numpy as np
+
+
+class SemanticAnswerCache:
+    """Thread-safe LRU cache of agent answers keyed by (agent, search type, retrieved chunks, corpus versions)"""
+
+    def __init__(self, max_size: int = 256, similarity_threshold: float = 0.92):
+        self.max_size = max_size
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[Tuple, List[Tuple[np.ndarray, str]]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+        self._versions: Dict[str, int] = {}
+
+    @staticmethod
+    def make_key(agent_type: str, search_type: str, chunk_ids: Iterable[Tuple[str, int]],
+                 versions: Dict[str, int]) -> Tuple:
+        return agent_type, search_type, frozenset(chunk_ids), tuple(sorted(versions.items()))
+
+    def get(self, key: Tuple, query_embedding: np.ndarray) -> Optional[Tuple[str, float]]:
+        """Cached answer and query similarity, or None"""
+        with self._lock:
+            self._invalidate_stale(dict(key[3]))
+            # Same chunks are not enough: the query itself must be a near-duplicate of a cached one
+            candidates = self._entries.get(key)
+            if candidates:
+                similarities = [float(np.dot(embedding, query_embedding)) for embedding, _ in candidates]
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.similarity_threshold:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return candidates[best][1], similarities[best]
+            self.misses += 1
+            return None
+
+    def put(self, key: Tuple, query_embedding: np.ndarray, answer: str):
+        with self._lock:
+            self._invalidate_stale(dict(key[3]))
+            self._entries.setdefault(key, []).append((query_embedding, answer))
+            self._entries.move_to_end(key)
+            self._size += 1
+            while self._size > self.max_size:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def _invalidate_stale(self, versions: Dict[str, int]):
+        """Drop every entry built against an older version of a collection (caller holds the lock)"""
+        stale = {name for name, version in versions.items() if self._versions.get(name, version) != version}
+        self._versions.update(versions)
+        if not stale:
+            return
+        for key in [key for key in self._entries if stale & {name for name, _ in key[3]}]:
+            self._size -= len(self._entries.pop(key))
+            self.invalidated += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'size': self._size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'invalidated': self.invalidated
+        }
@@ -0,0 +1,37 @@
+from typing import List
+
+
+def split_into_chunks(text: str, max_chars: int = 2000, overlap_chars: int = 200) -> List[str]:
+    """Split text into paragraph-aligned chunks of at most max_chars with a small overlap"""
+    text = text.strip()
+    if len(text) <= max_chars:
+        return [text] if text else []
+
+    paragraphs = [paragraph.strip() for paragraph in text.split('\n\n') if paragraph.strip()]
+    chunks = []
+    current = ''
+
+    for paragraph in paragraphs:
+        # Hard-split paragraphs that are longer than a whole chunk (e.g. LAS data sections)
+        while len(paragraph) > max_chars:
+            cut = paragraph.rfind('\n', 0, max_chars)
+            if cut <= max_chars // 2:
+                cut = max_chars
+            pieces = (paragraph[:cut].strip(), paragraph[cut:].strip())
+            if current:
+                chunks.append(current)
+                current = ''
+            chunks.append(pieces[0])
+            paragraph = pieces[1]
+
+        if current and len(current) + len(paragraph) + 2 > max_chars:
+            chunks.append(current)
+            # Carry the tail of the previous chunk so facts spanning the boundary stay retrievable
+            tail = current[-overlap_chars:] if overlap_chars else ''
+            current = f"{tail}\n\n{paragraph}" if tail and len(tail) + len(paragraph) + 2 <= max_chars else paragraph
+        else:
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+
+    if current:
+        chunks.append(current)
+    return chunks
@@ -20,12 +20,112 @@ class Config:
     # Model Configuration
     VISION_MODEL = os.getenv('VISION_MODEL', 'llama-3.2-90b-vision-preview')
     TEXT_MODEL = os.getenv('TEXT_MODEL', 'llama-3.3-70b-versatile')
+    LLM_MAX_CONCURRENT_REQUESTS = int(os.getenv('LLM_MAX_CONCURRENT_REQUESTS', '8'))
     EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2')
+    EMBEDDING_BACKEND = os.getenv('EMBEDDING_BACKEND', 'torch')  # torch | onnx | int8
+    EMBEDDING_THREADS = int(os.getenv('EMBEDDING_THREADS', '0'))  # 0 = library default
+    EMBEDDING_MAX_BATCH_SIZE = int(os.getenv('EMBEDDING_MAX_BATCH_SIZE', '64'))
+    EMBEDDING_BATCH_WINDOW_MS = float(os.getenv('EMBEDDING_BATCH_WINDOW_MS', '5'))
     
     # Processing Configuration
     MAX_FILE_SIZE_MB = int(os.getenv('MAX_FILE_SIZE_MB', '100'))
     TEMP_DIR = os.getenv('TEMP_DIR', 'temp')
     
+    # Search Configuration
+    BM25_K1 = float(os.getenv('BM25_K1', '1.5'))
+    BM25_B = float(os.getenv('BM25_B', '0.75'))
+    QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv('QUERY_EMBEDDING_CACHE_SIZE', '1024'))
+    
+    # Agent Context Configuration
+    CONTEXT_TOKEN_BUDGET = int(os.getenv('CONTEXT_TOKEN_BUDGET', '2000'))
+    CONTEXT_CHARS_PER_TOKEN = float(os.getenv('CONTEXT_CHARS_PER_TOKEN', '4'))
+    CONTEXT_PASSAGE_CHARS = int(os.getenv('CONTEXT_PASSAGE_CHARS', '600'))
+    
+    # Agent Panel Configuration
+    PANEL_AGENTS = [agent.strip() for agent in os.getenv('PANEL_AGENTS', 'document,data,vision').split(',') if agent.strip()]
+    PANEL_MAX_WORKERS = int(os.getenv('PANEL_MAX_WORKERS', '8'))
+    PANEL_MERGE_MAX_TOKENS = int(os.getenv('PANEL_MERGE_MAX_TOKENS', '1000'))
+    
+    # Batch Query Configuration
+    BATCH_QUERY_WORKERS = int(os.getenv('BATCH_QUERY_WORKERS', '8'))
+    
+    # Conversation Memory Configuration
+    CONVERSATION_MODEL = os.getenv('CONVERSATION_MODEL', 'llama-3.1-8b-instant')
+    CONVERSATION_TOKEN_BUDGET = int(os.getenv('CONVERSATION_TOKEN_BUDGET', '800'))
+    CONVERSATION_RECENT_TURNS = int(os.getenv('CONVERSATION_RECENT_TURNS', '3'))
+    
+    # Answer Cache Configuration
+    ANSWER_CACHE_ENABLED = os.getenv('ANSWER_CACHE_ENABLED', 'true').lower() == 'true'
+    ANSWER_CACHE_SIZE = int(os.getenv('ANSWER_CACHE_SIZE', '256'))
+    ANSWER_CACHE_SIMILARITY = float(os.getenv('ANSWER_CACHE_SIMILARITY', '0.92'))
+    
+    # Deadline Configuration (seconds, 0 = no deadline)
+    QUERY_DEADLINE_SECONDS = float(os.getenv('QUERY_DEADLINE_SECONDS', '45'))
+    INGEST_DEADLINE_SECONDS = float(os.getenv('INGEST_DEADLINE_SECONDS', '600'))
+    BATCH_ITEM_DEADLINE_SECONDS = float(os.getenv('BATCH_ITEM_DEADLINE_SECONDS', '120'))
+    QUERY_REWRITE_SHARE = float(os.getenv('QUERY_REWRITE_SHARE', '0.15'))
+    PANEL_SPECIALIST_SHARE = float(os.getenv('PANEL_SPECIALIST_SHARE', '0.65'))
+    INGEST_TEXT_SHARE = float(os.getenv('INGEST_TEXT_SHARE', '0.2'))
+    INGEST_VISION_SHARE = float(os.getenv('INGEST_VISION_SHARE', '0.85'))
+    
+    # Admission Control Configuration
+    ADMISSION_MAX_ACTIVE = int(os.getenv('ADMISSION_MAX_ACTIVE', '8'))
+    ADMISSION_BULK_MAX_ACTIVE = int(os.getenv('ADMISSION_BULK_MAX_ACTIVE', '4'))  # slots ingestion may hold
+    ADMISSION_MAX_QUEUE_PER_USER = int(os.getenv('ADMISSION_MAX_QUEUE_PER_USER', '16'))
+    ADMISSION_MAX_QUEUE = int(os.getenv('ADMISSION_MAX_QUEUE', '64'))
+    ADMISSION_INTERACTIVE_WEIGHT = float(os.getenv('ADMISSION_INTERACTIVE_WEIGHT', '8'))
+    ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv('ADMISSION_QUEUE_TIMEOUT_SECONDS', '60'))
+    
+    # Document Store Configuration
+    DOCUMENT_CONTENT_STORAGE = os.getenv('DOCUMENT_CONTENT_STORAGE', 'compressed')  # memory | compressed | segment
+    DOCUMENT_SEGMENT_PATH = os.getenv('DOCUMENT_SEGMENT_PATH', 'data/document_content.seg')
+    
+    # Chunking Configuration
+    INDEX_SOURCE_CHUNKS = os.getenv('INDEX_SOURCE_CHUNKS', 'true').lower() == 'true'
+    CHUNK_MAX_CHARS = int(os.getenv('CHUNK_MAX_CHARS', '2000'))
+    CHUNK_OVERLAP_CHARS = int(os.getenv('CHUNK_OVERLAP_CHARS', '200'))
+    
+    # Collection Configuration
+    DEFAULT_COLLECTION = os.getenv('DEFAULT_COLLECTION', 'default')
+    COLLECTIONS_DIR = os.getenv('COLLECTIONS_DIR', 'data/collections')
+    COLLECTION_SEARCH_WORKERS = int(os.getenv('COLLECTION_SEARCH_WORKERS', '4'))
+    
+    # Snapshot / Read Replica Configuration
+    SNAPSHOT_DIR = os.getenv('SNAPSHOT_DIR', 'data/snapshots')
+    SNAPSHOT_RETAIN = int(os.getenv('SNAPSHOT_RETAIN', '3'))
+    SNAPSHOT_POLL_SECONDS = float(os.getenv('SNAPSHOT_POLL_SECONDS', '30'))
+    READ_REPLICA = os.getenv('READ_REPLICA', 'false').lower() == 'true'
+    
+    # Structured Fact Table Configuration
+    FACT_EXTRACTION = os.getenv('FACT_EXTRACTION', 'true').lower() == 'true'
+    FACT_FAST_PATH = os.getenv('FACT_FAST_PATH', 'true').lower() == 'true'
+    
+    # Well Location Index Configuration
+    WELL_LOCATION_CELL_KM = float(os.getenv('WELL_LOCATION_CELL_KM', '10'))  # grid cell size
+    LOCATION_SCOPED_RETRIEVAL = os.getenv('LOCATION_SCOPED_RETRIEVAL', 'true').lower() == 'true'
+    
+    # Near-Duplicate Detection Configuration
+    NEAR_DUPLICATE_DETECTION = os.getenv('NEAR_DUPLICATE_DETECTION', 'true').lower() == 'true'
+    NEAR_DUPLICATE_THRESHOLD = float(os.getenv('NEAR_DUPLICATE_THRESHOLD', '0.85'))
+    MINHASH_PERMUTATIONS = int(os.getenv('MINHASH_PERMUTATIONS', '128'))
+    
+    # Knowledge Base Compaction Configuration
+    COMPACTION_TOMBSTONE_RATIO = float(os.getenv('COMPACTION_TOMBSTONE_RATIO', '0.2'))
+    COMPACTION_MIN_TOMBSTONES = int(os.getenv('COMPACTION_MIN_TOMBSTONES', '32'))
+    
+    # Reranking Configuration
+    RERANK_ENABLED = os.getenv('RERANK_ENABLED', 'false').lower() == 'true'
+    RERANKER_MODEL = os.getenv('RERANKER_MODEL', 'cross-encoder/ms-marco-MiniLM-L-6-v2')
+    RERANK_CANDIDATES = int(os.getenv('RERANK_CANDIDATES', '50'))
+    RERANK_TOP_K = int(os.getenv('RERANK_TOP_K', '3'))
+    RERANK_BATCH_SIZE = int(os.getenv('RERANK_BATCH_SIZE', '16'))
+    RERANK_LATENCY_BUDGET_MS = float(os.getenv('RERANK_LATENCY_BUDGET_MS', '300'))
+    
+    # Embedding Quantization Configuration
+    EMBEDDING_QUANTIZATION = os.getenv('EMBEDDING_QUANTIZATION', 'none')  # none | int8 | binary
+    QUANTIZATION_RESCORE_CANDIDATES = int(os.getenv('QUANTIZATION_RESCORE_CANDIDATES', '50'))
+    VECTOR_STORE_DIR = os.getenv('VECTOR_STORE_DIR', 'data/vectors')
+    
     @classmethod
     def validate_required_keys(cls) -> tuple[bool, str]:
         """Validate that required API keys are present"""
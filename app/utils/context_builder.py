@@ -0,0 +1,142 @@
+import math
+import re
+from typing import List, Dict, Any, Tuple
+
+from app.utils.chunking import split_into_chunks
+from app.utils.text_index import expand_query, tokenize
+
+
+def format_source(metadata: Dict[str, Any]) -> str:
+    """Citation for a retrieved chunk: filename plus page or chunk position when known"""
+    source = metadata.get('filename', 'unknown')
+    if 'page' in metadata:
+        source += f", page {metadata['page']}"
+    elif metadata.get('chunk_type') not in (None, 'synthesis'):
+        source += f" ({metadata['chunk_type']} chunk {metadata.get('chunk_index', 0) + 1})"
+    return source
+
+
+def _normalize_passage(text: str) -> str:
+    return re.sub(r'\s+', ' ', text.lower()).strip()
+
+
+class ContextAssembler:
+    """Fills a token budget with the retrieved passages that best cover the query"""
+
+    def __init__(self, token_budget: int = 2000, chars_per_token: float = 4.0, passage_chars: int = 600):
+        self.token_budget = token_budget
+        self.chars_per_token = chars_per_token
+        self.passage_chars = passage_chars
+
+    def estimate_tokens(self, text: str) -> int:
+        return math.ceil(len(text) / self.chars_per_token)
+
+    def assemble(self, query: str, search_results: List[Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+        """Context text for the agent prompt plus a report of what went into it"""
+        query_terms = expand_query(query)
+        total_weight = sum(query_terms.values()) or 1.0
+
+        # Paragraphs already seen in a better-ranked chunk (chunk overlaps, copies, boilerplate) are dropped
+        seen_paragraphs: List[str] = []
+        duplicates = 0
+        passages = []
+        for rank, result in enumerate(search_results):
+            paragraphs = []
+            for paragraph in result['content'].split('\n\n'):
+                normalized = _normalize_passage(paragraph)
+                if not normalized:
+                    continue
+                if any(normalized == seen or (len(normalized) >= 40 and normalized in seen) for seen in seen_paragraphs):
+                    duplicates += 1
+                    continue
+                seen_paragraphs.append(normalized)
+                paragraphs.append(paragraph.strip())
+
+            # Score every passage by query-term coverage, scaled by its chunk's retrieval score
+            for index, text in enumerate(split_into_chunks('\n\n'.join(paragraphs), self.passage_chars, 0)):
+                terms = set(tokenize(text))
+                coverage = sum(weight for term, weight in query_terms.items() if term in terms) / total_weight
+                passages.append({
+                    'rank': rank,
+                    'index': index,
+                    'text': text,
+                    'tokens': self.estimate_tokens(text),
+                    'value': max(result['score'], 1e-6) * (0.25 + coverage)
+                })
+
+        # Greedy fill by value, skipping passages that no longer fit
+        selected = []
+        tokens_used = 0
+        for passage in sorted(passages, key=lambda passage: passage['value'], reverse=True):
+            if tokens_used + passage['tokens'] <= self.token_budget:
+                selected.append(passage)
+                tokens_used += passage['tokens']
+
+        blocks = self._merge_blocks(search_results, selected)
+        context_text = ""
+        for i, block in enumerate(blocks):
+            context_text += f"\n--- RELEVANT DOCUMENT {i+1} (Score: {block['score']:.3f}) ---\n"
+            context_text += f"Source: {block['source']}\n"
+            context_text += f"Content: {block['content']}\n"
+
+        report = {
+            'tokens_used': tokens_used,
+            'token_budget': self.token_budget,
+            'passages_used': len(selected),
+            'passages_available': len(passages),
+            'duplicate_paragraphs_dropped': duplicates,
+            'blocks': len(blocks)
+        }
+        return context_text, report
+
+    def _merge_blocks(self, search_results: List[Dict[str, Any]],
+                      selected: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Group kept passages by chunk, then merge consecutive chunks of the same source into one block"""
+        by_rank: Dict[int, List[Dict[str, Any]]] = {}
+        for passage in selected:
+            by_rank.setdefault(passage['rank'], []).append(passage)
+
+        groups: Dict[Tuple, List[int]] = {}
+        for rank in by_rank:
+            metadata = search_results[rank]['metadata']
+            if 'chunk_index' in metadata and 'page' not in metadata:
+                key = (search_results[rank].get('collection'), metadata.get('filename'), metadata.get('chunk_type'))
+            else:
+                key = ('result', rank)
+            groups.setdefault(key, []).append(rank)
+
+        blocks = []
+        for ranks in groups.values():
+            ranks.sort(key=lambda rank: search_results[rank]['metadata'].get('chunk_index', 0))
+            runs = [[ranks[0]]]
+            for rank in ranks[1:]:
+                previous = search_results[runs[-1][-1]]['metadata'].get('chunk_index', 0)
+                if search_results[rank]['metadata'].get('chunk_index', 0) == previous + 1:
+                    runs[-1].append(rank)
+                else:
+                    runs.append([rank])
+
+            for run in runs:
+                parts = []
+                for rank in run:
+                    # Passages keep document order; text skipped between them is marked
+                    previous_index = None
+                    for passage in sorted(by_rank[rank], key=lambda passage: passage['index']):
+                        if previous_index is not None and passage['index'] != previous_index + 1:
+                            parts.append('[...]')
+                        parts.append(passage['text'])
+                        previous_index = passage['index']
+
+                metadata = search_results[run[0]]['metadata']
+                source = format_source(metadata)
+                if len(run) > 1:
+                    first = metadata.get('chunk_index', 0) + 1
+                    source = f"{metadata.get('filename', 'unknown')} ({metadata.get('chunk_type')} chunks {first}-{first + len(run) - 1})"
+                blocks.append({
+                    'source': source,
+                    'score': max(search_results[rank]['score'] for rank in run),
+                    'content': '\n\n'.join(parts)
+                })
+
+        blocks.sort(key=lambda block: block['score'], reverse=True)
+        return blocks
@@ -0,0 +1,100 @@
+import math
+import re
+from typing import List, Dict, Any, Tuple
+
+# Follow-ups that lean on earlier turns ("and its TD?", "what about the Wolfcamp there?", "is that well
+# deviated?"); relative "that" ("wells that penetrate ...") and existential "is there" are not references
+_FOLLOW_UP_PATTERN = re.compile(
+    r"^\s*(?:and|also|what about|how about|same for|then)\b"
+    r"|\b(?:it|its|it's|they|them|their|former|latter)\b"
+    r"|\b(?:that|this|those|these)\s+(?:well|wells|formation|formations|zone|zones|interval|intervals|field|lease"
+    r"|log|logs|report|reports|test|tests|document|file|area|one|ones)\b"
+    r"|\b(?:that|this|those|these)\s*[?.!]*\s*$"
+    r"|(?<!\bis )(?<!\bare )\bthere\s*[?.!]*\s*$"
+    r"|\bthe (?:same|above|previous|other) \w+",
+    re.IGNORECASE
+)
+# Numbers and capitalized names after the first word ("porosity of Smith 14-2?") give a question its own subject
+_ENTITY_PATTERN = re.compile(r"\d|\s[A-Z]")
+
+# Search metadata appended to answers is not worth remembering
+_FOOTER_MARKER = "\n\n---\n**Search Information:**"
+
+
+class ConversationMemory:
+    """Last few exchanges verbatim plus a rolling summary of older ones, kept within a token budget"""
+
+    def __init__(self, token_budget: int = 800, recent_turns: int = 3, chars_per_token: float = 4.0):
+        self.token_budget = token_budget
+        self.recent_turns = recent_turns
+        self.chars_per_token = chars_per_token
+        self.summary = ""
+        self.turns: List[Tuple[str, str]] = []
+        self.folded_turns = 0
+
+    def estimate_tokens(self, text: str) -> int:
+        return math.ceil(len(text) / self.chars_per_token)
+
+    def add_turn(self, question: str, answer: str):
+        """Record an exchange; long answers are clipped so one turn cannot take the whole budget"""
+        answer = answer.split(_FOOTER_MARKER, 1)[0].strip()
+        max_chars = int(self.token_budget * self.chars_per_token / (self.recent_turns + 1))
+        if len(answer) > max_chars:
+            answer = answer[:max_chars].rsplit(' ', 1)[0] + " [...]"
+        self.turns.append((question.strip(), answer))
+
+    def pop_overflow(self) -> List[Tuple[str, str]]:
+        """Remove and return the oldest turns that no longer fit verbatim; the caller folds them into the summary"""
+        overflow = []
+        while self.turns and (
+            len(self.turns) > self.recent_turns
+            or (len(self.turns) > 1 and self.tokens() > self.token_budget)
+        ):
+            overflow.append(self.turns.pop(0))
+        self.folded_turns += len(overflow)
+        return overflow
+
+    def set_summary(self, summary: str):
+        """Replace the rolling summary, clipped to its share of the budget"""
+        max_chars = int(self.summary_token_budget() * self.chars_per_token)
+        summary = summary.strip()
+        if len(summary) > max_chars:
+            summary = summary[:max_chars].rsplit(' ', 1)[0] + " [...]"
+        self.summary = summary
+
+    def summary_token_budget(self) -> int:
+        return max(self.token_budget // (self.recent_turns + 1), 64)
+
+    def is_follow_up(self, query: str) -> bool:
+        """Whether a query probably depends on earlier turns to be understood"""
+        if not (self.turns or self.summary):
+            return False
+        if _FOLLOW_UP_PATTERN.search(query):
+            return True
+        # Very short questions ("Operator?") lean on the conversation unless they name their own subject
+        return len(query.split()) <= 4 and not _ENTITY_PATTERN.search(query)
+
+    def render(self) -> str:
+        """Memory as prompt text: summary of older turns, then recent turns verbatim"""
+        text = ""
+        if self.summary:
+            text += f"Summary of earlier conversation: {self.summary}\n"
+        for question, answer in self.turns:
+            text += f"\nUser: {question}\nAssistant: {answer}\n"
+        return text.strip()
+
+    def tokens(self) -> int:
+        return self.estimate_tokens(self.render())
+
+    def clear(self):
+        self.summary = ""
+        self.turns = []
+        self.folded_turns = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'recent_turns': len(self.turns),
+            'folded_turns': self.folded_turns,
+            'tokens': self.tokens(),
+            'token_budget': self.token_budget
+        }
@@ -0,0 +1,36 @@
+import time
+from typing import Optional
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request runs out of time before an LLM call can finish"""
+
+
+class Deadline:
+    """Absolute time budget for one request, shared by every stage and LLM call beneath it"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    @classmethod
+    def start(cls, seconds: float) -> Optional['Deadline']:
+        """New deadline, or None (no limit) when seconds is not positive"""
+        return cls(seconds) if seconds and seconds > 0 else None
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def stage(self, share: float) -> 'Deadline':
+        """Child deadline for one stage: a share of the time left, never later than this deadline"""
+        return Deadline(self.remaining() * min(max(share, 0.0), 1.0))
+
+    def check(self, what: str = "the request"):
+        if self.expired():
+            raise DeadlineExceeded(f"{self} deadline reached before {what}")
+
+    def __str__(self) -> str:
+        return f"{self.seconds:.1f}".rstrip('0').rstrip('.') + " s"
@@ -0,0 +1,251 @@
+import os
+import hashlib
+import threading
+import zlib
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+
+try:
+    import zstandard
+    _ZSTD_COMPRESSOR = zstandard.ZstdCompressor(level=3)
+    _ZSTD_DECOMPRESSOR = zstandard.ZstdDecompressor()
+except ImportError:
+    zstandard = None
+
+# One-byte codec markers so payloads stay readable if zstandard is installed/removed later
+_CODEC_RAW = b'r'
+_CODEC_ZLIB = b'z'
+_CODEC_ZSTD = b'Z'
+
+
+def compress_text(text: str, compress: bool = True) -> bytes:
+    """Encode text as a compact payload (zstd when available, zlib otherwise)"""
+    data = text.encode('utf-8')
+    if not compress:
+        return _CODEC_RAW + data
+    if zstandard is not None:
+        return _CODEC_ZSTD + _ZSTD_COMPRESSOR.compress(data)
+    return _CODEC_ZLIB + zlib.compress(data, 6)
+
+
+def decompress_text(payload: bytes) -> str:
+    """Decode a payload produced by compress_text"""
+    codec, data = payload[:1], payload[1:]
+    if codec == _CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read this document store")
+        return _ZSTD_DECOMPRESSOR.decompress(data).decode('utf-8')
+    if codec == _CODEC_ZLIB:
+        return zlib.decompress(data).decode('utf-8')
+    return data.decode('utf-8')
+
+
+def content_hash(text: str) -> str:
+    """Stable digest of document text, used to detect unchanged re-uploads"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class ContentSegment:
+    """Append-only file holding document payloads, read lazily by offset"""
+
+    def __init__(self, filepath: str, read_only: bool = False):
+        self.filepath = filepath
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        if read_only:
+            self._file = open(filepath, 'rb')
+        else:
+            os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+            self._file = open(filepath, 'ab+')
+
+    def append(self, payload: bytes) -> Tuple[int, int]:
+        """Write a payload and return its (offset, length)"""
+        with self._lock:
+            self._file.seek(0, os.SEEK_END)
+            offset = self._file.tell()
+            self._file.write(payload)
+            self._file.flush()
+        return offset, len(payload)
+
+    def read(self, offset: int, length: int) -> bytes:
+        """Read a payload back from the segment"""
+        with self._lock:
+            self._file.seek(offset)
+            return self._file.read(length)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __getstate__(self):
+        return {'filepath': self.filepath, 'read_only': self.read_only}
+
+    def __setstate__(self, state):
+        self.__init__(state['filepath'], state.get('read_only', False))
+
+
+class DocumentRecord:
+    """Compact document record holding a single (optionally compressed or on-disk) copy of its content"""
+
+    __slots__ = ('doc_id', 'metadata', 'added_at', '_payload', '_segment', '_offset', '_length')
+
+    def __init__(self, doc_id: int, content: str, metadata: Dict[str, Any], added_at: str,
+                 storage: str = 'compressed', segment: Optional[ContentSegment] = None):
+        self.doc_id = doc_id
+        self.metadata = metadata
+        self.added_at = added_at
+        self._payload = None
+        self._segment = None
+        self._offset = 0
+        self._length = 0
+
+        payload = compress_text(content, compress=storage != 'memory')
+        if storage == 'segment' and segment is not None:
+            self._segment = segment
+            self._offset, self._length = segment.append(payload)
+        else:
+            self._payload = payload
+
+    @classmethod
+    def from_segment(cls, doc_id: int, metadata: Dict[str, Any], added_at: str,
+                     segment: ContentSegment, offset: int, length: int) -> 'DocumentRecord':
+        """Record whose payload already lives in a segment (e.g. an immutable snapshot)"""
+        record = cls.__new__(cls)
+        record.doc_id = doc_id
+        record.metadata = metadata
+        record.added_at = added_at
+        record._payload = None
+        record._segment = segment
+        record._offset = offset
+        record._length = length
+        return record
+
+    def payload(self) -> bytes:
+        """Stored (possibly compressed) payload bytes"""
+        if self._segment is not None:
+            return self._segment.read(self._offset, self._length)
+        return self._payload
+
+    @property
+    def content(self) -> str:
+        """Document text, decompressed or loaded from the segment on access"""
+        return decompress_text(self.payload())
+
+    @property
+    def segment(self) -> Optional[ContentSegment]:
+        """Segment holding the payload, if it is stored on disk"""
+        return self._segment
+
+    def relocated(self, doc_id: int, metadata: Dict[str, Any],
+                  segment: Optional[ContentSegment] = None) -> 'DocumentRecord':
+        """Copy of the record at a new position, sharing the stored payload or rewriting it into another segment"""
+        record = DocumentRecord.__new__(DocumentRecord)
+        for slot in self.__slots__:
+            setattr(record, slot, getattr(self, slot))
+        record.doc_id = doc_id
+        record.metadata = metadata
+        if segment is not None and self._segment is not None:
+            record._segment = segment
+            record._offset, record._length = segment.append(self.payload())
+        return record
+
+    def __getitem__(self, key: str) -> Any:
+        # Dict-style access kept for callers written against the old dict documents
+        if key in ('content', 'doc_id', 'metadata', 'added_at'):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __getstate__(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __setstate__(self, state):
+        for slot, value in state.items():
+            setattr(self, slot, value)
+
+
+class VectorMatrix:
+    """Growable float32 matrix with one row per document and a presence mask"""
+
+    quantized = False
+
+    def __init__(self, initial_capacity: int = 64):
+        self.initial_capacity = initial_capacity
+        self.vectors: Optional[np.ndarray] = None
+        self.present = np.zeros(0, dtype=bool)
+        self.count = 0
+
+    @classmethod
+    def from_arrays(cls, vectors: Optional[np.ndarray], present: np.ndarray) -> 'VectorMatrix':
+        """Matrix over existing (e.g. read-only memory-mapped) arrays"""
+        matrix = cls(initial_capacity=max(len(present), 1))
+        matrix.vectors = vectors
+        matrix.present = present
+        matrix.count = len(present)
+        return matrix
+
+    def append(self, vector: Optional[np.ndarray]):
+        """Append a row; None marks the aspect as missing for that document"""
+        if self.count >= len(self.present):
+            self._grow(max(self.initial_capacity, len(self.present) * 2))
+
+        if vector is not None:
+            if self.vectors is None:
+                self.vectors = np.zeros((len(self.present), len(vector)), dtype=np.float32)
+            self.vectors[self.count] = vector
+        self.present[self.count] = vector is not None
+        self.count += 1
+
+    def _grow(self, capacity: int):
+        present = np.zeros(capacity, dtype=bool)
+        present[:self.count] = self.present[:self.count]
+        self.present = present
+        if self.vectors is not None:
+            vectors = np.zeros((capacity, self.vectors.shape[1]), dtype=np.float32)
+            vectors[:self.count] = self.vectors[:self.count]
+            self.vectors = vectors
+
+    def rows(self, positions: np.ndarray) -> List[Optional[np.ndarray]]:
+        """Copies of the given rows, None where the aspect is missing"""
+        return [
+            self.vectors[position].copy() if self.present[position] else None
+            for position in positions
+        ]
+
+    def similarities(self, query_vector: np.ndarray, positions: Optional[np.ndarray] = None) -> np.ndarray:
+        """Dot products against every row, or only the given rows (rows and query are unit-normalized); missing rows score 0"""
+        if positions is not None:
+            return self.exact_similarities(query_vector, positions)
+        if self.vectors is None:
+            return np.zeros(self.count, dtype=np.float32)
+        scores = self.vectors[:self.count] @ query_vector
+        scores[~self.present[:self.count]] = 0.0
+        return scores
+
+    def batch_similarities(self, query_matrix: np.ndarray) -> np.ndarray:
+        """(rows x queries) dot products for several unit-normalized queries in one matrix product"""
+        if self.vectors is None:
+            return np.zeros((self.count, len(query_matrix)), dtype=np.float32)
+        scores = self.vectors[:self.count] @ query_matrix.T
+        scores[~self.present[:self.count]] = 0.0
+        return scores
+
+    def exact_similarities(self, query_vector: np.ndarray, positions: np.ndarray) -> np.ndarray:
+        """Similarities for a subset of rows"""
+        if self.vectors is None:
+            return np.zeros(len(positions), dtype=np.float32)
+        scores = self.vectors[positions] @ query_vector
+        scores[~self.present[positions]] = 0.0
+        return scores
+
+    def memory_bytes(self) -> int:
+        vectors_bytes = self.vectors[:self.count].nbytes if self.vectors is not None else 0
+        return vectors_bytes + self.present[:self.count].nbytes
+
+    def float_bytes(self) -> int:
+        return self.vectors[:self.count].nbytes if self.vectors is not None else 0
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Selectable CPU inference backends for the sentence-transformer embedding model
+Benchmark: python -m app.utils.embedding_backends [corpus_dir_or_file] [min_cosine]
+"""
+
+import os
+import sys
+import time
+import json
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+import numpy as np
+from sentence_transformers import SentenceTransformer
+from app.utils.config import Config
+
+EMBEDDING_BACKENDS = ['torch', 'onnx', 'int8']
+
+# Best sentence transformer model, with a lighter fallback
+PRIMARY_EMBEDDING_MODEL = 'all-mpnet-base-v2'
+FALLBACK_EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+
+
+def set_inference_threads(threads: int):
+    """Limit intra-op threads used by torch / ONNX Runtime on CPU nodes"""
+    if threads <= 0:
+        return
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def load_embedding_model(model_name: str, backend: str = 'torch', threads: int = 0) -> SentenceTransformer:
+    """Load a sentence transformer on the requested backend, falling back to stock PyTorch"""
+    set_inference_threads(threads)
+
+    if backend == 'onnx':
+        try:
+            session_options = None
+            if threads > 0:
+                import onnxruntime
+                session_options = onnxruntime.SessionOptions()
+                session_options.intra_op_num_threads = threads
+            model_kwargs = {'provider': 'CPUExecutionProvider'}
+            if session_options is not None:
+                model_kwargs['session_options'] = session_options
+            return SentenceTransformer(model_name, device='cpu', backend='onnx', model_kwargs=model_kwargs)
+        except Exception as e:
+            print(f"⚠️ ONNX backend unavailable for {model_name} ({e}), falling back to torch")
+
+    elif backend == 'int8':
+        try:
+            import torch
+            model = SentenceTransformer(model_name, device='cpu')
+            # Dynamic int8 quantization of every Linear layer; activations stay float
+            return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        except Exception as e:
+            print(f"⚠️ int8 backend unavailable for {model_name} ({e}), falling back to torch")
+
+    elif backend != 'torch':
+        print(f"⚠️ Unknown embedding backend '{backend}', using torch")
+
+    return SentenceTransformer(model_name, device='cpu')
+
+
+def load_benchmark_corpus(path: str, max_texts: int = 256) -> List[str]:
+    """Load texts from a file (one text per blank-line-separated block) or an extraction results directory"""
+    target = Path(path)
+    texts = []
+    if target.is_dir():
+        files = sorted(target.glob("*_extracted_text.txt")) or sorted(target.glob("*.txt"))
+        for text_file in files:
+            texts.append(text_file.read_text(encoding='utf-8', errors='ignore'))
+    elif target.exists():
+        texts = [block for block in target.read_text(encoding='utf-8', errors='ignore').split('\n\n')]
+
+    # Same truncation the embedding store applies to full-text embeddings
+    texts = [text.strip()[:1000] for text in texts if text.strip()]
+    return texts[:max_texts]
+
+
+def benchmark_backends(texts: List[str], model_name: str, backends: Optional[List[str]] = None,
+                       threads: int = 0, batch_size: int = 32) -> Dict[str, Dict[str, Any]]:
+    """Compare throughput and cosine agreement of each backend with the torch reference"""
+    backends = backends or EMBEDDING_BACKENDS
+    results = {}
+    reference = None
+
+    for backend in ['torch'] + [b for b in backends if b != 'torch']:
+        model = load_embedding_model(model_name, backend, threads)
+        model.encode(texts[:batch_size], batch_size=batch_size)  # Warm up
+
+        start_time = time.perf_counter()
+        vectors = model.encode(texts, batch_size=batch_size, normalize_embeddings=True)
+        elapsed = time.perf_counter() - start_time
+
+        if reference is None:
+            reference = vectors
+        agreement = np.sum(vectors * reference, axis=1)
+
+        results[backend] = {
+            'texts_per_sec': len(texts) / elapsed if elapsed > 0 else 0.0,
+            'mean_cosine': float(np.mean(agreement)),
+            'min_cosine': float(np.min(agreement))
+        }
+        del model
+
+    return results
+
+
+def select_backend(results: Dict[str, Dict[str, Any]], min_cosine: float = 0.99) -> str:
+    """Fastest backend whose worst-case cosine agreement stays within the bound"""
+    eligible = {name: stats for name, stats in results.items() if stats['min_cosine'] >= min_cosine}
+    if not eligible:
+        return 'torch'
+    return max(eligible, key=lambda name: eligible[name]['texts_per_sec'])
+
+
+def main():
+    """Benchmark backends on the extracted corpus and print the recommended setting"""
+    corpus_path = sys.argv[1] if len(sys.argv) > 1 else "extraction_results"
+    min_cosine = float(sys.argv[2]) if len(sys.argv) > 2 else 0.99
+
+    texts = load_benchmark_corpus(corpus_path)
+    if not texts:
+        print(f"❌ No benchmark texts found in {corpus_path}")
+        sys.exit(1)
+
+    print(f"🔍 Benchmarking {len(texts)} texts with {PRIMARY_EMBEDDING_MODEL}...")
+    results = benchmark_backends(texts, PRIMARY_EMBEDDING_MODEL, threads=Config.EMBEDDING_THREADS)
+    print(json.dumps(results, indent=2))
+    print(f"✅ Recommended EMBEDDING_BACKEND={select_backend(results, min_cosine)} (min cosine >= {min_cosine})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Any, Optional, Tuple
+import numpy as np
+
+
+def normalize_query(query: str) -> str:
+    """Normalize query text so trivially different phrasings share a cache entry"""
+    query = query.lower().strip()
+    query = re.sub(r'\s+', ' ', query)
+    return query.rstrip('?!. ')
+
+
+class QueryEmbeddingCache:
+    """Thread-safe LRU cache of query embeddings keyed by (model, normalized query)"""
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, model_name: str, query: str) -> Optional[np.ndarray]:
+        key = (model_name, normalize_query(query))
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return embedding
+
+    def put(self, model_name: str, query: str, embedding: np.ndarray):
+        key = (model_name, normalize_query(query))
+        # Cached arrays are shared between callers, so freeze them
+        embedding.setflags(write=False)
+        with self._lock:
+            self._entries[key] = embedding
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get_or_encode(self, model_name: str, query: str, encode: Callable[[str], np.ndarray]) -> np.ndarray:
+        """Return the cached embedding or encode and cache it"""
+        embedding = self.get(model_name, query)
+        if embedding is None:
+            embedding = encode(normalize_query(query) or query)
+            self.put(model_name, query, embedding)
+        return embedding
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+In-process micro-batching embedding service
+Coalesces concurrent encode calls from sessions and ingest workers into batched model calls
+Benchmark: python -m app.utils.embedding_service [concurrency] [requests]
+"""
+
+import sys
+import json
+import time
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Any, Union
+import numpy as np
+from app.utils.config import Config
+from app.utils.embedding_backends import load_embedding_model, PRIMARY_EMBEDDING_MODEL
+
+
+class _EncodeRequest:
+    __slots__ = ('texts', 'normalize', 'future', 'parts', 'offset')
+
+    def __init__(self, texts: List[str], normalize: bool):
+        self.texts = texts
+        self.normalize = normalize
+        self.future = Future()
+        # Vectors encoded so far for requests split into chunks
+        self.parts: List[np.ndarray] = []
+        self.offset = 0
+
+
+class EmbeddingService:
+    """Request queue in front of the embedding model that encodes callers' texts in micro-batches
+
+    Requests larger than one batch (document ingestion) are encoded a chunk at a time, and query-sized
+    requests that arrive meanwhile are served between chunks instead of waiting for the whole document.
+    """
+
+    def __init__(self, model, max_batch_size: int = 64, batch_window_ms: float = 5.0):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window_ms / 1000.0
+        self._queue: "queue.Queue[_EncodeRequest]" = queue.Queue()
+        # Oversized requests in progress, owned by the worker thread and served round-robin
+        self._chunked: "deque[_EncodeRequest]" = deque()
+        self._worker = threading.Thread(target=self._run, name="embedding-service", daemon=True)
+        self._worker.start()
+
+        self.requests_served = 0
+        self.texts_encoded = 0
+        self.batches_run = 0
+
+    def encode(self, sentences: Union[str, List[str]], normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        """Drop-in replacement for SentenceTransformer.encode that waits for a batched result"""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        request = _EncodeRequest(texts, normalize_embeddings)
+        self._queue.put(request)
+        vectors = request.future.result()
+        return vectors[0] if single else vectors
+
+    def _run(self):
+        while True:
+            # Only wait for new requests when no chunked work is pending
+            batch = self._collect(block=not self._chunked)
+            if batch:
+                self._encode_batch(batch)
+            elif self._chunked:
+                self._encode_chunk()
+
+    def _collect(self, block: bool) -> List[_EncodeRequest]:
+        """Query-sized requests to encode together; oversized ones are set aside for chunked encoding"""
+        batch = []
+        text_count = 0
+        deadline = None
+        # Keep collecting until the batch is full or the latency window closes
+        while text_count < self.max_batch_size:
+            try:
+                if deadline is not None:
+                    request = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                elif block:
+                    request = self._queue.get()
+                    deadline = time.monotonic() + self.batch_window
+                else:
+                    request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if len(request.texts) > self.max_batch_size:
+                self._chunked.append(request)
+                if not batch:
+                    # Start on the chunked work rather than holding it for a window
+                    block, deadline = False, None
+                continue
+            batch.append(request)
+            text_count += len(request.texts)
+        return batch
+
+    def _encode_batch(self, batch: List[_EncodeRequest]):
+        texts = [text for request in batch for text in request.texts]
+        try:
+            vectors = np.asarray(
+                self.model.encode(texts, batch_size=min(len(texts), self.max_batch_size)),
+                dtype=np.float32
+            )
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0].future.set_exception(e)
+                return
+            # One caller's texts broke the merged call; retry each request alone so only it fails
+            for request in batch:
+                self._encode_batch([request])
+            return
+
+        offset = 0
+        for request in batch:
+            self._finish(request, vectors[offset:offset + len(request.texts)])
+            offset += len(request.texts)
+
+        self.requests_served += len(batch)
+        self.texts_encoded += len(texts)
+        self.batches_run += 1
+
+    def _encode_chunk(self):
+        """Encode the next max_batch_size texts of the oldest oversized request, then rotate to the next one"""
+        request = self._chunked.popleft()
+        chunk = request.texts[request.offset:request.offset + self.max_batch_size]
+        try:
+            vectors = np.asarray(self.model.encode(chunk, batch_size=len(chunk)), dtype=np.float32)
+        except Exception as e:
+            request.future.set_exception(e)
+            return
+
+        request.parts.append(vectors)
+        request.offset += len(chunk)
+        self.texts_encoded += len(chunk)
+        self.batches_run += 1
+        if request.offset < len(request.texts):
+            self._chunked.append(request)
+            return
+        self._finish(request, np.concatenate(request.parts))
+        request.parts = []
+        self.requests_served += 1
+
+    def _finish(self, request: _EncodeRequest, vectors: np.ndarray):
+        if request.normalize:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.maximum(norms, 1e-12)
+        request.future.set_result(vectors)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'requests_served': self.requests_served,
+            'texts_encoded': self.texts_encoded,
+            'batches_run': self.batches_run,
+            'average_batch_size': self.texts_encoded / self.batches_run if self.batches_run else 0.0,
+            'queue_depth': self._queue.qsize(),
+            'chunked_requests_pending': len(self._chunked)
+        }
+
+
+def benchmark_concurrent_load(model, texts: List[str], concurrency: int = 16,
+                              max_batch_size: int = 64, batch_window_ms: float = 5.0) -> Dict[str, Any]:
+    """Throughput of per-call encoding versus the micro-batching service under concurrent single-text calls"""
+    results = {}
+    service = EmbeddingService(model, max_batch_size, batch_window_ms)
+
+    for mode, encoder in [('per_call', model), ('micro_batched', service)]:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            start_time = time.perf_counter()
+            list(executor.map(lambda text: encoder.encode(text), texts))
+            elapsed = time.perf_counter() - start_time
+        results[mode] = {'texts_per_sec': len(texts) / elapsed if elapsed > 0 else 0.0}
+
+    results['speedup'] = results['micro_batched']['texts_per_sec'] / max(results['per_call']['texts_per_sec'], 1e-9)
+    results['service'] = service.stats()
+    return results
+
+
+def main():
+    """Benchmark the service against per-call encoding with simulated chat queries"""
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    request_count = int(sys.argv[2]) if len(sys.argv) > 2 else 512
+
+    model = load_embedding_model(PRIMARY_EMBEDDING_MODEL, Config.EMBEDDING_BACKEND, Config.EMBEDDING_THREADS)
+    texts = [f"What is the formation top depth for well {i} in the Wolfcamp interval?" for i in range(request_count)]
+    results = benchmark_concurrent_load(
+        model, texts, concurrency, Config.EMBEDDING_MAX_BATCH_SIZE, Config.EMBEDDING_BATCH_WINDOW_MS
+    )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
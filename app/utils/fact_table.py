@@ -0,0 +1,703 @@
+import re
+import json
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+
+from app.utils.config import Config
+from app.utils.text_index import API_NUMBER_PATTERN
+from app.utils.interval_index import DepthIntervalIndex, parse_las_curve_ranges
+from app.utils.spatial_index import WellLocationIndex, parse_coordinates, parse_proximity, normalize_plss, plss_township
+
+FACT_COLUMNS = ['record_type', 'well', 'attribute', 'value', 'numeric', 'numeric_end', 'unit', 'source']
+
+# Prompt suffix asking the extraction LLM for typed records alongside its prose analysis
+FACT_EXTRACTION_INSTRUCTIONS = """
+STRUCTURED RECORDS:
+After the analysis, append exactly one fenced ```json block with the typed records you found
+(use null for unknown values, depths in feet, dates as YYYY-MM-DD, coordinates as signed decimal degrees
+with west longitudes negative, legal descriptions as section/township/range, omit empty lists):
+{"wells": [{"well_name": "", "api_number": "", "permit_number": "", "operator": "", "field": "", "county": "", "state": "", "total_depth_ft": null,
+            "latitude": null, "longitude": null, "legal_description": ""}],
+ "formation_tops": [{"well_name": "", "formation": "", "top_depth_ft": null, "base_depth_ft": null}],
+ "dates": [{"well_name": "", "event": "spud|completion|first_production|log|test", "date": ""}],
+ "test_results": [{"well_name": "", "test": "", "interval": "", "value": null, "unit": ""}],
+ "intervals": [{"well_name": "", "kind": "perforation|test|core", "name": "", "top_depth_ft": null, "base_depth_ft": null}]}
+"""
+
+_JSON_BLOCK_PATTERN = re.compile(r'```json\s*(\{.*?\})\s*```', re.DOTALL)
+
+# Attributes stored on well records, with the phrases that ask for them; words that also have
+# other meanings ("state of the casing", "API gravity", "field study") only count in explicit phrasing
+WELL_ATTRIBUTES = {
+    'api_number': ['api number', 'api no', 'api #', 'api well number'],
+    'permit_number': ['permit number', 'permit no', 'permit #'],
+    'operator': ['operator of', 'operator for', 'operator', 'operated by', 'who operates'],
+    'field': ['field name', 'what field', 'which field', 'field is'],
+    'county': ['county'],
+    'state': ['what state', 'which state', 'state is'],
+    'location': ['location', 'coordinates', 'latitude', 'longitude', 'lat long', 'where is'],
+    'legal_description': ['legal description', 'section township range', 'township', 'plss'],
+    'total_depth': ['total depth'],
+    'spud_date': ['spud date', 'spudded', 'spud'],
+    'completion_date': ['completion date', 'completed'],
+    'first_production_date': ['first production'],
+}
+
+# Depth-interval attributes held in the interval index, with the phrases that ask for them
+INTERVAL_ATTRIBUTES = {
+    'perforation_interval': ['perforation', 'perforations', 'perforated', 'perfs'],
+    'test_interval': ['test interval', 'test intervals', 'dst', 'drill stem test', 'tested'],
+    'core_interval': ['core', 'cores', 'cored'],
+    'log_curve': ['logged', 'log curve', 'log curves', 'curve', 'curves'],
+    'formation_top': ['formation', 'formations', 'tops'],
+}
+
+# Questions asking for interpretation always go to the agents
+_INTERPRETIVE_PATTERN = re.compile(
+    r'\b(why|how|explain|interpret|compare|analy[sz]e|assess|evaluate|summari[sz]e|recommend|implication|quality|potential'
+    r'|describ|discuss|tell me about|overview|characteri[sz]|propert|significan|strateg)\w*'
+)
+# Question scaffolding a lookup may contain besides attribute phrases, known entities and numbers
+_LOOKUP_WORDS = {
+    'what', 'whats', 'which', 'who', 'where', 'when', 'is', 'are', 'was', 'were', 'does', 'do', 'did', 'has',
+    'have', 'had', 'the', 'a', 'an', 'of', 'for', 'in', 'on', 'at', 'to', 'by', 'and', 'or', 'with', 'its',
+    'their', 'that', 'there', 'it', 'please', 'can', 'you', 'tell', 'me', 'show', 'give', 'get', 'find', 'list',
+    'all', 'every', 'each', 'any', 'well', 'wells', 'api', 'value', 'values', 'number', 'numbers', 'name',
+    'names', 'date', 'dates', 'depth', 'depths', 'top', 'tops', 'interval', 'intervals', 'coverage', 'ft',
+    'feet', 'md', 'tvd', 'between', 'from', 'below', 'above', 'under', 'deeper', 'shallower', 'than', 'within',
+    'km', 'kms', 'kilometer', 'kilometers', 'kilometre', 'kilometres', 'mi', 'mile', 'miles', 'around',
+    'near', 'located', 'county', 'counties', 'parish', 'co', 'sec', 'section', 'range', 'north', 'south',
+    'east', 'west',
+}
+_DEPTH_RANGE_PATTERN = re.compile(r'\b(?:between|from)\s+([\d,]+)\s*(?:ft|feet|\')?\s+(?:and|to)\s+([\d,]+)')
+_DEPTH_BOUND_PATTERN = re.compile(r'\b(below|deeper than|under|above|shallower than)\s+([\d,]+)')
+_DEPTH_POINT_PATTERN = re.compile(r'\bat\s+([\d,]+)\s*(?:ft|feet|\'|md|tvd)')
+_COMPARISON_PATTERN = re.compile(r'\b(compar\w*|across|correlat\w*|versus|vs)\b')
+_COUNTY_SUFFIX_PATTERN = re.compile(r'\s+(?:county|parish|co\.?)$')
+# Query and key tokens: names like "14-2" or "42-329-41234" stay whole, punctuation stands alone
+_TOKEN_PATTERN = re.compile(r'[\w-]+|[^\w\s-]')
+
+# Filter fields resolved through extracted well locations rather than the metadata bitmaps
+LOCATION_FILTER_FIELDS = ['near', 'county', 'state', 'township']
+
+
+def normalize_name(value: Any) -> str:
+    """Lowercased, whitespace-collapsed key for wells, formations and other names"""
+    value = re.sub(r'[#"]', ' ', str(value).lower())
+    return re.sub(r'\s+', ' ', value).strip()
+
+
+def normalize_county(value: Any) -> str:
+    """County name without its "County" or "Parish" suffix, so "Midland County" matches "Midland" """
+    return _COUNTY_SUFFIX_PATTERN.sub('', normalize_name(value))
+
+
+def _tokens(text: Any) -> List[str]:
+    return _TOKEN_PATTERN.findall(normalize_name(text))
+
+
+def _ngrams(tokens: List[str], longest: int):
+    """(start, end, gram) for every run of up to `longest` consecutive tokens"""
+    for start in range(len(tokens)):
+        for end in range(start + 1, min(start + longest, len(tokens)) + 1):
+            yield start, end, ' '.join(tokens[start:end])
+
+
+def _mentioned(mentions: List[Tuple[int, int, str, str]], kind: str, min_length: int = 3) -> List[str]:
+    """Distinct keys of one index mentioned in a query, in order of appearance"""
+    return list(dict.fromkeys(key for _, _, name, key in mentions if name == kind and len(key) >= min_length))
+
+
+# Attribute phrases as token n-grams, so lookup phrasing is recognized with set probes
+_PHRASE_GRAMS = {
+    ' '.join(_tokens(phrase))
+    for phrases in (*WELL_ATTRIBUTES.values(), *INTERVAL_ATTRIBUTES.values()) for phrase in phrases
+}
+_PHRASE_GRAM_LENGTH = max(gram.count(' ') + 1 for gram in _PHRASE_GRAMS)
+
+
+def _number(value: Any) -> Optional[float]:
+    if value is None or value == '':
+        return None
+    try:
+        return float(str(value).replace(',', ''))
+    except ValueError:
+        return None
+
+
+def extract_fact_records(analysis: str) -> Tuple[str, List[Dict[str, Any]]]:
+    """Split the JSON records block off an extraction response and normalize it into fact rows"""
+    matches = list(_JSON_BLOCK_PATTERN.finditer(analysis))
+    if not matches:
+        return analysis, []
+    match = matches[-1]
+    cleaned = (analysis[:match.start()] + analysis[match.end():]).strip()
+    cleaned = re.sub(r'\n\s*STRUCTURED RECORDS:?\s*$', '', cleaned).strip()
+    try:
+        payload = json.loads(match.group(1))
+    except json.JSONDecodeError:
+        return cleaned, []
+    return cleaned, normalize_fact_records(payload)
+
+
+def normalize_fact_records(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Flatten wells, formation tops, dates and test results into typed fact rows"""
+    facts = []
+
+    def add(record_type, well, attribute, value, numeric=None, numeric_end=None, unit=''):
+        if well and (value not in (None, '') or numeric is not None):
+            facts.append({
+                'record_type': record_type,
+                'well': str(well).strip(),
+                'attribute': attribute,
+                'value': '' if value is None else str(value).strip(),
+                'numeric': numeric,
+                'numeric_end': numeric_end,
+                'unit': unit
+            })
+
+    for well in payload.get('wells') or []:
+        name = well.get('well_name')
+        for attribute in ('api_number', 'permit_number', 'operator', 'field', 'county', 'state'):
+            add('well', name, attribute, well.get(attribute))
+        depth = _number(well.get('total_depth_ft'))
+        add('well', name, 'total_depth', None if depth is None else f"{depth:,.0f} ft", depth, unit='ft')
+        coordinates = _coordinates(well)
+        if coordinates is not None:
+            latitude, longitude = coordinates
+            add('location', name, 'location', f"{latitude:.5f}, {longitude:.5f}", latitude, longitude, 'deg')
+        # Texas-style block/survey descriptions are kept as written when they are not PLSS
+        legal_description = well.get('legal_description')
+        add('well', name, 'legal_description', normalize_plss(legal_description) or legal_description)
+
+    for top in payload.get('formation_tops') or []:
+        depth = _number(top.get('top_depth_ft'))
+        add('formation_top', top.get('well_name'), 'formation_top', top.get('formation'),
+            depth, _number(top.get('base_depth_ft')), 'ft')
+
+    for date in payload.get('dates') or []:
+        event = normalize_name(date.get('event') or 'event').replace(' ', '_')
+        add('date', date.get('well_name'), f"{event}_date", date.get('date'))
+
+    for test in payload.get('test_results') or []:
+        label = ' '.join(part for part in (test.get('test'), test.get('interval')) if part)
+        add('test_result', test.get('well_name'), 'test_result', label,
+            _number(test.get('value')), unit=test.get('unit') or '')
+
+    for interval in payload.get('intervals') or []:
+        kind = normalize_name(interval.get('kind') or '')
+        attribute = f"{kind}_interval" if f"{kind}_interval" in INTERVAL_ATTRIBUTES else 'interval'
+        top, base = _number(interval.get('top_depth_ft')), _number(interval.get('base_depth_ft'))
+        if top is None:
+            continue
+        add('interval', interval.get('well_name'), attribute, interval.get('name') or kind,
+            min(top, base if base is not None else top), max(top, base if base is not None else top), 'ft')
+
+    return facts
+
+
+def _coordinates(well: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """Decimal (latitude, longitude) from separate fields or a free-text coordinate string"""
+    latitude, longitude = _number(well.get('latitude')), _number(well.get('longitude'))
+    if latitude is None or longitude is None:
+        return parse_coordinates(well.get('coordinates') or f"{well.get('latitude') or ''} {well.get('longitude') or ''}")
+    if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+        return latitude, longitude
+    return None
+
+
+def las_curve_facts(las_text: str, fallback_well: str = '') -> List[Dict[str, Any]]:
+    """Fact rows for the depth range each LAS curve covers, parsed from the file itself rather than the LLM"""
+    return [
+        {
+            'record_type': 'interval',
+            'well': curve['well'] or fallback_well,
+            'attribute': 'log_curve',
+            'value': curve['curve'],
+            'numeric': curve['top'],
+            'numeric_end': curve['base'],
+            'unit': 'ft'
+        }
+        for curve in parse_las_curve_ranges(las_text)
+        if curve['well'] or fallback_well
+    ]
+
+
+def _attribute_label(attribute: str) -> str:
+    return attribute.replace('_', ' ').capitalize().replace('Api ', 'API ')
+
+
+class FactTable:
+    """Columnar table of extracted facts with hash indexes per key column, a sorted depth index,
+    per-attribute depth interval indexes and a grid index over well locations"""
+
+    # Class defaults keep tables pickled before the interval and location indexes were added loadable
+    _interval_indexes: Optional[Dict[str, DepthIntervalIndex]] = None
+    _interval_ends: Optional[Dict[int, float]] = None
+    _ends_at_total_depth: Optional[set] = None
+    _location_index: Optional[WellLocationIndex] = None
+    _key_grams: Optional[Tuple[Dict[str, List[Tuple[str, str]]], Dict[str, List[str]], int]] = None
+
+    def __init__(self):
+        self.columns: Dict[str, List[Any]] = {column: [] for column in FACT_COLUMNS}
+        self.live: List[bool] = []
+        self.by_well: Dict[str, List[int]] = {}
+        self.by_attribute: Dict[str, List[int]] = {}
+        self.by_value: Dict[str, List[int]] = {}
+        self.by_source: Dict[str, List[int]] = {}
+        self._depth_index = None
+
+    def __len__(self) -> int:
+        return sum(self.live)
+
+    def add_records(self, source: str, records: List[Dict[str, Any]]):
+        """Append fact rows extracted from a source document"""
+        for record in records:
+            row = len(self.live)
+            for column in FACT_COLUMNS:
+                self.columns[column].append(source if column == 'source' else record.get(column))
+            self.live.append(True)
+            self.by_well.setdefault(normalize_name(record['well']), []).append(row)
+            self.by_attribute.setdefault(record['attribute'], []).append(row)
+            self.by_value.setdefault(normalize_name(record['value']), []).append(row)
+            self.by_source.setdefault(source, []).append(row)
+        self._depth_index = None
+        self._interval_indexes = None
+        self._location_index = None
+        self._key_grams = None
+
+    def remove_source(self, source: str):
+        """Drop every fact extracted from a source"""
+        for row in self.by_source.pop(source, []):
+            self.live[row] = False
+        self._depth_index = None
+        self._interval_indexes = None
+        self._location_index = None
+        self._key_grams = None
+
+    def lookup(self, wells: Optional[List[str]] = None, attribute: Optional[str] = None,
+               values: Optional[List[str]] = None) -> List[int]:
+        """Live rows matching every given key (any of several wells or values)"""
+        selected = None
+        for index, keys in ((self.by_well, wells), (self.by_value, values)):
+            if keys is not None:
+                rows = set()
+                for key in keys:
+                    rows.update(index.get(normalize_name(key), ()))
+                selected = rows if selected is None else selected & rows
+        if attribute is not None:
+            rows = set(self.by_attribute.get(attribute, ()))
+            selected = rows if selected is None else selected & rows
+        return sorted(row for row in (selected or ()) if self.live[row])
+
+    def depth_range(self, attribute: str, low: float, high: float) -> List[int]:
+        """Live rows of an attribute whose depth lies within [low, high], via binary search on the sorted index"""
+        if self._depth_index is None:
+            rows = np.array([
+                row for row, numeric in enumerate(self.columns['numeric'])
+                if numeric is not None and self.live[row]
+            ], dtype=np.int64)
+            depths = np.array([self.columns['numeric'][row] for row in rows], dtype=np.float64)
+            order = np.argsort(depths, kind='stable')
+            self._depth_index = (depths[order], rows[order])
+        depths, rows = self._depth_index
+        start, end = np.searchsorted(depths, low, 'left'), np.searchsorted(depths, high, 'right')
+        return [int(row) for row in rows[start:end] if self.columns['attribute'][row] == attribute]
+
+    def interval_indexes(self) -> Dict[str, DepthIntervalIndex]:
+        """Interval index per depth attribute, built lazily from the live rows
+
+        Formation tops without a recorded base end at the next deeper top of the same well and source,
+        or at the well's total depth for the deepest one.
+        """
+        if self._interval_indexes is None:
+            spans: Dict[str, Tuple[List[float], List[float], List[int]]] = {}
+            well_tops: Dict[Tuple[str, str], List[Tuple[float, int]]] = {}
+            total_depths: Dict[str, float] = {}
+            ends: Dict[int, float] = {}
+            ends_at_total_depth = set()
+            for row, top in enumerate(self.columns['numeric']):
+                attribute = self.columns['attribute'][row]
+                if top is None or not self.live[row]:
+                    continue
+                if attribute == 'total_depth':
+                    well = normalize_name(self.columns['well'][row])
+                    total_depths[well] = max(top, total_depths.get(well, top))
+                if attribute not in INTERVAL_ATTRIBUTES:
+                    continue
+                base = self.columns['numeric_end'][row]
+                if attribute == 'formation_top':
+                    key = (normalize_name(self.columns['well'][row]), self.columns['source'][row])
+                    well_tops.setdefault(key, []).append((top, row))
+                if base is not None or attribute != 'formation_top':
+                    ends[row] = max(top, base if base is not None else top)
+
+            for (well, _), tops in well_tops.items():
+                tops.sort()
+                for (top, row), deeper in zip(tops, tops[1:] + [(None, None)]):
+                    if row in ends:
+                        continue
+                    if deeper[0] is not None:
+                        ends[row] = deeper[0]
+                    else:
+                        ends[row] = max(top, total_depths.get(well, top))
+                        ends_at_total_depth.add(row)
+
+            for row, end in ends.items():
+                starts, stops, rows = spans.setdefault(self.columns['attribute'][row], ([], [], []))
+                starts.append(self.columns['numeric'][row])
+                stops.append(end)
+                rows.append(row)
+            self._interval_ends = ends
+            self._ends_at_total_depth = ends_at_total_depth
+            self._interval_indexes = {
+                attribute: DepthIntervalIndex(*columns) for attribute, columns in spans.items()
+            }
+        return self._interval_indexes
+
+    def overlapping(self, attribute: str, low: float, high: float, wells: Optional[List[str]] = None,
+                    values: Optional[List[str]] = None) -> List[int]:
+        """Live rows of a depth attribute whose interval overlaps [low, high], optionally for some wells/values"""
+        index = self.interval_indexes().get(attribute)
+        if index is None:
+            return []
+        rows = index.overlapping(low, high).tolist()
+        if wells is not None or values is not None:
+            allowed = set(self.lookup(wells, attribute, values))
+            rows = [row for row in rows if row in allowed]
+        return sorted(rows)
+
+    def interval_end(self, row: int) -> Optional[float]:
+        """Base of a row's depth interval, inferred for formation tops recorded without one"""
+        self.interval_indexes()
+        return self._interval_ends.get(row)
+
+    def location_index(self) -> WellLocationIndex:
+        """Grid index over the live well locations, built lazily; keys are location rows"""
+        if self._location_index is None:
+            rows = [row for row in self.by_attribute.get('location', ()) if self.live[row]]
+            self._location_index = WellLocationIndex(
+                [self.columns['numeric'][row] for row in rows],
+                [self.columns['numeric_end'][row] for row in rows],
+                rows,
+                Config.WELL_LOCATION_CELL_KM
+            )
+        return self._location_index
+
+    def wells_near(self, latitude: float, longitude: float, radius_km: float) -> List[Tuple[str, float]]:
+        """(normalized well, distance_km) for wells located within the radius, nearest first"""
+        nearest: Dict[str, float] = {}
+        for row, distance in self.location_index().within(latitude, longitude, radius_km):
+            nearest.setdefault(normalize_name(self.columns['well'][row]), distance)
+        return list(nearest.items())
+
+    def locate(self, reference: Any) -> Optional[Tuple[float, float, str]]:
+        """(latitude, longitude, label) for coordinates or the first known located well named in the reference"""
+        if isinstance(reference, dict):
+            if reference.get('latitude') is not None and reference.get('longitude') is not None:
+                latitude, longitude = float(reference['latitude']), float(reference['longitude'])
+                return latitude, longitude, f"{latitude:.5f}, {longitude:.5f}"
+            reference = reference.get('well') or ''
+        coordinates = parse_coordinates(reference)
+        if coordinates is not None:
+            return coordinates[0], coordinates[1], f"{coordinates[0]:.5f}, {coordinates[1]:.5f}"
+        # Earliest (then longest) located well name mentioned in the reference text
+        located = [
+            (start, start - end, key) for start, end, name, key in self._mentions(_tokens(reference))
+            if name == 'well' and self.lookup([key], 'location')
+        ]
+        if not located:
+            return None
+        row = self.lookup([min(located)[2]], 'location')[0]
+        return self.columns['numeric'][row], self.columns['numeric_end'][row], self.columns['well'][row]
+
+    def location_wells(self, location_filters: Dict[str, Any]) -> List[str]:
+        """Normalized wells matching every location filter (near, county, state, township)
+
+        near takes "5 km of Smith 14-2", "3 mi of 31.95, -102.08" or a dict with a well or latitude/longitude
+        plus radius_km; an unknown reference point matches no wells.
+        """
+        wells = None
+        for field, wanted in location_filters.items():
+            if field == 'near':
+                if isinstance(wanted, dict):
+                    radius_km = float(wanted.get('radius_km') or 0)
+                    origin = self.locate(wanted)
+                else:
+                    proximity = parse_proximity(str(wanted))
+                    radius_km, origin = (proximity[0], self.locate(proximity[1])) if proximity else (0.0, None)
+                found = {well for well, _ in self.wells_near(*origin[:2], radius_km)} if origin else set()
+            elif field == 'township':
+                wanted_values = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+                townships = {plss_township(value) for value in wanted_values} - {''}
+                found = {
+                    normalize_name(self.columns['well'][row]) for row in self.lookup(attribute='legal_description')
+                    if plss_township(self.columns['value'][row]) in townships
+                }
+            else:
+                wanted_values = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+                normalize = normalize_county if field == 'county' else normalize_name
+                names = {normalize(value) for value in wanted_values}
+                found = {
+                    normalize_name(self.columns['well'][row]) for row in self.lookup(attribute=field)
+                    if normalize(self.columns['value'][row]) in names
+                }
+            wells = found if wells is None else wells & found
+            if not wells:
+                break
+        return sorted(wells or ())
+
+    def sources_for_wells(self, wells: List[str]) -> List[str]:
+        """Sources holding any live fact about the given wells"""
+        return sorted({self.columns['source'][row] for row in self.lookup(wells)})
+
+    def keys(self, index: Dict[str, List[int]]) -> List[str]:
+        """Keys of an index that still have live rows (kept per table version for the well and value indexes)"""
+        if index is self.by_well or index is self.by_value:
+            return self.key_grams()[1]['well' if index is self.by_well else 'value']
+        return [key for key, rows in index.items() if key and any(self.live[row] for row in rows)]
+
+    def key_grams(self) -> Tuple[Dict[str, List[Tuple[str, str]]], Dict[str, List[str]], int]:
+        """Token n-gram -> (index, key) for every live well and value key, the live keys per index and the
+        longest key in tokens, built lazily once per table version"""
+        if self._key_grams is None:
+            grams: Dict[str, List[Tuple[str, str]]] = {}
+            live_keys: Dict[str, List[str]] = {}
+            for name, index in (('well', self.by_well), ('value', self.by_value)):
+                live_keys[name] = [key for key, rows in index.items() if key and any(self.live[row] for row in rows)]
+                for key in live_keys[name]:
+                    grams.setdefault(' '.join(_tokens(key)), []).append((name, key))
+            longest = max((gram.count(' ') + 1 for gram in grams), default=0)
+            self._key_grams = (grams, live_keys, longest)
+        return self._key_grams
+
+    def _mentions(self, tokens: List[str]) -> List[Tuple[int, int, str, str]]:
+        """(start, end, index, key) for every live well or value key spelled out in the query tokens"""
+        grams, _, longest = self.key_grams()
+        return [
+            (start, end, name, key)
+            for start, end, gram in _ngrams(tokens, longest)
+            for name, key in grams.get(gram, ())
+        ]
+
+    def rows(self, row_ids: List[int]) -> List[Dict[str, Any]]:
+        return [{column: self.columns[column][row] for column in FACT_COLUMNS} for row in row_ids]
+
+    def compare_depths(self, query: str) -> Optional[Tuple[str, str]]:
+        """Cross-well depth comparison for comparison questions, computed from the interval index
+
+        Returns (title, markdown table) of formation tops, thicknesses and the spread between wells,
+        or None when the question is not a depth comparison or fewer than two wells have tops.
+        """
+        text = query.lower()
+        if not _COMPARISON_PATTERN.search(text) or not re.search(r'\btops?\b|\bformation|\bdepth|\bthickness|\bwells\b', text):
+            return None
+        indexes = self.interval_indexes()
+        if 'formation_top' not in indexes:
+            return None
+
+        mentions = self._mentions(_tokens(text))
+        wells = _mentioned(mentions, 'well')
+        rows = self.lookup(wells or None, 'formation_top') if wells else [int(row) for row in indexes['formation_top'].rows]
+        formations = [
+            value for value in _mentioned(mentions, 'value')
+            if any(self.columns['attribute'][row] == 'formation_top' for row in self.by_value[value])
+        ]
+        if formations:
+            rows = [row for row in rows if normalize_name(self.columns['value'][row]) in formations]
+        depth_bounds = self._depth_bounds(text)
+        if depth_bounds:
+            in_range = set(self.overlapping('formation_top', *depth_bounds))
+            rows = [row for row in rows if row in in_range]
+
+        table: Dict[str, Dict[str, Tuple[float, float]]] = {}
+        names: Dict[str, str] = {}
+        well_names: Dict[str, str] = {}
+        for row in rows:
+            formation = normalize_name(self.columns['value'][row])
+            well = normalize_name(self.columns['well'][row])
+            names.setdefault(formation, self.columns['value'][row])
+            well_names.setdefault(well, self.columns['well'][row])
+            top = self.columns['numeric'][row]
+            # Shallowest pick wins when several documents report the same top
+            if well not in table.setdefault(formation, {}) or top < table[formation][well][0]:
+                # The deepest top runs to TD, which is penetrated depth rather than thickness
+                base = None if row in self._ends_at_total_depth else self.interval_end(row)
+                table[formation][well] = (top, base)
+        if len(well_names) < 2:
+            return None
+
+        well_order = sorted(well_names, key=lambda well: well_names[well].lower())
+        markdown = "| Formation | " + " | ".join(well_names[well] for well in well_order) + " | Top spread |\n"
+        markdown += "|---" * (len(well_order) + 2) + "|\n"
+        for formation in sorted(table, key=lambda formation: np.mean([top for top, _ in table[formation].values()])):
+            cells = []
+            for well in well_order:
+                if well not in table[formation]:
+                    cells.append("—")
+                    continue
+                top, base = table[formation][well]
+                cell = f"{top:,.0f} ft"
+                if base is not None and base > top:
+                    cell += f" ({base - top:,.0f} ft thick)"
+                cells.append(cell)
+            tops = [top for top, _ in table[formation].values()]
+            spread = f"{max(tops) - min(tops):,.0f} ft" if len(tops) > 1 else "—"
+            markdown += f"| {names[formation]} | " + " | ".join(cells) + f" | {spread} |\n"
+        return f"Formation tops across {len(well_order)} wells", markdown
+
+    def match_query(self, query: str) -> Optional[Tuple[str, List[int]]]:
+        """Resolve an exact entity/attribute question to (description, rows); None for interpretive questions"""
+        text = query.lower()
+        if _INTERPRETIVE_PATTERN.search(text) or not self.live:
+            return None
+        tokens = _tokens(text)
+        mentions = self._mentions(tokens)
+        if not self._is_lookup(tokens, mentions):
+            return None
+
+        wells = _mentioned(mentions, 'well')
+        attribute = next(
+            (name for name, phrases in WELL_ATTRIBUTES.items()
+             if any(re.search(rf'\b{re.escape(phrase)}\b', text) for phrase in phrases)),
+            None
+        )
+        asks_tops = re.search(r'\btops?\b|\bformation', text) is not None
+        depth_bounds = self._depth_bounds(text)
+        interval_attribute = next(
+            (name for name, phrases in INTERVAL_ATTRIBUTES.items()
+             if name != 'formation_top' and any(re.search(rf'\b{re.escape(phrase)}\b', text) for phrase in phrases)),
+            None
+        )
+        # Curve mnemonics are short ("GR", "RHOB"), so they are matched as whole words of any length
+        curves = [
+            value for value in _mentioned(mentions, 'value', min_length=1)
+            if any(self.columns['attribute'][row] == 'log_curve' for row in self.by_value[value])
+        ]
+        if curves and interval_attribute in (None, 'log_curve'):
+            interval_attribute = 'log_curve'
+
+        # "which well has API 42-123-45678"
+        api_match = API_NUMBER_PATTERN.search(query)
+        if api_match and re.search(r'\bwhich\b|\bwhat well\b', text):
+            rows = self.lookup(values=[api_match.group(0)], attribute='api_number')
+            if rows:
+                return f"Well with API number {api_match.group(0)}", rows
+
+        # "which wells are within 5 km of Smith 14-2"; area-scoped analysis goes to the agents with a location filter
+        proximity = parse_proximity(text)
+        origin = self.locate(proximity[1]) if proximity else None
+        if origin is not None:
+            if interval_attribute or asks_tops or attribute not in (None, 'location'):
+                return None
+            nearby = [well for well, _ in self.wells_near(origin[0], origin[1], proximity[0])]
+            return f"Wells within {proximity[0]:,.1f} km of {origin[2]}", self.lookup(nearby, 'location')
+
+        well_names = ', '.join(self._display_name(self.by_well, well) for well in wells)
+        # "which wells have perforations between 7,000 and 7,500 ft", "GR coverage in Smith 14-2"
+        if interval_attribute and (wells or depth_bounds):
+            values = curves if interval_attribute == 'log_curve' and curves else None
+            if depth_bounds:
+                rows = self.overlapping(interval_attribute, *depth_bounds, wells=wells or None, values=values)
+            else:
+                rows = self.lookup(wells, interval_attribute, values)
+            description = _attribute_label(interval_attribute) + 's'
+            if values:
+                description = f"{', '.join(self._display_name(self.by_value, value) for value in values)} log coverage"
+            if wells:
+                description += f" for {well_names}"
+            if depth_bounds:
+                description += self._describe_bounds(depth_bounds)
+            return description, rows
+
+        if attribute and wells and not asks_tops:
+            return f"{_attribute_label(attribute)} for {well_names}", self.lookup(wells, attribute)
+
+        if asks_tops:
+            formations = [
+                formation for formation in _mentioned(mentions, 'value')
+                if any(self.columns['attribute'][row] == 'formation_top' for row in self.by_value[formation])
+            ]
+            if formations:
+                rows = self.lookup(wells or None, 'formation_top', formations)
+                description = f"{', '.join(self._display_name(self.by_value, f) for f in formations)} tops"
+            elif wells:
+                rows = self.lookup(wells, 'formation_top')
+                description = f"Formation tops for {well_names}"
+            elif depth_bounds:
+                rows = self.lookup(attribute='formation_top')
+                description = "Formation tops"
+            else:
+                return None
+            if depth_bounds:
+                # A single depth asks which formation interval contains it; a range asks for tops inside it
+                if depth_bounds[0] == depth_bounds[1]:
+                    in_range = set(self.overlapping('formation_top', *depth_bounds))
+                else:
+                    in_range = set(self.depth_range('formation_top', *depth_bounds))
+                rows = [row for row in rows if row in in_range]
+                description += self._describe_bounds(depth_bounds)
+            return description, rows
+
+        # "which wells are in Midland County", "list wells in T2S R3W"
+        if re.search(r'\bwells\b', text) and not wells:
+            township = plss_township(query)
+            if township:
+                return f"Wells in {township}", self.lookup(self.location_wells({'township': township}), 'legal_description')
+            for field in ('county', 'state'):
+                places = [
+                    place for place in _mentioned(mentions, 'value')
+                    if any(self.columns['attribute'][row] == field for row in self.by_value[place])
+                ]
+                if places:
+                    # "Midland County" and "Midland" name the same place
+                    names = {normalize_county(place): self._display_name(self.by_value, place) for place in places}
+                    return f"Wells in {', '.join(names.values())}", self.lookup(attribute=field, values=places)
+
+        if attribute and re.search(r'\b(all|every|each|list)\b', text) and re.search(r'\bwells\b', text):
+            return f"{_attribute_label(attribute)} for all wells", self.lookup(attribute=attribute)
+
+        return None
+
+    def _is_lookup(self, tokens: List[str], mentions: List[Tuple[int, int, str, str]]) -> bool:
+        """Whether the whole question is lookup phrasing: nothing is left once attribute phrases,
+        known wells and values, numbers and question scaffolding are taken out"""
+        covered = {position for start, end, _, _ in mentions for position in range(start, end)}
+        for start, end, gram in _ngrams(tokens, _PHRASE_GRAM_LENGTH):
+            if gram in _PHRASE_GRAMS:
+                covered.update(range(start, end))
+        return all(
+            len(word) == 1 or word in _LOOKUP_WORDS
+            for position, token in enumerate(tokens) if position not in covered
+            for word in re.findall(r'[a-z]+', token)
+        )
+
+    def _display_name(self, index: Dict[str, List[int]], key: str) -> str:
+        """Name as originally extracted for a normalized index key"""
+        row = index[key][0]
+        return self.columns['well' if index is self.by_well else 'value'][row]
+
+    def _describe_bounds(self, depth_bounds: Tuple[float, float]) -> str:
+        low, high = depth_bounds
+        if low == high:
+            return f" at {low:,.0f} ft"
+        if high == float('inf'):
+            return f" below {low:,.0f} ft"
+        if low == 0:
+            return f" above {high:,.0f} ft"
+        return f" between {low:,.0f} and {high:,.0f} ft"
+
+    def _depth_bounds(self, text: str) -> Optional[Tuple[float, float]]:
+        match = _DEPTH_RANGE_PATTERN.search(text)
+        if match:
+            low, high = sorted(float(value.replace(',', '')) for value in match.groups())
+            return low, high
+        match = _DEPTH_BOUND_PATTERN.search(text)
+        if match:
+            depth = float(match.group(2).replace(',', ''))
+            return (depth, float('inf')) if match.group(1) in ('below', 'deeper than', 'under') else (0.0, depth)
+        match = _DEPTH_POINT_PATTERN.search(text)
+        if match:
+            depth = float(match.group(1).replace(',', ''))
+            return depth, depth
+        return None
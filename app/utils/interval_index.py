@@ -0,0 +1,125 @@
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+
+
+class DepthIntervalIndex:
+    """Static interval index over depth spans, bucketed by span length and queried by binary search
+
+    Intervals are grouped into power-of-two span buckets, each with its starts sorted once and its own
+    longest span. An interval can only overlap [low, high] if it starts at or after low minus the longest
+    span of its bucket, so a query reads one short slice per bucket and a single long interval (a formation
+    running to TD) only widens the slice of its own bucket.
+    """
+
+    # Indexes pickled before span buckets were added build them on first query
+    _buckets: Optional[List[Tuple[np.ndarray, np.ndarray, np.ndarray, float]]] = None
+
+    def __init__(self, starts: List[float], ends: List[float], rows: List[int]):
+        starts = np.asarray(starts, dtype=np.float64)
+        ends = np.maximum(np.asarray(ends, dtype=np.float64), starts)
+        order = np.argsort(starts, kind='stable')
+        self.starts = starts[order]
+        self.ends = ends[order]
+        self.rows = np.asarray(rows, dtype=np.int64)[order]
+        self._span_buckets()
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _span_buckets(self) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray, float]]:
+        """(starts, ends, rows, longest span) per span bucket, each still sorted by start"""
+        if self._buckets is None:
+            spans = self.ends - self.starts
+            keys = np.floor(np.log2(spans + 1.0)).astype(np.int64)
+            buckets = []
+            for key in np.unique(keys):
+                members = np.flatnonzero(keys == key)
+                buckets.append((self.starts[members], self.ends[members], self.rows[members], float(spans[members].max())))
+            self._buckets = buckets
+        return self._buckets
+
+    def _windows(self, low: float, high: float) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """(ends, rows) of the slice of each bucket whose intervals may overlap [low, high]"""
+        windows = []
+        for starts, ends, rows, max_span in self._span_buckets():
+            first = np.searchsorted(starts, low - max_span, 'left')
+            last = np.searchsorted(starts, high, 'right')
+            if first < last:
+                windows.append((ends[first:last], rows[first:last]))
+        return windows
+
+    def overlapping(self, low: float, high: float) -> np.ndarray:
+        """Rows whose [start, end] intersects [low, high]"""
+        matches = [rows[ends >= low] for ends, rows in self._windows(low, high)]
+        return np.concatenate(matches) if matches else np.zeros(0, dtype=np.int64)
+
+    def candidates_examined(self, low: float, high: float) -> int:
+        """Intervals a query for [low, high] reads before checking their ends"""
+        return sum(len(rows) for _, rows in self._windows(low, high))
+
+    def containing(self, depth: float) -> np.ndarray:
+        return self.overlapping(depth, depth)
+
+
+def parse_las_curve_ranges(las_text: str) -> List[Dict[str, Any]]:
+    """Depth range actually logged by each LAS curve (first to last non-null sample), in feet
+
+    Returns dicts with well, curve, unit, top and base; empty when the file has no parsable data section.
+    """
+    section = None
+    well = ''
+    null_value = -999.25
+    curves: List[str] = []
+    curve_units: List[str] = []
+    wrapped = False
+    samples: List[float] = []
+    for line in las_text.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith('#'):
+            continue
+        if stripped.startswith('~'):
+            section = stripped[1:2].upper()
+            continue
+
+        if section in ('V', 'W', 'C'):
+            # MNEM.UNIT  VALUE : DESCRIPTION
+            mnemonic, _, rest = stripped.partition('.')
+            unit, _, rest = rest.partition(' ')
+            value = rest.rsplit(':', 1)[0].strip()
+            mnemonic = mnemonic.strip().upper()
+            if section == 'V' and mnemonic == 'WRAP':
+                wrapped = value.upper().startswith('YES')
+            elif section == 'W' and mnemonic == 'WELL':
+                well = value
+            elif section == 'W' and mnemonic == 'NULL':
+                try:
+                    null_value = float(value)
+                except ValueError:
+                    pass
+            elif section == 'C':
+                curves.append(mnemonic)
+                curve_units.append(unit.strip())
+        elif section == 'A' and curves:
+            for token in stripped.split():
+                try:
+                    samples.append(float(token))
+                except ValueError:
+                    samples.append(null_value)
+
+    if not curves or not samples or wrapped and len(samples) % len(curves):
+        return []
+    data = np.array(samples[:len(samples) - len(samples) % len(curves)], dtype=np.float64).reshape(-1, len(curves))
+    if not len(data):
+        return []
+
+    depth_unit = curve_units[0].lower()
+    scale = 3.28084 if depth_unit in ('m', 'meter', 'meters', 'metres') else 1.0
+    depths = data[:, 0] * scale
+    ranges = []
+    for column, curve in enumerate(curves[1:], 1):
+        logged = np.flatnonzero(~np.isclose(data[:, column], null_value) & ~np.isnan(data[:, column]))
+        if not len(logged):
+            continue
+        top, base = sorted((float(depths[logged[0]]), float(depths[logged[-1]])))
+        ranges.append({'well': well, 'curve': curve, 'unit': curve_units[column], 'top': top, 'base': base})
+    return ranges
@@ -0,0 +1,103 @@
+import threading
+from typing import Dict, Any, Optional
+from groq import Groq
+
+from app.utils.config import Config
+from app.utils.deadline import Deadline, DeadlineExceeded
+
+
+class _SlotStream:
+    """Streamed completion that holds its gateway slot until fully read, closed or out of time"""
+
+    def __init__(self, stream, release, deadline: Optional[Deadline] = None):
+        self._stream = stream
+        self._release = release
+        self._deadline = deadline
+
+    def __iter__(self):
+        try:
+            for chunk in self._stream:
+                if self._deadline is not None and self._deadline.expired():
+                    if hasattr(self._stream, 'close'):
+                        self._stream.close()
+                    raise DeadlineExceeded(f"{self._deadline} deadline reached while streaming")
+                yield chunk
+        finally:
+            self.close()
+
+    def close(self):
+        release, self._release = self._release, None
+        if release is not None:
+            release()
+
+    def __del__(self):
+        self.close()
+
+
+class LLMGateway:
+    """Single Groq client shared by every agent, processor and session in the process"""
+
+    def __init__(self, api_key: str, max_concurrent: int = 8):
+        self.client = Groq(api_key=api_key)
+        self._stats_lock = threading.Lock()
+        # Shared limit on in-flight completions, so batch jobs and chat sessions cannot exceed the quota together
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self.max_concurrent = max_concurrent
+        self.in_flight = 0
+        self.calls = 0
+        self.errors = 0
+
+    def create_completion(self, deadline: Optional[Deadline] = None, **kwargs):
+        """Forward a chat completion request to Groq once a concurrency slot is free, within the deadline"""
+        client = self.client
+        if deadline is None:
+            self._slots.acquire()
+        else:
+            deadline.check("the LLM call")
+            if not self._slots.acquire(timeout=deadline.remaining()):
+                raise DeadlineExceeded(f"{deadline} deadline reached waiting for an LLM slot")
+            # The HTTP request may not outlive the caller's deadline; SDK retries (with backoff) would
+            # each get the full timeout again, so the call is made once
+            client = self.client.with_options(max_retries=0, timeout=max(deadline.remaining(), 0.1))
+        with self._stats_lock:
+            self.calls += 1
+            self.in_flight += 1
+        try:
+            response = client.chat.completions.create(**kwargs)
+        except Exception as e:
+            with self._stats_lock:
+                self.errors += 1
+            self._release()
+            if deadline is not None and deadline.expired():
+                raise DeadlineExceeded(f"{deadline} deadline reached during the LLM call") from e
+            raise
+
+        if kwargs.get('stream'):
+            return _SlotStream(response, self._release, deadline)
+        self._release()
+        return response
+
+    def _release(self):
+        with self._stats_lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'in_flight': self.in_flight,
+            'max_concurrent': self.max_concurrent
+        }
+
+
+_gateways: Dict[str, LLMGateway] = {}
+_gateways_lock = threading.Lock()
+
+
+def get_llm_gateway(api_key: str) -> LLMGateway:
+    """Return the process-wide gateway for an API key"""
+    with _gateways_lock:
+        if api_key not in _gateways:
+            _gateways[api_key] = LLMGateway(api_key, Config.LLM_MAX_CONCURRENT_REQUESTS)
+        return _gateways[api_key]
@@ -0,0 +1,121 @@
+import os
+import re
+from typing import List, Dict, Any, Optional, Iterable, Set
+import numpy as np
+
+from app.utils.text_index import API_NUMBER_PATTERN
+
+# Fields that can be used in search filters
+FILTER_FIELDS = ['filename', 'extension', 'type', 'method', 'chunk_type', 'well', 'api', 'year']
+
+_YEAR_PATTERN = re.compile(r'\b(19[5-9]\d|20\d{2})\b')
+# "Smith 14-2", "Jones Unit 3-10H", "State A 1"
+_WELL_NAME_PATTERN = re.compile(r"\b([A-Z][A-Za-z]+(?: [A-Z][A-Za-z]+){0,2})\s+(?:#\s*)?(\d{1,3}-\d{1,3}[A-Z]{0,2})\b(?!-\d)")
+
+_WELL_PREFIX_PATTERN = re.compile(r'^(?:(?:Well|The|Lease|Operator)\b\s*)+')
+
+
+def extract_entities(text: str) -> Dict[str, Set[str]]:
+    """Extract well names, API numbers and years mentioned in document text"""
+    entities = {'well': set(), 'api': set(), 'year': set()}
+    for match in API_NUMBER_PATTERN.finditer(text):
+        entities['api'].add(match.group(0).replace('-', '')[:10])
+    for match in _YEAR_PATTERN.finditer(text):
+        entities['year'].add(match.group(1))
+    for match in _WELL_NAME_PATTERN.finditer(text):
+        name = _WELL_PREFIX_PATTERN.sub('', match.group(1))
+        if name:
+            entities['well'].add(f"{name} {match.group(2)}".lower())
+    return entities
+
+
+def _normalize_value(value: Any) -> str:
+    return str(value).strip().lower()
+
+
+class MetadataIndex:
+    """Bitmap (Python int bitset) indexes over document metadata and extracted entities"""
+
+    def __init__(self):
+        self.bitmaps: Dict[str, Dict[str, int]] = {field: {} for field in FILTER_FIELDS}
+        self.count = 0
+        self.live_mask = 0
+
+    def add_document(self, position: int, metadata: Dict[str, Any], content: str):
+        """Set the document's bit in every (field, value) bitmap it belongs to"""
+        filename = metadata.get('filename', '')
+        values = {
+            'filename': {filename},
+            'extension': {os.path.splitext(filename)[1].lstrip('.')},
+            'type': {metadata.get('type', '')},
+            'method': {metadata.get('analysis_method') or metadata.get('processing_approach', '')},
+            'chunk_type': {metadata.get('chunk_type', 'synthesis')}
+        }
+        values.update(extract_entities(content))
+
+        bit = 1 << position
+        for field, field_values in values.items():
+            field_bitmaps = self.bitmaps[field]
+            for value in field_values:
+                if value:
+                    key = _normalize_value(value)
+                    field_bitmaps[key] = field_bitmaps.get(key, 0) | bit
+
+        self.count = max(self.count, position + 1)
+        self.live_mask |= bit
+
+    def remove_document(self, position: int):
+        """Clear the document's bit from the live mask so filters no longer return it"""
+        self.live_mask &= ~(1 << position)
+
+    def live_positions(self) -> np.ndarray:
+        """Positions of every document that has not been removed"""
+        return self._bits_to_positions(self.live_mask)
+
+    def count_matching(self, filters: Dict[str, Any]) -> int:
+        """Number of live documents matching the filters"""
+        positions = self.evaluate(filters)
+        return len(positions) if positions is not None else bin(self.live_mask).count('1')
+
+    def values(self, field: str) -> List[str]:
+        """Distinct indexed values for a field"""
+        return sorted(value for value, bitmap in self.bitmaps.get(field, {}).items() if bitmap & self.live_mask)
+
+    def evaluate(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Positions matching all filter fields (OR within a field's values); None means no filtering"""
+        if not filters:
+            return None
+
+        mask = self.live_mask
+        for field, wanted in filters.items():
+            if field not in self.bitmaps:
+                raise ValueError(f"Unknown filter field '{field}'. Available: {', '.join(FILTER_FIELDS)}")
+            if wanted is None or wanted == [] or wanted == '':
+                continue
+            wanted_values = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+
+            field_mask = 0
+            for value in wanted_values:
+                field_mask |= self.bitmaps[field].get(_normalize_value(value), 0)
+            mask &= field_mask
+            if not mask:
+                break
+
+        return self._bits_to_positions(mask)
+
+    def _bits_to_positions(self, mask: int) -> np.ndarray:
+        if not mask:
+            return np.zeros(0, dtype=np.int64)
+        bits = np.unpackbits(
+            np.frombuffer(mask.to_bytes((mask.bit_length() + 7) // 8, 'little'), dtype=np.uint8),
+            bitorder='little'
+        )
+        return np.flatnonzero(bits)
+
+    def rebuild(self, documents: Iterable):
+        """Rebuild from (position, metadata, content) triples"""
+        self.bitmaps = {field: {} for field in FILTER_FIELDS}
+        self.count = 0
+        self.live_mask = 0
+        for position, metadata, content in documents:
+            self.add_document(position, metadata, content)
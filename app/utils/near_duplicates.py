@@ -0,0 +1,101 @@
+import re
+import zlib
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np
+
+# Universal hashing (a * x + b) mod p over 32-bit shingle hashes; a < 2^31 keeps products inside uint64
+_HASH_PRIME = np.uint64(4294967311)
+_SIGNATURE_BLOCK_ROWS = 4096
+
+_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def shingles(text: str, size: int = 5) -> Set[int]:
+    """Hashed word n-grams of the lowercased text, ignoring punctuation and markup"""
+    tokens = _TOKEN_PATTERN.findall(text.lower())
+    if len(tokens) < size:
+        return {zlib.crc32(' '.join(tokens).encode('utf-8'))} if tokens else set()
+    return {
+        zlib.crc32(' '.join(tokens[i:i + size]).encode('utf-8'))
+        for i in range(len(tokens) - size + 1)
+    }
+
+
+def _lsh_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """(bands, rows) whose banding threshold sits a little below the similarity threshold"""
+    target = max(threshold - 0.1, 0.05)
+    best = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        distance = abs((1.0 / bands) ** (1.0 / rows) - target)
+        if best is None or distance < best[0]:
+            best = (distance, bands, rows)
+    return best[1], best[2]
+
+
+class NearDuplicateIndex:
+    """MinHash signatures with LSH banding for finding near-duplicate documents by estimated Jaccard similarity"""
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 128, seed: int = 1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, 1 << 31, size=num_perm).astype(np.uint64)
+        self.b = rng.randint(0, 1 << 31, size=num_perm).astype(np.uint64)
+        self.bands, self.rows = _lsh_bands(threshold, num_perm)
+        self.signatures: Dict[str, np.ndarray] = {}
+        self.buckets: List[Dict[bytes, Set[str]]] = [{} for _ in range(self.bands)]
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature of the text, None when it has no tokens"""
+        hashes = np.fromiter(shingles(text), dtype=np.uint64)
+        if not len(hashes):
+            return None
+        signature = np.full(self.num_perm, _HASH_PRIME, dtype=np.uint64)
+        for start in range(0, len(hashes), _SIGNATURE_BLOCK_ROWS):
+            block = hashes[start:start + _SIGNATURE_BLOCK_ROWS, None]
+            permuted = (block * self.a + self.b) % _HASH_PRIME
+            signature = np.minimum(signature, permuted.min(axis=0))
+        return signature
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [
+            signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            for band in range(self.bands)
+        ]
+
+    def add(self, key: str, signature: Optional[np.ndarray]):
+        """Index a signature under a key, replacing any previous one"""
+        self.remove(key)
+        if signature is None:
+            return
+        self.signatures[key] = signature
+        for band, band_key in enumerate(self._band_keys(signature)):
+            self.buckets[band].setdefault(band_key, set()).add(key)
+
+    def remove(self, key: str):
+        signature = self.signatures.pop(key, None)
+        if signature is None:
+            return
+        for band, band_key in enumerate(self._band_keys(signature)):
+            bucket = self.buckets[band].get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self.buckets[band][band_key]
+
+    def query(self, signature: Optional[np.ndarray], exclude: Optional[str] = None) -> Optional[Tuple[str, float]]:
+        """Most similar indexed key at or above the threshold, as (key, estimated Jaccard similarity)"""
+        if signature is None:
+            return None
+        candidates = set()
+        for band, band_key in enumerate(self._band_keys(signature)):
+            candidates |= self.buckets[band].get(band_key, set())
+        candidates.discard(exclude)
+
+        best = None
+        for key in candidates:
+            similarity = float(np.mean(self.signatures[key] == signature))
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (key, similarity)
+        return best
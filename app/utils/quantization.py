@@ -0,0 +1,214 @@
+import os
+from typing import List, Optional, Tuple
+import numpy as np
+
+from app.utils.document_records import VectorMatrix
+
+# Rows processed per block when scoring int8 codes, bounds the float32 scratch space
+_SCORE_BLOCK_ROWS = 4096
+
+# Number of set bits for every byte value, used for Hamming distances on packed codes
+_POPCOUNT_TABLE = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 quantization, returns (codes, scales)"""
+    vectors = np.atleast_2d(vectors).astype(np.float32)
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.round(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def int8_scores(codes: np.ndarray, scales: np.ndarray, query_vector: np.ndarray) -> np.ndarray:
+    """Approximate dot products between int8 rows and a float query, or a (dim x queries) matrix of queries"""
+    scores = np.empty((len(codes),) + query_vector.shape[1:], dtype=np.float32)
+    for start in range(0, len(codes), _SCORE_BLOCK_ROWS):
+        block = codes[start:start + _SCORE_BLOCK_ROWS].astype(np.float32)
+        scores[start:start + len(block)] = block @ query_vector
+    return scores * scales.reshape((-1,) + (1,) * (query_vector.ndim - 1))
+
+
+def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+    """Sign-bit quantization packed 8 dimensions per byte"""
+    return np.packbits(np.atleast_2d(vectors) > 0, axis=1)
+
+
+def binary_scores(codes: np.ndarray, query_vector: np.ndarray, dim: int) -> np.ndarray:
+    """Cosine estimate from Hamming distance between packed sign bits"""
+    query_bits = quantize_binary(query_vector)[0]
+    hamming = _POPCOUNT_TABLE[np.bitwise_xor(codes, query_bits)].sum(axis=1, dtype=np.int32)
+    return np.cos(np.pi * hamming / dim).astype(np.float32)
+
+
+class QuantizedVectorMatrix(VectorMatrix):
+    """Vector matrix keeping only int8 or binary codes in RAM, with float rows on disk for rescoring"""
+
+    quantized = True
+
+    def __init__(self, mode: str, float_path: str, initial_capacity: int = 64):
+        super().__init__(initial_capacity)
+        if mode not in ('int8', 'binary'):
+            raise ValueError(f"Unsupported quantization mode: {mode}")
+        self.mode = mode
+        self.float_path = float_path
+        self.dim = None
+        self.codes: Optional[np.ndarray] = None
+        self.scales = np.zeros(0, dtype=np.float32)
+        self._float_rows = None
+        self._float_file = None
+        # False when the rescoring file on disk is shorter than the rows it should hold
+        self.float_rows_valid = True
+        os.makedirs(os.path.dirname(float_path) or '.', exist_ok=True)
+
+    def append(self, vector: Optional[np.ndarray]):
+        """Quantize a row into RAM and append its float copy to the rescoring file"""
+        if self.count >= len(self.present):
+            self._grow(max(self.initial_capacity, len(self.present) * 2))
+
+        if vector is not None and self.dim is None:
+            self.dim = len(vector)
+            self._allocate_codes(len(self.present))
+            # Start a fresh float file, backfilling zero rows for documents added before the first vector
+            self._open_float_file(truncate=True)
+            self._float_file.write(np.zeros((self.count, self.dim), dtype=np.float32).tobytes())
+
+        if self.dim is not None:
+            row = np.zeros(self.dim, dtype=np.float32) if vector is None else np.asarray(vector, dtype=np.float32)
+            if self.mode == 'int8':
+                codes, scales = quantize_int8(row)
+                self.codes[self.count] = codes[0]
+                self.scales[self.count] = scales[0]
+            else:
+                self.codes[self.count] = quantize_binary(row)[0]
+            # Rows are written at their own offset, so a tail left by a crash before the last save is overwritten
+            if self._float_file is None:
+                self._open_float_file()
+            self._float_file.seek(self.count * self.dim * 4)
+            self._float_file.write(row.tobytes())
+            self._float_rows = None
+
+        self.present[self.count] = vector is not None
+        self.count += 1
+
+    def _open_float_file(self, truncate: bool = False):
+        """Keep one read/write handle on the rescoring file, cut to the rows this matrix owns"""
+        if not truncate and not os.path.exists(self.float_path):
+            truncate = True
+        self._float_rows = None
+        self._float_file = open(self.float_path, 'w+b' if truncate else 'r+b')
+        self._float_file.truncate(self.count * self.dim * 4)
+
+    def close(self):
+        """Release the rescoring file handle (the file itself is kept)"""
+        if self._float_file is not None:
+            self._float_file.close()
+            self._float_file = None
+        self._float_rows = None
+
+    def _allocate_codes(self, capacity: int):
+        width = self.dim if self.mode == 'int8' else (self.dim + 7) // 8
+        dtype = np.int8 if self.mode == 'int8' else np.uint8
+        codes = np.zeros((capacity, width), dtype=dtype)
+        scales = np.zeros(capacity, dtype=np.float32)
+        if self.codes is not None:
+            codes[:self.count] = self.codes[:self.count]
+            scales[:self.count] = self.scales[:self.count]
+        self.codes = codes
+        self.scales = scales
+
+    def _grow(self, capacity: int):
+        present = np.zeros(capacity, dtype=bool)
+        present[:self.count] = self.present[:self.count]
+        self.present = present
+        if self.codes is not None:
+            self._allocate_codes(capacity)
+
+    def similarities(self, query_vector: np.ndarray, positions: Optional[np.ndarray] = None) -> np.ndarray:
+        """Approximate similarities computed on the quantized codes of every row, or only the given rows"""
+        if positions is None:
+            positions = slice(0, self.count)
+        if self.codes is None:
+            return np.zeros(len(self.present[positions]), dtype=np.float32)
+        if self.mode == 'int8':
+            scores = int8_scores(self.codes[positions], self.scales[positions], query_vector)
+        else:
+            scores = binary_scores(self.codes[positions], query_vector, self.dim)
+        scores[~self.present[positions]] = 0.0
+        return scores
+
+    def batch_similarities(self, query_matrix: np.ndarray) -> np.ndarray:
+        """Approximate (rows x queries) similarities; int8 codes are decoded once per block for all queries"""
+        if self.codes is None:
+            return np.zeros((self.count, len(query_matrix)), dtype=np.float32)
+        if self.mode == 'int8':
+            scores = int8_scores(self.codes[:self.count], self.scales[:self.count], query_matrix.T)
+        else:
+            scores = np.stack([binary_scores(self.codes[:self.count], query, self.dim) for query in query_matrix], axis=1)
+        scores[~self.present[:self.count]] = 0.0
+        return scores
+
+    def _float_matrix(self) -> np.memmap:
+        if self._float_file is not None:
+            self._float_file.flush()
+        if self._float_rows is None or len(self._float_rows) != self.count:
+            self._float_rows = np.memmap(self.float_path, dtype=np.float32, mode='r', shape=(self.count, self.dim))
+        return self._float_rows
+
+    def rows(self, positions: np.ndarray) -> List[Optional[np.ndarray]]:
+        """Float copies of the given rows from the rescoring file, None where the aspect is missing"""
+        if self.dim is None:
+            return [None] * len(positions)
+        if not self.float_rows_valid:
+            return [self._decoded_row(position) if self.present[position] else None for position in positions]
+        float_rows = self._float_matrix()
+        return [
+            np.array(float_rows[position]) if self.present[position] else None
+            for position in positions
+        ]
+
+    def exact_similarities(self, query_vector: np.ndarray, positions: np.ndarray) -> np.ndarray:
+        """Exact float similarities for the given rows, read from the memory-mapped float file"""
+        if self.dim is None or len(positions) == 0:
+            return np.zeros(len(positions), dtype=np.float32)
+        if not self.float_rows_valid:
+            return self.similarities(query_vector, positions)
+        scores = np.asarray(self._float_matrix()[positions]) @ query_vector
+        scores[~self.present[positions]] = 0.0
+        return scores
+
+    def _decoded_row(self, position: int) -> np.ndarray:
+        """Unit vector reconstructed from the codes, used when the float rows are unavailable"""
+        if self.mode == 'int8':
+            row = self.codes[position].astype(np.float32) * self.scales[position]
+        else:
+            row = np.unpackbits(self.codes[position])[:self.dim].astype(np.float32) * 2 - 1
+        return row / max(np.linalg.norm(row), 1e-12)
+
+    def memory_bytes(self) -> int:
+        codes_bytes = self.codes[:self.count].nbytes if self.codes is not None else 0
+        scales_bytes = self.scales[:self.count].nbytes if self.mode == 'int8' else 0
+        return codes_bytes + scales_bytes + self.present[:self.count].nbytes
+
+    def float_bytes(self) -> int:
+        return self.count * (self.dim or 0) * 4
+
+    def __getstate__(self):
+        # Rows counted in the pickle must already be in the file
+        if self._float_file is not None:
+            self._float_file.flush()
+        state = self.__dict__.copy()
+        state['_float_rows'] = None
+        state['_float_file'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._float_file = None
+        # Rows past count (appended after the last save) are dropped on the next append; missing rows
+        # cannot be recovered, so rescoring falls back to the quantized codes instead of misaligned rows
+        expected = self.float_bytes()
+        actual = os.path.getsize(self.float_path) if os.path.exists(self.float_path) else 0
+        self.float_rows_valid = actual >= expected
+        if not self.float_rows_valid:
+            print(f"⚠️ {self.float_path} holds {actual} of {expected} bytes; rescoring uses quantized vectors")
@@ -0,0 +1,106 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Tuple
+from sentence_transformers import CrossEncoder
+
+from app.utils.config import Config
+from app.utils.embedding_cache import normalize_query
+
+
+class CrossEncoderReranker:
+    """Second-stage cross-encoder reranker bounded by a latency budget, with cached (query, chunk) scores"""
+
+    def __init__(self, model_name: str, batch_size: int = 16, latency_budget_ms: float = 300.0,
+                 max_passage_chars: int = 2000, cache_size: int = 4096):
+        self.model = CrossEncoder(model_name, device='cpu')
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.latency_budget = latency_budget_ms / 1000.0
+        self.max_passage_chars = max_passage_chars
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.pairs_scored = 0
+        self.budget_exhausted = 0
+
+    def _cache_key(self, query: str, content: str) -> Tuple[str, str]:
+        passage_hash = hashlib.blake2b(content[:self.max_passage_chars].encode('utf-8'), digest_size=16).hexdigest()
+        return normalize_query(query), passage_hash
+
+    def rerank(self, query: str, results: List[Dict[str, Any]], top_k: int) -> List[Dict[str, Any]]:
+        """Rerank stage-one results; candidates not scored within the budget keep their stage-one order after the reranked ones"""
+        start_time = time.perf_counter()
+        keys = [self._cache_key(query, result['content']) for result in results]
+        rerank_scores: Dict[int, float] = {}
+
+        with self._lock:
+            for index, key in enumerate(keys):
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    rerank_scores[index] = self._cache[key]
+                    self.cache_hits += 1
+
+        # Score uncached candidates in stage-one order, one batch at a time, while the budget allows
+        pending = [index for index in range(len(results)) if index not in rerank_scores]
+        last_batch_time = 0.0
+        for batch_start in range(0, len(pending), self.batch_size):
+            elapsed = time.perf_counter() - start_time
+            if elapsed + last_batch_time > self.latency_budget:
+                self.budget_exhausted += 1
+                break
+
+            batch = pending[batch_start:batch_start + self.batch_size]
+            batch_start_time = time.perf_counter()
+            scores = self.model.predict(
+                [(query, results[index]['content'][:self.max_passage_chars]) for index in batch],
+                batch_size=self.batch_size
+            )
+            last_batch_time = time.perf_counter() - batch_start_time
+
+            with self._lock:
+                for index, score in zip(batch, scores):
+                    rerank_scores[index] = float(score)
+                    self._cache[keys[index]] = float(score)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+                self.pairs_scored += len(batch)
+
+        reranked = sorted(rerank_scores, key=lambda index: rerank_scores[index], reverse=True)
+        unscored = [index for index in range(len(results)) if index not in rerank_scores]
+
+        ordered = []
+        for index in reranked + unscored:
+            result = dict(results[index])
+            if index in rerank_scores:
+                result['rerank_score'] = rerank_scores[index]
+            ordered.append(result)
+        return ordered[:top_k]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'model': self.model_name,
+            'pairs_scored': self.pairs_scored,
+            'cache_hits': self.cache_hits,
+            'cache_size': len(self._cache),
+            'budget_exhausted': self.budget_exhausted
+        }
+
+
+_shared_reranker = None
+_shared_reranker_lock = threading.Lock()
+
+
+def get_shared_reranker() -> CrossEncoderReranker:
+    """Load the cross-encoder once per process"""
+    global _shared_reranker
+    with _shared_reranker_lock:
+        if _shared_reranker is None:
+            _shared_reranker = CrossEncoderReranker(
+                Config.RERANKER_MODEL,
+                batch_size=Config.RERANK_BATCH_SIZE,
+                latency_budget_ms=Config.RERANK_LATENCY_BUDGET_MS
+            )
+        return _shared_reranker
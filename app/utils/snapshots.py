@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Immutable, checksummed knowledge base snapshots for read replicas
+Export: python -m app.utils.snapshots export [collection]
+Verify: python -m app.utils.snapshots verify <snapshot_dir>
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Any, Optional
+from app.utils.config import Config
+
+SNAPSHOT_FORMAT_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+CURRENT_POINTER = 'CURRENT'
+
+
+def file_checksum(filepath: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def new_snapshot_version() -> str:
+    """Sortable version string for a new snapshot"""
+    return datetime.now().strftime('%Y%m%dT%H%M%S%f')
+
+
+def publish_snapshot(snapshot_root: str, staging_dir: str, version: str, manifest: Dict[str, Any]) -> str:
+    """Checksum the staged files, seal the directory under its version and point CURRENT at it"""
+    files = {}
+    for directory, _, filenames in os.walk(staging_dir):
+        for filename in filenames:
+            filepath = os.path.join(directory, filename)
+            files[os.path.relpath(filepath, staging_dir)] = file_checksum(filepath)
+
+    manifest = dict(manifest, format_version=SNAPSHOT_FORMAT_VERSION, version=version, files=files)
+    with open(os.path.join(staging_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    # The directory only appears under its final name once complete, and is never written again
+    snapshot_dir = os.path.join(snapshot_root, version)
+    os.rename(staging_dir, snapshot_dir)
+
+    pointer_tmp = os.path.join(snapshot_root, f".{CURRENT_POINTER}.{threading.get_ident()}.tmp")
+    with open(pointer_tmp, 'w') as f:
+        f.write(version)
+    os.replace(pointer_tmp, os.path.join(snapshot_root, CURRENT_POINTER))
+    return snapshot_dir
+
+
+def current_snapshot(snapshot_root: str) -> Optional[str]:
+    """Directory of the snapshot CURRENT points at, if any"""
+    try:
+        with open(os.path.join(snapshot_root, CURRENT_POINTER)) as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return None
+    snapshot_dir = os.path.join(snapshot_root, version)
+    return snapshot_dir if os.path.isdir(snapshot_dir) else None
+
+
+def read_manifest(snapshot_dir: str, verify: bool = True) -> Dict[str, Any]:
+    """Load a snapshot manifest, optionally checking every file against its checksum"""
+    with open(os.path.join(snapshot_dir, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format {manifest.get('format_version')} in {snapshot_dir}")
+    if verify:
+        for relpath, checksum in manifest['files'].items():
+            if file_checksum(os.path.join(snapshot_dir, relpath)) != checksum:
+                raise ValueError(f"Checksum mismatch for {relpath} in snapshot {manifest['version']}")
+    return manifest
+
+
+def prune_snapshots(snapshot_root: str, keep: int):
+    """Remove all but the newest snapshots, never the current one (replicas still mapping them keep their open files)"""
+    current = current_snapshot(snapshot_root)
+    versions = sorted(
+        entry for entry in os.listdir(snapshot_root)
+        if not entry.startswith('.') and os.path.isdir(os.path.join(snapshot_root, entry))
+    )
+    for version in versions[:-keep] if keep > 0 else []:
+        snapshot_dir = os.path.join(snapshot_root, version)
+        if snapshot_dir != current:
+            shutil.rmtree(snapshot_dir, ignore_errors=True)
+
+
+class SnapshotFollower:
+    """Polls a snapshot root and hands every newly published snapshot to a loader"""
+
+    def __init__(self, snapshot_root: str, load_snapshot: Callable[[str], Any], poll_seconds: float = 30.0):
+        self.snapshot_root = snapshot_root
+        self.load_snapshot = load_snapshot
+        self.poll_seconds = poll_seconds
+        self.loaded_snapshot = None
+        self.last_error = None
+        self._stop = threading.Event()
+        self.poll()
+        self._thread = threading.Thread(target=self._run, name="snapshot-follower", daemon=True)
+        self._thread.start()
+
+    def poll(self):
+        snapshot_dir = current_snapshot(self.snapshot_root)
+        if snapshot_dir is None or snapshot_dir == self.loaded_snapshot:
+            return
+        try:
+            self.load_snapshot(snapshot_dir)
+            self.loaded_snapshot = snapshot_dir
+            self.last_error = None
+        except Exception as e:
+            # Keep serving the previous snapshot
+            self.last_error = f"{os.path.basename(snapshot_dir)}: {e}"
+            print(f"⚠️ Could not load snapshot {snapshot_dir}: {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.poll_seconds):
+            self.poll()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'snapshot_root': self.snapshot_root,
+            'loaded_snapshot': os.path.basename(self.loaded_snapshot) if self.loaded_snapshot else None,
+            'last_error': self.last_error
+        }
+
+
+def main():
+    """Export a collection's knowledge base as a snapshot, or verify a snapshot directory"""
+    command = sys.argv[1] if len(sys.argv) > 1 else 'export'
+
+    if command == 'verify' and len(sys.argv) > 2:
+        try:
+            manifest = read_manifest(sys.argv[2], verify=True)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        print(f"✅ Snapshot {manifest['version']} verified: {len(manifest['files'])} files, {manifest['document_count']} documents")
+
+    elif command == 'export':
+        from app.agents.rag_system import EmbeddingCollections
+        collection = sys.argv[2] if len(sys.argv) > 2 else Config.DEFAULT_COLLECTION
+        start_time = time.perf_counter()
+        snapshot_dir = EmbeddingCollections().export_snapshot(collection)
+        print(f"✅ Exported {collection} to {snapshot_dir} in {time.perf_counter() - start_time:.1f}s")
+
+    else:
+        print("Usage: python -m app.utils.snapshots export [collection] | verify <snapshot_dir>")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
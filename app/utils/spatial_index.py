@@ -0,0 +1,132 @@
+import math
+import re
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+KM_PER_MILE = 1.609344
+
+# "31.9521, -102.0783", "31.9521 N 102.0783 W", "31°57'07.6\"N 102°04'41.9\"W", "lat 31.95 long -102.08"
+_COORDINATE_PATTERN = re.compile(
+    r'(?:lat(?:itude)?[:=\s]*)?(-?\d{1,3}(?:\.\d+)?)\s*(?:°\s*(\d{1,2}(?:\.\d+)?)\s*[\'′]?\s*(?:(\d{1,2}(?:\.\d+)?)\s*(?:"|″|\'\'))?)?\s*([NS])?'
+    r'\s*[,;/ ]\s*(?:lon(?:g(?:itude)?)?[:=\s]*)?'
+    r'(-?\d{1,3}(?:\.\d+)?)\s*(?:°\s*(\d{1,2}(?:\.\d+)?)\s*[\'′]?\s*(?:(\d{1,2}(?:\.\d+)?)\s*(?:"|″|\'\'))?)?\s*([EW])?',
+    re.IGNORECASE
+)
+# "within 5 km of Smith 14-2", "3 miles from 31.95, -102.08"
+_PROXIMITY_PATTERN = re.compile(
+    r'\b(?:within\s+)?(\d+(?:\.\d+)?)\s*(km|kms|kilometers?|kilometres?|mi|miles?)\s+(?:of|from|around)\s+(.+)',
+    re.IGNORECASE
+)
+# "Sec 14, T2S, R3W", "Section 14 Township 2 South Range 3 West"
+_PLSS_PATTERN = re.compile(
+    r'(?:\b(?:sec(?:tion)?\.?\s*(\d{1,2}))[\s,-]*)?'
+    r'\b(?:T|twp\.?\s*|township\s+)(\d{1,3})\s*-?\s*(N|S|north|south)\b[\s,-]*'
+    r'\b(?:R|rge\.?\s*|range\s+)(\d{1,3})\s*-?\s*(E|W|east|west)\b',
+    re.IGNORECASE
+)
+
+
+def haversine_km(latitude: float, longitude: float, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Great-circle distance in km from one point to arrays of points"""
+    lat1, lon1 = math.radians(latitude), math.radians(longitude)
+    lat2, lon2 = np.radians(latitudes), np.radians(longitudes)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _degrees(value: str, minutes: Optional[str], seconds: Optional[str], hemisphere: Optional[str]) -> float:
+    degrees = abs(float(value)) + float(minutes or 0) / 60 + float(seconds or 0) / 3600
+    negative = value.startswith('-') or (hemisphere or '').upper() in ('S', 'W')
+    return -degrees if negative else degrees
+
+
+def parse_coordinates(text: Any) -> Optional[Tuple[float, float]]:
+    """First (latitude, longitude) pair in decimal or degree-minute-second notation, in decimal degrees"""
+    for match in _COORDINATE_PATTERN.finditer(str(text or '')):
+        latitude = _degrees(*match.group(1, 2, 3, 4))
+        longitude = _degrees(*match.group(5, 6, 7, 8))
+        # Bare integers ("14-2", "2 3") are well numbers, not coordinates
+        if not any(match.group(index) for index in (2, 4, 6, 8)) and '.' not in match.group(1) + match.group(5):
+            continue
+        if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+            return latitude, longitude
+    return None
+
+
+def parse_proximity(text: str) -> Optional[Tuple[float, str]]:
+    """(radius_km, reference text) for "within N km/mi of X", or None"""
+    match = _PROXIMITY_PATTERN.search(text)
+    if not match:
+        return None
+    radius = float(match.group(1))
+    if match.group(2).lower().startswith('mi'):
+        radius *= KM_PER_MILE
+    return radius, match.group(3).strip().rstrip('?.!')
+
+
+def normalize_plss(value: Any) -> str:
+    """Public Land Survey System description as "Sec 14 T2S R3W" (township/range only when no section)"""
+    match = _PLSS_PATTERN.search(str(value or ''))
+    if not match:
+        return ''
+    section, township, north_south, range_number, east_west = match.groups()
+    normalized = f"T{int(township)}{north_south[0].upper()} R{int(range_number)}{east_west[0].upper()}"
+    return f"Sec {int(section)} {normalized}" if section else normalized
+
+
+def plss_township(value: Any) -> str:
+    """Township and range of a PLSS description ("T2S R3W"), ignoring the section"""
+    return re.sub(r'^Sec \d+ ', '', normalize_plss(value))
+
+
+class WellLocationIndex:
+    """Static uniform-grid index over well coordinates for radius queries
+
+    Points are bucketed into square cells of about cell_km; a radius query visits only the cells
+    overlapping the search box and computes great-circle distances for the wells in them.
+    """
+
+    def __init__(self, latitudes: List[float], longitudes: List[float], keys: List[Any], cell_km: float = 10.0):
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        self.keys = list(keys)
+        self.cell_degrees = max(cell_km, 0.1) / KM_PER_DEGREE
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        for position, cell in enumerate(zip(*self._cell(self.latitudes, self.longitudes))):
+            self.cells.setdefault(cell, []).append(position)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _cell(self, latitudes, longitudes):
+        return (np.floor(latitudes / self.cell_degrees).astype(np.int64).tolist(),
+                np.floor(longitudes / self.cell_degrees).astype(np.int64).tolist())
+
+    def within(self, latitude: float, longitude: float, radius_km: float) -> List[Tuple[Any, float]]:
+        """(key, distance_km) for every point within radius_km, nearest first"""
+        if not self.keys or radius_km < 0:
+            return []
+        lat_span = radius_km / KM_PER_DEGREE
+        lon_span = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(min(abs(latitude) + lat_span, 89.9))), 0.01))
+        low_row, high_row = (int(math.floor(value / self.cell_degrees)) for value in (latitude - lat_span, latitude + lat_span))
+        low_col, high_col = (int(math.floor(value / self.cell_degrees)) for value in (longitude - lon_span, longitude + lon_span))
+
+        if (high_row - low_row + 1) * (high_col - low_col + 1) >= len(self.cells):
+            # The box covers more cells than are occupied: scanning every point is cheaper
+            candidates = np.arange(len(self.keys))
+        else:
+            candidates = np.array([
+                position
+                for row in range(low_row, high_row + 1)
+                for col in range(low_col, high_col + 1)
+                for position in self.cells.get((row, col), ())
+            ], dtype=np.int64)
+        if not len(candidates):
+            return []
+
+        distances = haversine_km(latitude, longitude, self.latitudes[candidates], self.longitudes[candidates])
+        inside = np.flatnonzero(distances <= radius_km)
+        inside = inside[np.argsort(distances[inside], kind='stable')]
+        return [(self.keys[candidates[position]], float(distances[position])) for position in inside]
@@ -0,0 +1,203 @@
+import math
+import re
+from typing import List, Dict, Tuple, Iterable, Optional
+
+
+# Synonym table used for query expansion in the semantic score
+SEMANTIC_KEYWORDS = {
+    'well': ['drill', 'bore', 'hole', 'shaft'],
+    'formation': ['layer', 'unit', 'zone', 'horizon'],
+    'depth': ['footage', 'interval', 'level'],
+    'oil': ['petroleum', 'hydrocarbon', 'crude'],
+    'gas': ['natural gas', 'methane', 'hydrocarbon']
+}
+
+# Depth / measurement units normalized to a single token
+UNIT_ALIASES = {
+    'ft': 'ft', 'feet': 'ft', 'foot': 'ft', "'": 'ft',
+    'm': 'm', 'meter': 'm', 'meters': 'm', 'metre': 'm', 'metres': 'm',
+    'md': 'md', 'tvd': 'tvd', 'tvdss': 'tvdss', 'kb': 'kb',
+    'psi': 'psi', 'psia': 'psi', 'psig': 'psi',
+    'bbl': 'bbl', 'bbls': 'bbl', 'bopd': 'bopd', 'bwpd': 'bwpd',
+    'mcf': 'mcf', 'mcfd': 'mcfd', 'mmcf': 'mmcf', 'mmcfd': 'mmcfd',
+    'in': 'in', 'inch': 'in', 'inches': 'in', '"': 'in',
+    'ppg': 'ppg', 'cp': 'cp', 'api': 'api'
+}
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'have',
+    'in', 'is', 'it', 'its', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was',
+    'were', 'what', 'which', 'with', 'all', 'any', 'me', 'please', 'show', 'tell'
+}
+
+# API well numbers: 42-123-45678, 42-123-45678-00-00, or 10-14 digit runs
+API_NUMBER_PATTERN = re.compile(r'\b\d{2}-\d{3}-\d{5}(?:-\d{2}){0,2}\b|\b\d{10}(?:\d{2}){0,2}\b')
+# ISO dates ("2019-05-12") stay a single token, indexed with their year
+_DATE_PATTERN = re.compile(r'\b(?:19|20)\d{2}-[01]\d-[0-3]\d\b')
+# Well numbers such as "14-2" or "3-10H" stay a single token; the anchors keep depth ranges
+# ("10,250-10,300") and date parts from being read as well numbers
+_WELL_NUMBER_PATTERN = re.compile(r'(?<![\d,.\-])\b\d{1,3}-\d{1,3}[a-z]{0,2}\b(?![\d,\-])')
+# Numbers with thousands separators / decimals, optionally followed by a unit
+_NUMBER_UNIT_PATTERN = re.compile(
+    r"(?<![\w.])(\d{1,3}(?:,\d{3})+|\d+)(\.\d+)?\s*(ft|feet|foot|m|meters?|metres?|md|tvdss|tvd|kb|"
+    r"psi[ag]?|bbls?|bopd|bwpd|mmcfd|mmcf|mcfd|mcf|in|inch(?:es)?|ppg|cp|'|\")?(?![\w])",
+    re.IGNORECASE
+)
+_WORD_PATTERN = re.compile(r"[a-z][a-z0-9_\-/]*[a-z0-9]|[a-z]")
+
+
+def tokenize(text: str) -> List[str]:
+    """Tokenize geological text keeping API numbers, depths and units intact"""
+    tokens = []
+    text_lower = text.lower()
+
+    # API numbers are kept whole plus a digits-only form so both spellings match
+    for match in API_NUMBER_PATTERN.finditer(text_lower):
+        api = match.group(0)
+        digits = api.replace('-', '')
+        tokens.append(digits[:10])
+        if digits != digits[:10]:
+            tokens.append(digits)
+    text_lower = API_NUMBER_PATTERN.sub(' ', text_lower)
+
+    for date in _DATE_PATTERN.findall(text_lower):
+        tokens.extend((date, date[:4]))
+    text_lower = _DATE_PATTERN.sub(' ', text_lower)
+
+    tokens.extend(_WELL_NUMBER_PATTERN.findall(text_lower))
+    text_lower = _WELL_NUMBER_PATTERN.sub(' ', text_lower)
+
+    # Numbers: drop thousands separators, keep decimals, normalize trailing units
+    for match in _NUMBER_UNIT_PATTERN.finditer(text_lower):
+        number = match.group(1).replace(',', '')
+        decimals = match.group(2) or ''
+        if decimals.strip('.0'):
+            number += decimals
+        tokens.append(number)
+        unit = match.group(3)
+        if unit:
+            tokens.append(UNIT_ALIASES.get(unit, unit))
+    text_lower = _NUMBER_UNIT_PATTERN.sub(' ', text_lower)
+
+    for word in _WORD_PATTERN.findall(text_lower):
+        if word in STOPWORDS:
+            continue
+        tokens.append(UNIT_ALIASES.get(word, word))
+        # Hyphenated / slashed names also index their parts (e.g. "gamma-ray")
+        if '-' in word or '/' in word:
+            tokens.extend(part for part in re.split(r'[-/]', word) if part and part not in STOPWORDS)
+
+    return tokens
+
+
+def expand_query(query: str, synonym_weight: float = 0.5) -> Dict[str, float]:
+    """Expand query terms with the geological synonym table"""
+    weights = {}
+    for term in tokenize(query):
+        weights[term] = max(weights.get(term, 0.0), 1.0)
+
+    for term in list(weights):
+        for synonym in SEMANTIC_KEYWORDS.get(term, []):
+            synonym_terms = tokenize(synonym)
+            for synonym_term in synonym_terms:
+                weight = synonym_weight / len(synonym_terms)
+                if weights.get(synonym_term, 0.0) < weight:
+                    weights[synonym_term] = weight
+
+    return weights
+
+
+class BM25Index:
+    """Incremental inverted index with BM25 scoring over posting lists"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.doc_lengths: Dict[int, int] = {}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add_document(self, doc_id: int, text: str):
+        """Index a document's terms"""
+        if doc_id in self.doc_lengths:
+            self.remove_document(doc_id)
+
+        tokens = tokenize(text)
+        term_counts: Dict[str, int] = {}
+        for token in tokens:
+            term_counts[token] = term_counts.get(token, 0) + 1
+
+        for term, count in term_counts.items():
+            self.postings.setdefault(term, {})[doc_id] = count
+
+        self.doc_lengths[doc_id] = len(tokens)
+        self.total_length += len(tokens)
+
+    def remove_document(self, doc_id: int, text: Optional[str] = None):
+        """Drop a document from every posting list it appears in (only its own terms' lists when the text is given)"""
+        length = self.doc_lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self.total_length -= length
+
+        terms = set(tokenize(text)) if text is not None else list(self.postings)
+        empty_terms = []
+        for term in terms:
+            postings = self.postings.get(term)
+            if postings is not None and postings.pop(doc_id, None) is not None and not postings:
+                empty_terms.append(term)
+        for term in empty_terms:
+            del self.postings[term]
+
+    def idf(self, term: str) -> float:
+        """BM25 inverse document frequency"""
+        doc_freq = len(self.postings.get(term, ()))
+        total_docs = len(self.doc_lengths)
+        return math.log(1.0 + (total_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    def score(self, term_weights: Dict[str, float]) -> Dict[int, float]:
+        """BM25 scores for every document in the query terms' posting lists"""
+        scores: Dict[int, float] = {}
+        if not self.doc_lengths:
+            return scores
+
+        avg_length = self.total_length / len(self.doc_lengths) or 1.0
+        k1, b = self.k1, self.b
+        doc_lengths = self.doc_lengths
+
+        for term, weight in term_weights.items():
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            term_idf = self.idf(term) * weight
+            for doc_id, tf in postings.items():
+                norm = k1 * (1.0 - b + b * doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + term_idf * tf * (k1 + 1.0) / (tf + norm)
+
+        return scores
+
+    def normalized_scores(self, term_weights: Dict[str, float]) -> Dict[int, float]:
+        """BM25 scores scaled to [0, 1] so they blend with cosine similarities"""
+        scores = self.score(term_weights)
+        if not scores:
+            return scores
+        top = max(scores.values())
+        if top <= 0:
+            return {doc_id: 0.0 for doc_id in scores}
+        return {doc_id: value / top for doc_id, value in scores.items()}
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[int, float]]:
+        """Top documents for a plain keyword query"""
+        scores = self.score({term: 1.0 for term in tokenize(query)})
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+    def rebuild(self, documents: Iterable[Tuple[int, str]]):
+        """Rebuild the index from (doc_id, text) pairs"""
+        self.postings = {}
+        self.doc_lengths = {}
+        self.total_length = 0
+        for doc_id, text in documents:
+            self.add_document(doc_id, text)
@@ -0,0 +1,68 @@
+import hashlib
+
+import numpy as np
+import pytest
+
+
+class HashingEmbeddingModel:
+    """Deterministic bag-of-words embedder standing in for the sentence transformer in tests"""
+
+    dim = 32
+
+    def __init__(self):
+        self.calls = []
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, sentences, normalize_embeddings=False, batch_size=32, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        self.calls.append(len(texts))
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dim] += 1.0
+        if normalize_embeddings:
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors[0] if single else vectors
+
+
+@pytest.fixture
+def embedding_model():
+    return HashingEmbeddingModel()
+
+
+@pytest.fixture
+def rag_system_module(tmp_path, monkeypatch, embedding_model):
+    """rag_system with the shared embedding model replaced and every storage path under tmp_path"""
+    pytest.importorskip('sentence_transformers')
+    from app.agents import rag_system
+    from app.utils.config import Config
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Config, 'COLLECTIONS_DIR', str(tmp_path / 'data' / 'collections'))
+    monkeypatch.setattr(Config, 'VECTOR_STORE_DIR', str(tmp_path / 'data' / 'vectors'))
+    monkeypatch.setattr(Config, 'SNAPSHOT_DIR', str(tmp_path / 'data' / 'snapshots'))
+    monkeypatch.setattr(Config, 'DOCUMENT_SEGMENT_PATH', str(tmp_path / 'data' / 'document_content.seg'))
+    monkeypatch.setattr(Config, 'COMPACTION_MIN_TOMBSTONES', 10 ** 6)
+    monkeypatch.setattr(rag_system, '_shared_embedding_model', (embedding_model, 'hashing:test'))
+    monkeypatch.setattr(rag_system, '_shared_embedding_service', None)
+    return rag_system
+
+
+@pytest.fixture
+def store_factory(rag_system_module, monkeypatch):
+    """Build knowledge base stores with Config overrides (e.g. EMBEDDING_QUANTIZATION='int8')"""
+    from app.utils.config import Config
+
+    def create(**config):
+        for name, value in config.items():
+            monkeypatch.setattr(Config, name, value)
+        return rag_system_module.AdvancedEmbeddingStore()
+    return create
+
+
+def well_document(filename, text, facts=None, **metadata):
+    """Processed-file dict as produced by the file processor"""
+    return {'text': text, 'facts': facts or [], 'metadata': dict(metadata, filename=filename)}
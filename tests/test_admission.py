@@ -0,0 +1,71 @@
+import threading
+import time
+
+import pytest
+
+from app.utils.admission import AdmissionController, AdmissionRejected, BULK, INTERACTIVE
+from app.utils.deadline import Deadline
+
+
+def _wait_until(condition, timeout=5.0):
+    give_up_at = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < give_up_at, "timed out waiting for the queue"
+        time.sleep(0.005)
+
+
+def _queued(controller):
+    stats = controller.stats()
+    return stats[INTERACTIVE]['queued'] + stats[BULK]['queued']
+
+
+def test_users_take_turns_and_interactive_work_goes_first():
+    controller = AdmissionController(max_active=1, bulk_max_active=1)
+    order = []
+    threads = []
+
+    def run(name, user, work_class):
+        with controller.admit(user, work_class):
+            order.append(name)
+
+    with controller.admit('holder', INTERACTIVE):
+        for name, user, work_class in [('a1', 'alice', BULK), ('a2', 'alice', BULK), ('a3', 'alice', BULK),
+                                       ('b1', 'bob', BULK), ('chat', 'carol', INTERACTIVE)]:
+            thread = threading.Thread(target=run, args=(name, user, work_class))
+            thread.start()
+            threads.append(thread)
+            _wait_until(lambda: _queued(controller) == len(threads))
+    for thread in threads:
+        thread.join()
+
+    # Bob's single upload is not stuck behind all of Alice's pages
+    assert order == ['chat', 'a1', 'b1', 'a2', 'a3']
+
+
+def test_bulk_work_leaves_slots_for_interactive_queries():
+    controller = AdmissionController(max_active=2, bulk_max_active=1)
+    with controller.admit('alice', BULK):
+        with controller.admit('bob', INTERACTIVE, deadline=Deadline(1.0)):
+            assert controller.stats()[INTERACTIVE]['active'] == 1
+        with pytest.raises(AdmissionRejected, match="timed out"):
+            with controller.admit('bob', BULK, deadline=Deadline(0.05)):
+                pass
+
+
+def test_full_user_queue_is_rejected_with_a_retry_hint():
+    controller = AdmissionController(max_active=1, bulk_max_active=1, max_queue_per_user=1)
+
+    def queue_one():
+        with controller.admit('alice', BULK):
+            pass
+
+    with controller.admit('holder', BULK):
+        waiter = threading.Thread(target=queue_one)
+        waiter.start()
+        _wait_until(lambda: _queued(controller) == 1)
+        with pytest.raises(AdmissionRejected) as rejected:
+            with controller.admit('alice', BULK):
+                pass
+    waiter.join()
+    assert rejected.value.retry_after >= 1
+    assert controller.stats()[BULK]['rejected'] == 1
@@ -0,0 +1,100 @@
+import pytest
+
+from app.utils.admission import AdmissionController
+from app.utils.deadline import DeadlineExceeded
+from tests.conftest import well_document
+
+
+@pytest.fixture
+def rag_system(rag_system_module, tmp_path, monkeypatch):
+    """RAG system without agents: retrieval is real, agent answers come from answer_from_results"""
+    from app.utils.config import Config
+
+    monkeypatch.setattr(Config, 'NEAR_DUPLICATE_DETECTION', False)
+    monkeypatch.setattr(Config, 'FACT_FAST_PATH', False)
+    system = rag_system_module.AdvancedGeologicalRAGSystem.__new__(rag_system_module.AdvancedGeologicalRAGSystem)
+    system.collections = rag_system_module.EmbeddingCollections(root_dir=str(tmp_path / 'data' / 'collections'))
+    system.admission = AdmissionController(max_active=2, bulk_max_active=2)
+    system.collections.get().upsert_document(well_document(
+        "smith.pdf", "Smith 14-2 daily drilling report: drilled to 10,300 ft in the Wolfcamp shale", well='Smith 14-2'
+    ))
+    deadlines = []
+
+    def answer_from_results(query, agent_type, search_type, search_results, versions, deadline=None):
+        deadlines.append(deadline)
+        if 'slow' in query:
+            raise DeadlineExceeded("deadline reached before the agent answered")
+        return {'response': f"answer to {query}", 'cache_similarity': None, 'context_report': None}
+    system._answer_from_results = answer_from_results
+    system.deadlines = deadlines
+    return system
+
+
+def test_each_item_gets_its_own_deadline_and_slow_items_are_deferred(rag_system):
+    results = rag_system.batch_query(
+        ["Wolfcamp drilling report", "slow Wolfcamp drilling report", ("Smith drilling depth", 'data', {'bogus': ['x']})],
+        rerank=False
+    )
+
+    assert results[0]['answered_by'] == 'synthesis' and results[0]['answer'] == "answer to Wolfcamp drilling report"
+    assert results[0]['sources'][0]['source']
+    assert results[1]['answered_by'] == 'deferred' and results[1]['answer'] is None
+    assert results[2]['answered_by'] == 'error' and 'bogus' in results[2]['error']
+    assert len(rag_system.deadlines) == 2 and all(deadline is not None for deadline in rag_system.deadlines)
+    assert rag_system.deadlines[0] is not rag_system.deadlines[1]
+
+
+def test_items_turned_away_by_admission_are_rejected_with_a_retry_hint(rag_system):
+    rag_system.admission = AdmissionController(max_active=1, bulk_max_active=1, max_queue=0)
+
+    results = rag_system.batch_query(["Wolfcamp drilling report"], rerank=False)
+
+    assert results[0]['answered_by'] == 'rejected'
+    assert results[0]['retry_after'] >= 1
+
+
+def test_question_file_accepts_objects_and_bare_strings(tmp_path):
+    from app.batch_query import load_questions
+
+    path = tmp_path / 'questions.jsonl'
+    path.write_text('{"question": "Total depth of {well}?", "agent": "data"}\n\n"Spud date of {well}?"\n')
+
+    assert load_questions(str(path)) == [
+        {'question': "Total depth of {well}?", 'agent': 'data'},
+        {'question': "Spud date of {well}?"}
+    ]
+
+
+def test_question_without_text_names_its_line(tmp_path):
+    from app.batch_query import load_questions
+
+    path = tmp_path / 'questions.jsonl'
+    path.write_text('{"question": "Operator?"}\n{"agent": "data"}\n')
+
+    with pytest.raises(ValueError, match=r"questions.jsonl:2"):
+        load_questions(str(path))
+
+
+def test_questions_are_expanded_and_scoped_per_well():
+    from app.batch_query import expand_for_wells
+
+    items = [{'question': "Total depth of {well}?", 'filters': {'year': ['2019']}}]
+    expanded = expand_for_wells(items, ['Smith 14-2', 'Jones 3-10H'])
+
+    assert [item['question'] for item in expanded] == ["Total depth of Smith 14-2?", "Total depth of Jones 3-10H?"]
+    assert expanded[1]['filters'] == {'year': ['2019'], 'well': ['Jones 3-10H']}
+    assert items[0]['filters'] == {'year': ['2019']}
+
+
+def test_batched_retrieval_matches_one_search_per_question(rag_system):
+    rag_system.collections.get().upsert_document(well_document(
+        "jones.pdf", "Jones 3-10H completion report: fracture stimulated the Bone Spring sand in 40 stages"
+    ))
+    questions = ["Wolfcamp drilling depth", "Bone Spring completion stages"]
+
+    batched = rag_system.collections.batch_search(questions, limit=3)
+    single = [rag_system.collections.search(question, limit=3) for question in questions]
+
+    for batch_results, search_results in zip(batched, single):
+        assert [result['doc_id'] for result in batch_results] == [result['doc_id'] for result in search_results]
+        assert [result['score'] for result in batch_results] == pytest.approx([result['score'] for result in search_results])
@@ -0,0 +1,26 @@
+from tests.conftest import well_document
+
+
+def _county_fact(well, county):
+    return {'record_type': 'well', 'well': well, 'attribute': 'county', 'value': county,
+            'numeric': None, 'numeric_end': None, 'unit': ''}
+
+
+def test_filter_options_are_merged_across_collections(rag_system_module, tmp_path):
+    collections = rag_system_module.EmbeddingCollections(root_dir=str(tmp_path / 'data' / 'collections'))
+    collections.get('default').upsert_document(well_document(
+        "smith.pdf", "Smith 14-2 daily drilling report: drilled to 10,300 ft in the Wolfcamp shale",
+        facts=[_county_fact('Smith 14-2', 'Midland')], well='Smith 14-2'
+    ))
+    collections.get('delaware').upsert_document(well_document(
+        "jones.pdf", "Jones 3-10H completion report: fracture stimulated the Bone Spring sand in 40 stages",
+        facts=[_county_fact('Jones 3-10H', 'Reeves')], well='Jones 3-10H'
+    ))
+
+    merged = collections.filter_options()
+    assert {'smith.pdf', 'jones.pdf'} <= set(merged['filename'])
+    assert merged['county'] == ['Midland', 'Reeves']
+
+    scoped = collections.filter_options(['delaware'])
+    assert 'smith.pdf' not in scoped['filename']
+    assert scoped['county'] == ['Reeves']
@@ -0,0 +1,81 @@
+import os
+
+from tests.conftest import well_document
+
+
+def _report(index):
+    return well_document(
+        f"well_{index}.pdf",
+        f"Daily drilling report number {index} for the Smith {index}-1 well, drilled in the Wolfcamp shale"
+    )
+
+
+def _filenames(store, query="drilling report Wolfcamp"):
+    return {result['metadata']['filename'] for result in store.advanced_search(query, limit=20)}
+
+
+def test_compaction_reclaims_tombstones(store_factory):
+    store = store_factory(NEAR_DUPLICATE_DETECTION=False)
+    for index in range(4):
+        store.upsert_document(_report(index))
+    store.delete_document('well_0.pdf')
+    tombstoned = len(store.deleted)
+
+    stats = store.compact()
+
+    assert stats['tombstoned_records'] == 0
+    assert stats['records_reclaimed'] == tombstoned
+    assert stats['live_records'] == len(store.documents)
+    assert _filenames(store) == {'well_1.pdf', 'well_2.pdf', 'well_3.pdf'}
+    assert all(position < len(store.documents) for positions in store.sources.values() for position in positions)
+
+
+def test_writes_during_compaction_are_caught_up(store_factory, monkeypatch):
+    store = store_factory(NEAR_DUPLICATE_DETECTION=False)
+    for index in range(4):
+        store.upsert_document(_report(index))
+    store.delete_document('well_0.pdf')
+    copy_snapshot = store._append_compacted
+
+    def copy_then_write(state, documents, aspect_vectors, positions):
+        copy_snapshot(state, documents, aspect_vectors, positions)
+        if not state.get('written'):
+            # Runs after the snapshot copy, before the swap, without any store lock held
+            state['written'] = True
+            store.upsert_document(_report(4))
+            store.delete_document('well_1.pdf')
+    monkeypatch.setattr(store, '_append_compacted', copy_then_write)
+
+    stats = store.compact()
+
+    # The record added mid-compaction is searchable; the one deleted mid-compaction stays tombstoned
+    assert _filenames(store) == {'well_2.pdf', 'well_3.pdf', 'well_4.pdf'}
+    assert set(store.sources) == {'well_2.pdf', 'well_3.pdf', 'well_4.pdf'}
+    assert stats['tombstoned_records'] > 0
+    assert not store.metadata_index.evaluate({'filename': ['well_1.pdf']}).any()
+
+    monkeypatch.setattr(store, '_append_compacted', copy_snapshot)
+    assert store.compact()['tombstoned_records'] == 0
+    assert _filenames(store) == {'well_2.pdf', 'well_3.pdf', 'well_4.pdf'}
+
+
+def test_compaction_rewrites_the_content_segment(store_factory, tmp_path):
+    store = store_factory(
+        NEAR_DUPLICATE_DETECTION=False, DOCUMENT_CONTENT_STORAGE='segment',
+        DOCUMENT_SEGMENT_PATH=str(tmp_path / 'document_content.seg')
+    )
+    for index in range(6):
+        store.upsert_document(_report(index))
+    for index in range(3):
+        store.delete_document(f'well_{index}.pdf')
+    segment_bytes = os.path.getsize(store.content_segment.filepath)
+
+    store.compact()
+
+    assert os.path.getsize(store.content_segment.filepath) < segment_bytes
+    assert _filenames(store) == {'well_3.pdf', 'well_4.pdf', 'well_5.pdf'}
+    assert all(doc.segment is store.content_segment for doc in store.documents)
+    assert all('Wolfcamp' in doc.content for doc in store.documents)
+
+    store.save_embeddings(str(tmp_path / 'store.pkl'))
+    assert sorted(os.listdir(tmp_path)) == sorted([os.path.basename(store.content_segment.filepath), 'store.pkl'])
@@ -0,0 +1,41 @@
+import pytest
+
+from app.utils.conversation_memory import ConversationMemory
+
+
+@pytest.fixture
+def memory():
+    memory = ConversationMemory()
+    memory.add_turn("What is the total depth of Smith 14-2?", "Smith 14-2 reached 10,300 ft.")
+    return memory
+
+
+@pytest.mark.parametrize('query', [
+    "and its spud date?",
+    "What about the Wolfcamp there?",
+    "Is that well deviated or vertical?",
+    "Who logged it and which curves were run?",
+    "Compare the perforations in those wells with the offset data",
+    "What is the depth of that?",
+    "Show the same interval for the other well",
+    "Operator?",
+])
+def test_anaphoric_questions_are_follow_ups(memory, query):
+    assert memory.is_follow_up(query)
+
+
+@pytest.mark.parametrize('query', [
+    "List all wells that penetrate the Wolfcamp",
+    "Which wells have perforations that overlap 7,000 to 7,500 ft in Midland County?",
+    "Is there any gas show reported in the Bone Spring for Jones 3-10H?",
+    "Are there core intervals in the Spraberry for Smith 14-2 and Jones 3-10H?",
+    "Summarize this month's completion reports for the Delaware Basin wells",
+    "porosity of Smith 14-2?",
+    "Operator of Jones 3-10H?",
+])
+def test_standalone_questions_are_not_follow_ups(memory, query):
+    assert not memory.is_follow_up(query)
+
+
+def test_nothing_is_a_follow_up_without_earlier_turns():
+    assert not ConversationMemory().is_follow_up("and its spud date?")
@@ -0,0 +1,119 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+pytest.importorskip('sentence_transformers')
+from app.utils.embedding_service import EmbeddingService
+
+
+class SlowModel:
+    """Model whose encode time grows with the number of texts, recording every call"""
+
+    def __init__(self, seconds_per_text=0.002):
+        self.seconds_per_text = seconds_per_text
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def get_sentence_embedding_dimension(self):
+        return 4
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        with self.lock:
+            self.calls.append(list(texts))
+        time.sleep(self.seconds_per_text * len(texts))
+        return np.array([[float(text.split()[-1]), 1.0, 0.0, 0.0] for text in texts], dtype=np.float32)
+
+
+def test_small_requests_are_coalesced():
+    model = SlowModel(0)
+    service = EmbeddingService(model, max_batch_size=64, batch_window_ms=50)
+    results = {}
+
+    def encode(index):
+        results[index] = service.encode(f"query {index}")
+
+    threads = [threading.Thread(target=encode, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(results[index][0] == index for index in range(8))
+    assert len(model.calls) < 8
+
+
+def test_large_request_is_encoded_in_chunks_in_order():
+    model = SlowModel(0)
+    service = EmbeddingService(model, max_batch_size=16, batch_window_ms=1)
+
+    vectors = service.encode([f"chunk {index}" for index in range(100)], normalize_embeddings=True)
+
+    assert vectors.shape == (100, 4)
+    assert max(len(call) for call in model.calls) <= 16
+    expected = np.array([[index, 1.0, 0.0, 0.0] for index in range(100)], dtype=np.float32)
+    expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+    assert np.allclose(vectors, expected)
+
+
+def test_query_is_served_between_chunks_of_an_ingestion_request():
+    model = SlowModel(0.002)
+    service = EmbeddingService(model, max_batch_size=32, batch_window_ms=1)
+    finished = {}
+
+    def ingest():
+        service.encode([f"page {index}" for index in range(1000)])
+        finished['ingest'] = time.monotonic()
+
+    ingestion = threading.Thread(target=ingest)
+    ingestion.start()
+    time.sleep(0.1)
+    start = time.monotonic()
+    service.encode("query 7")
+    finished['query'] = time.monotonic()
+    ingestion.join()
+
+    # The whole document takes about 2 s; the query only waits for the chunk being encoded
+    assert finished['query'] - start < 0.5
+    assert finished['query'] < finished['ingest']
+
+
+def test_model_errors_fail_only_their_request():
+    class FailingModel(SlowModel):
+        def encode(self, texts, batch_size=32, **kwargs):
+            if any('bad' in text for text in texts):
+                raise RuntimeError("encode failed")
+            return super().encode(texts, batch_size)
+
+    service = EmbeddingService(FailingModel(0), max_batch_size=8, batch_window_ms=1)
+    with pytest.raises(RuntimeError):
+        service.encode([f"text {index}" for index in range(20)] + ["bad 1"])
+    assert service.encode("query 3")[0] == 3
+
+
+def test_poisoned_request_fails_alone_within_a_coalesced_batch():
+    class PoisonModel(SlowModel):
+        def encode(self, texts, batch_size=32, **kwargs):
+            if any('poison' in text for text in texts):
+                raise RuntimeError("encode failed")
+            return super().encode(texts, batch_size)
+
+    service = EmbeddingService(PoisonModel(0), max_batch_size=64, batch_window_ms=50)
+    results, errors = {}, {}
+
+    def encode(index):
+        text = "poison 4" if index == 4 else f"query {index}"
+        try:
+            results[index] = service.encode(text)
+        except RuntimeError as e:
+            errors[index] = e
+
+    threads = [threading.Thread(target=encode, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert set(errors) == {4}
+    assert all(results[index][0] == index for index in range(8) if index != 4)
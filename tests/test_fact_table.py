@@ -0,0 +1,81 @@
+import pytest
+
+from app.utils.fact_table import FactTable, normalize_fact_records
+
+
+@pytest.fixture
+def table():
+    table = FactTable()
+    table.add_records('smith.pdf', normalize_fact_records({
+        'wells': [{'well_name': 'Smith 14-2', 'api_number': '42-329-41234', 'operator': 'Permian Resources',
+                   'field': 'Spraberry Trend', 'county': 'Midland', 'state': 'TX', 'total_depth_ft': 10400,
+                   'latitude': 31.95, 'longitude': -102.08}],
+        'formation_tops': [{'well_name': 'Smith 14-2', 'formation': 'Wolfcamp', 'top_depth_ft': 9850,
+                            'base_depth_ft': 10390}],
+        'dates': [{'well_name': 'Smith 14-2', 'event': 'spud', 'date': '2019-05-12'}],
+        'intervals': [{'well_name': 'Smith 14-2', 'kind': 'perforation', 'name': 'Wolfcamp A',
+                       'top_depth_ft': 10250, 'base_depth_ft': 10300}],
+    }))
+    table.add_records('jones.pdf', normalize_fact_records({
+        'wells': [{'well_name': 'Jones 3-10H', 'api_number': '42-389-35678', 'operator': 'Delaware Energy',
+                   'county': 'Reeves', 'state': 'TX', 'latitude': 31.40, 'longitude': -103.50}],
+        'intervals': [{'well_name': 'Jones 3-10H', 'kind': 'perforation', 'name': 'Bone Spring',
+                       'top_depth_ft': 7100, 'base_depth_ft': 7400}],
+    }))
+    return table
+
+
+def _attributes(table, match):
+    return {row['attribute'] for row in table.rows(match[1])}
+
+
+@pytest.mark.parametrize('query, attribute', [
+    ("What is the API number of Smith 14-2?", 'api_number'),
+    ("Who is the operator of Smith 14-2?", 'operator'),
+    ("What state is Smith 14-2 in?", 'state'),
+    ("What field is Smith 14-2 in?", 'field'),
+    ("What is the total depth of Smith 14-2?", 'total_depth'),
+    ("Spud date for Smith 14-2", 'spud_date'),
+    ("Formation tops for Smith 14-2", 'formation_top'),
+    ("Which wells have perforations between 7,000 and 7,500 ft?", 'perforation_interval'),
+    ("Which well has API 42-389-35678?", 'api_number'),
+    ("Which wells are in Midland County?", 'county'),
+    ("Which wells are within 5 km of Smith 14-2?", 'location'),
+])
+def test_lookup_questions_are_answered_from_the_table(table, query, attribute):
+    match = table.match_query(query)
+    assert match is not None and match[1]
+    assert _attributes(table, match) == {attribute}
+
+
+@pytest.mark.parametrize('query', [
+    "What is the oil API gravity in Smith 14-2?",
+    "What is the state of the casing in Smith 14-2?",
+    "Describe the operator strategy for Smith 14-2",
+    "Discuss the Wolfcamp formation in Smith 14-2 and its reservoir properties",
+    "Tell me about Smith 14-2",
+    "What is the significance of the Wolfcamp top in Smith 14-2?",
+    "What mud weight was used at total depth in Smith 14-2?",
+    "List all wells that penetrate the Wolfcamp with good porosity",
+    "Why was Smith 14-2 perforated at 10,250 ft?",
+])
+def test_other_questions_go_to_the_agents(table, query):
+    assert table.match_query(query) is None
+
+
+def test_perforation_depth_range_returns_only_overlapping_wells(table):
+    match = table.match_query("Which wells have perforations between 7,000 and 7,500 ft?")
+    assert {row['well'] for row in table.rows(match[1])} == {'Jones 3-10H'}
+
+
+def test_query_structures_are_built_once_per_table_version(table):
+    grams = table.key_grams()
+    assert table.match_query("Who is the operator of Jones 3-10H?")
+    assert table.key_grams() is grams
+    assert table.keys(table.by_well) is table.keys(table.by_well)
+
+    table.remove_source('jones.pdf')
+    assert table.key_grams() is not grams
+    assert 'jones 3-10h' not in table.keys(table.by_well)
+    assert table.match_query("Who is the operator of Jones 3-10H?") is None
+    assert _attributes(table, table.match_query("Who is the operator of Smith 14-2?")) == {'operator'}
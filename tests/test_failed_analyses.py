@@ -0,0 +1,35 @@
+from tests.conftest import well_document
+
+RAW_REPORT = (
+    "Smith 14-2 daily drilling report. Drilled 8-3/4 in hole to 10,300 ft in the Wolfcamp shale. "
+    "Perforated 10,250 to 10,300 ft and fracture stimulated in 12 stages."
+)
+
+
+def _chunk_types(store):
+    return [doc.metadata['chunk_type'] for doc in store.documents if doc.doc_id not in store.deleted]
+
+
+def test_failed_analysis_indexes_only_the_source_text(store_factory):
+    store = store_factory(NEAR_DUPLICATE_DETECTION=False, INDEX_SOURCE_CHUNKS=True)
+    failed = dict(well_document("smith.pdf", "", analysis_failed=True), raw_text=RAW_REPORT)
+
+    assert store.upsert_document(failed) == 'added'
+    assert _chunk_types(store) == ['raw_text']
+    assert all(doc.metadata['analysis_failed'] for doc in store.documents)
+    assert store.metadata_index.count_matching({'chunk_type': 'synthesis'}) == 0
+
+
+def test_failed_analysis_without_source_text_is_skipped(store_factory):
+    store = store_factory(NEAR_DUPLICATE_DETECTION=False)
+    assert store.upsert_document(well_document("core_photo.png", "", analysis_failed=True)) == 'skipped'
+    assert not store.documents
+
+
+def test_successful_reanalysis_replaces_the_source_only_version(store_factory):
+    store = store_factory(NEAR_DUPLICATE_DETECTION=False, INDEX_SOURCE_CHUNKS=True)
+    store.upsert_document(dict(well_document("smith.pdf", "", analysis_failed=True), raw_text=RAW_REPORT))
+    synthesis = "Smith 14-2 reached 10,300 ft; the Wolfcamp A was perforated and stimulated in 12 stages."
+
+    assert store.upsert_document(dict(well_document("smith.pdf", synthesis), raw_text=RAW_REPORT)) == 'replaced'
+    assert _chunk_types(store) == ['synthesis', 'raw_text']
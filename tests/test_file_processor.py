@@ -0,0 +1,84 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('fitz')
+pytest.importorskip('pymupdf4llm')
+from app.processors.file_processor import PureLLMFileProcessor
+from app.utils.admission import AdmissionController, BULK
+
+
+class FakeGateway:
+    def create_completion(self, deadline=None, **kwargs):
+        message = SimpleNamespace(content="Smith 14-2 was drilled to 10,300 ft in the Wolfcamp.")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def _processor(admission):
+    processor = PureLLMFileProcessor.__new__(PureLLMFileProcessor)
+    processor.llm_gateway = FakeGateway()
+    processor.text_model = processor.vision_model = 'test-model'
+    processor.admission = admission
+    processor.duplicate_checker = None
+    processor._ingest = threading.local()
+    processor.supported_formats = {'txt': processor.process_text_with_llm}
+    return processor
+
+
+def _upload(name, content):
+    return SimpleNamespace(name=name, size=len(content), read=lambda: content)
+
+
+def test_each_llm_stage_is_admitted_as_bulk_work_for_the_user():
+    admission = AdmissionController(max_active=2, bulk_max_active=1)
+    result = _processor(admission).process_file(_upload("smith.txt", b"Smith 14-2 daily drilling report"), user='alice')
+
+    assert not result['metadata'].get('error')
+    assert not result['metadata'].get('partial')
+    assert 'Wolfcamp' in result['text']
+    assert admission.stats()[BULK]['admitted'] == 1
+
+
+def test_file_whose_stages_are_all_turned_away_is_rejected_with_a_retry_hint():
+    admission = AdmissionController(max_active=1, bulk_max_active=1, max_queue=0)
+    result = _processor(admission).process_file(_upload("smith.txt", b"Smith 14-2 daily drilling report"), user='alice')
+
+    assert result['metadata']['error']
+    assert result['metadata']['retry_after'] >= 1
+
+
+class FailingGateway:
+    def create_completion(self, deadline=None, **kwargs):
+        raise RuntimeError("model overloaded")
+
+
+def test_failed_analysis_is_flagged_and_not_returned_as_text():
+    processor = _processor(AdmissionController(max_active=2, bulk_max_active=1))
+    processor.llm_gateway = FailingGateway()
+    result = processor.process_file(_upload("smith.txt", b"Smith 14-2 daily drilling report"), user='alice')
+
+    assert result['metadata']['analysis_failed']
+    assert result['text'] == ''
+    assert result['raw_text'] == "Smith 14-2 daily drilling report"
+
+
+def test_synthesis_skips_failed_analyses_and_returns_none_when_nothing_succeeded():
+    processor = _processor(AdmissionController(max_active=2, bulk_max_active=1))
+    prompts = []
+
+    class RecordingGateway(FakeGateway):
+        def create_completion(self, deadline=None, **kwargs):
+            prompts.append(kwargs['messages'][0]['content'])
+            return super().create_completion(deadline, **kwargs)
+
+    processor.llm_gateway = RecordingGateway()
+    failed_page = {'page': 2, 'analysis': "Advanced vision analysis failed: timeout", 'success': False}
+    good_page = {'page': 1, 'analysis': "Gamma ray log over the Wolfcamp", 'success': True}
+    stopped_text = {'analysis': "LLM text analysis stopped: deadline", 'success': False, 'timed_out': True}
+
+    assert processor.synthesize_multimodal_analysis(stopped_text, [good_page, failed_page], "smith.pdf")
+    assert "Gamma ray log" in prompts[0]
+    assert "failed: timeout" not in prompts[0] and "stopped: deadline" not in prompts[0]
+    assert processor.synthesize_multimodal_analysis(stopped_text, [failed_page], "smith.pdf") is None
+    assert len(prompts) == 1
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from app.utils.interval_index import DepthIntervalIndex, parse_las_curve_ranges
+
+
+def _random_intervals(count=500, seed=0):
+    rng = np.random.default_rng(seed)
+    starts = rng.uniform(0, 15000, count)
+    # Mostly thin intervals with a few very long ones, which widen every query's slice
+    ends = starts + np.where(rng.random(count) < 0.02, rng.uniform(2000, 8000, count), rng.uniform(0, 300, count))
+    return starts, ends
+
+
+@pytest.mark.parametrize('low, high', [(7000, 7500), (0, 50), (14900, 20000), (9000, 9000), (-100, -10)])
+def test_overlapping_matches_brute_force(low, high):
+    starts, ends = _random_intervals()
+    index = DepthIntervalIndex(starts, ends, list(range(len(starts))))
+
+    expected = {row for row in range(len(starts)) if starts[row] <= high and ends[row] >= low}
+    assert set(index.overlapping(low, high).tolist()) == expected
+
+
+def test_containing_includes_interval_boundaries():
+    index = DepthIntervalIndex([7000, 7400, 9000], [7400, 7800, 9000], [10, 11, 12])
+
+    assert sorted(index.containing(7400).tolist()) == [10, 11]
+    assert index.containing(9000).tolist() == [12]
+    assert index.containing(8000).tolist() == []
+
+
+def test_empty_index():
+    index = DepthIntervalIndex([], [], [])
+    assert len(index) == 0
+    assert index.overlapping(0, 10000).tolist() == []
+
+
+def test_one_long_interval_does_not_widen_every_query():
+    # 1,000 ten-foot intervals every 15 ft, plus one formation running from surface to TD
+    starts = [15.0 * row for row in range(1000)] + [0.0]
+    ends = [15.0 * row + 10 for row in range(1000)] + [15000.0]
+    index = DepthIntervalIndex(starts, ends, list(range(1001)))
+
+    assert sorted(index.overlapping(7000, 7100).tolist()) == list(range(466, 474)) + [1000]
+    # The overlapping rows plus at most one neighbour per bucket edge, not every interval above 7,100 ft
+    assert index.candidates_examined(7000, 7100) <= 11
+
+
+LAS = """~Version Information
+ VERS.   2.0 : CWLS LOG ASCII STANDARD
+ WRAP.   NO  : One line per depth step
+~Well Information
+ WELL.   SMITH 14-2 : WELL NAME
+ NULL.   -999.25 : NULL VALUE
+~Curve Information
+ DEPT.FT          : Depth
+ GR  .GAPI        : Gamma ray
+ RHOB.G/C3        : Bulk density
+~A
+ 7000.0  85.0  -999.25
+ 7000.5  86.0  2.45
+ 7001.0  -999.25  2.47
+ 7001.5  90.0  -999.25
+"""
+
+
+def test_las_curve_ranges_skip_null_samples():
+    ranges = {curve['curve']: curve for curve in parse_las_curve_ranges(LAS)}
+
+    assert ranges['GR']['top'] == 7000.0 and ranges['GR']['base'] == 7001.5
+    assert ranges['RHOB']['top'] == 7000.5 and ranges['RHOB']['base'] == 7001.0
+    assert ranges['GR']['well'] == 'SMITH 14-2' and ranges['GR']['unit'] == 'GAPI'
+
+
+def test_las_metric_depths_are_converted_to_feet():
+    metric = LAS.replace(" DEPT.FT ", " DEPT.M  ").replace("7000.", "1000.").replace("7001.", "1001.")
+    ranges = {curve['curve']: curve for curve in parse_las_curve_ranges(metric)}
+
+    assert ranges['GR']['top'] == pytest.approx(1000 * 3.28084)
+
+
+def test_las_without_data_section_has_no_ranges():
+    assert parse_las_curve_ranges(LAS.split("~A")[0]) == []
@@ -0,0 +1,68 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('groq')
+from app.utils.deadline import Deadline, DeadlineExceeded
+from app.utils.llm_gateway import LLMGateway
+
+
+class FakeClient:
+    """Records the options each call is made with"""
+
+    def __init__(self, error=None, delay=0.0, **options):
+        self.options = options
+        self.error = error
+        self.delay = delay
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def with_options(self, **options):
+        client = FakeClient(self.error, self.delay, **options)
+        client.requests = self.requests
+        return client
+
+    def create(self, **kwargs):
+        self.requests.append((self.options, kwargs))
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return SimpleNamespace(choices=[])
+
+
+@pytest.fixture
+def gateway():
+    gateway = LLMGateway('test-key', max_concurrent=2)
+    gateway.client = FakeClient()
+    return gateway
+
+
+def test_call_with_deadline_is_made_once_within_the_remaining_time(gateway):
+    gateway.create_completion(deadline=Deadline(5.0), model='m', messages=[])
+
+    options, kwargs = gateway.client.requests[0]
+    assert options['max_retries'] == 0
+    assert 4.0 < options['timeout'] <= 5.0
+    assert 'timeout' not in kwargs
+
+
+def test_call_without_deadline_keeps_the_client_defaults(gateway):
+    gateway.create_completion(model='m', messages=[])
+
+    assert gateway.client.requests[0][0] == {}
+
+
+def test_failure_after_the_deadline_is_reported_as_deadline_exceeded(gateway):
+    gateway.client = FakeClient(error=TimeoutError("read timed out"), delay=0.1)
+
+    with pytest.raises(DeadlineExceeded):
+        gateway.create_completion(deadline=Deadline(0.05), model='m', messages=[])
+    assert gateway.stats()['in_flight'] == 0
+
+
+def test_sdk_client_accepts_the_deadline_options():
+    gateway = LLMGateway('test-key')
+    client = gateway.client.with_options(max_retries=0, timeout=1.5)
+    assert client.max_retries == 0
+    assert client.timeout == 1.5
@@ -0,0 +1,47 @@
+import pytest
+
+from app.utils.near_duplicates import NearDuplicateIndex
+from tests.conftest import well_document
+
+REPORT = (
+    "Smith 14-2 daily drilling report. Spudded 2019-05-12 and drilled 8-3/4 in hole to 10,300 ft. "
+    "Perforated the Wolfcamp A from 10,250 to 10,300 ft and fracture stimulated in 12 stages. "
+    "Initial potential 850 BOPD, 1,200 MCFD and 400 BWPD on a 24/64 choke. Operator: Permian Resources."
+)
+
+
+def test_near_duplicate_text_matches_and_distinct_text_does_not():
+    index = NearDuplicateIndex(threshold=0.8)
+    index.add('smith.pdf', index.signature(REPORT))
+
+    assert index.query(index.signature(REPORT + " Page 1."))[0] == 'smith.pdf'
+    assert index.query(index.signature("Jones 3-10H completion in the Bone Spring, 40 stages")) is None
+    assert index.query(index.signature(REPORT), exclude='smith.pdf') is None
+
+
+def test_deleting_a_canonical_source_reports_and_drops_its_duplicates(store_factory):
+    store = store_factory(NEAR_DUPLICATE_DETECTION=True)
+    assert store.upsert_document(dict(well_document("smith.pdf", REPORT), raw_text=REPORT)) == 'added'
+    copy = dict(well_document("smith_copy.pdf", REPORT + " Rescanned copy."), raw_text=REPORT + " Rescanned copy.")
+    assert store.upsert_document(copy) == 'duplicate'
+
+    assert store.duplicates_of('smith.pdf') == ['smith_copy.pdf']
+    assert store.find_near_duplicate(REPORT, 'other.pdf')[0] == 'smith.pdf'
+
+    store.delete_document('smith.pdf')
+    assert store.duplicates_of('smith.pdf') == []
+    assert store.compaction_stats()['near_duplicates_linked'] == 0
+    assert store.find_near_duplicate(REPORT, 'other.pdf') is None
+
+
+def test_tabular_files_are_signed_with_the_text_they_are_indexed_with(monkeypatch):
+    pytest.importorskip('fitz')
+    pytest.importorskip('pymupdf4llm')
+    from app.processors.file_processor import PureLLMFileProcessor
+
+    processor = PureLLMFileProcessor.__new__(PureLLMFileProcessor)
+    monkeypatch.setattr(processor, 'llm_text_analysis', lambda *args, **kwargs: {'analysis': 'summary'}, raising=False)
+    csv_bytes = b"well,top_ft,formation\nSmith 14-2,10250,Wolfcamp A\nJones 3-10H,9800,Bone Spring\n"
+
+    raw_text = processor.extract_raw_text(csv_bytes, 'csv', 'tops.csv')
+    assert raw_text and raw_text == processor.process_csv_with_llm(csv_bytes, 'tops.csv')['raw_data']
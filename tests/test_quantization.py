@@ -0,0 +1,104 @@
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from app.utils.quantization import QuantizedVectorMatrix, quantize_int8, int8_scores
+
+
+def _unit_rows(count, dim=16, seed=0):
+    rows = np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+def _matrix(tmp_path, mode='int8', rows=()):
+    matrix = QuantizedVectorMatrix(mode, str(tmp_path / 'vectors' / 'full_text.f32'))
+    for row in rows:
+        matrix.append(row)
+    return matrix
+
+
+def test_int8_scores_approximate_dot_products():
+    rows = _unit_rows(50)
+    codes, scales = quantize_int8(rows)
+    query = rows[3]
+    assert np.allclose(int8_scores(codes, scales, query), rows @ query, atol=0.02)
+
+
+@pytest.mark.parametrize('mode', ['int8', 'binary'])
+def test_exact_rescoring_reads_float_rows(tmp_path, mode):
+    rows = _unit_rows(20)
+    matrix = _matrix(tmp_path, mode, rows)
+    positions = np.arange(20)
+
+    assert np.allclose(matrix.exact_similarities(rows[5], positions), rows @ rows[5], atol=1e-6)
+    assert np.argmax(matrix.similarities(rows[5])) == 5
+
+
+def test_missing_rows_are_backfilled_and_zero_scored(tmp_path):
+    rows = _unit_rows(3)
+    matrix = _matrix(tmp_path, rows=[None, rows[0], None, rows[1]])
+
+    assert matrix.rows(np.arange(4))[0] is None
+    assert np.allclose(matrix.rows(np.arange(4))[1], rows[0])
+    assert matrix.exact_similarities(rows[1], np.arange(4))[2] == 0.0
+    assert os.path.getsize(matrix.float_path) == 4 * 16 * 4
+
+
+def test_rows_appended_after_a_crash_are_overwritten_in_place(tmp_path):
+    rows = _unit_rows(8)
+    matrix = _matrix(tmp_path, rows=rows[:4])
+    saved = pickle.dumps(matrix)
+
+    # Rows written after the last save, then the process dies
+    matrix.append(rows[4])
+    matrix.append(rows[5])
+    matrix.close()
+
+    reloaded = pickle.loads(saved)
+    assert reloaded.float_rows_valid
+    reloaded.append(rows[6])
+
+    assert reloaded.count == 5
+    assert np.allclose(reloaded.rows([4])[0], rows[6])
+    assert os.path.getsize(reloaded.float_path) == 5 * 16 * 4
+    assert np.allclose(reloaded.exact_similarities(rows[6], np.arange(5)), rows[[0, 1, 2, 3, 6]] @ rows[6], atol=1e-6)
+
+
+def test_short_float_file_falls_back_to_quantized_scores(tmp_path):
+    rows = _unit_rows(6)
+    matrix = _matrix(tmp_path, rows=rows)
+    saved = pickle.dumps(matrix)
+    matrix.close()
+    with open(matrix.float_path, 'r+b') as f:
+        f.truncate(2 * 16 * 4)
+
+    reloaded = pickle.loads(saved)
+    assert not reloaded.float_rows_valid
+    scores = reloaded.exact_similarities(rows[4], np.arange(6))
+    assert np.argmax(scores) == 4
+    assert np.allclose(reloaded.rows([4])[0], rows[4], atol=0.02)
+
+
+def test_compaction_files_are_removed_once_the_store_is_saved(store_factory, tmp_path):
+    from tests.conftest import well_document
+
+    store = store_factory(EMBEDDING_QUANTIZATION='int8', NEAR_DUPLICATE_DETECTION=False)
+    for index in range(4):
+        store.upsert_document(well_document(
+            f"well_{index}.pdf", f"Daily drilling report number {index} for the Smith {index}-1 well in the Wolfcamp"
+        ))
+    store.delete_document('well_0.pdf')
+    vector_dir = tmp_path / 'data' / 'vectors'
+
+    for _ in range(2):
+        store.compact()
+        store.save_embeddings(str(tmp_path / 'data' / 'store.pkl'))
+        current = {os.path.basename(matrix.float_path) for matrix in store.aspect_vectors.values()}
+        # Aspects that never received a vector have no file yet
+        assert os.listdir(vector_dir) and set(os.listdir(vector_dir)) <= current
+        store.delete_document(f"well_{_ + 1}.pdf")
+
+    results = store.advanced_search("drilling report Wolfcamp", limit=5)
+    assert {result['metadata']['filename'] for result in results} == {'well_3.pdf'}
@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+from app.utils.snapshots import current_snapshot, file_checksum, prune_snapshots, publish_snapshot, read_manifest
+from tests.conftest import well_document
+
+
+def _stage(root, version, content=b'payload'):
+    staging_dir = os.path.join(root, f".staging-{version}")
+    os.makedirs(os.path.join(staging_dir, 'vectors'))
+    with open(os.path.join(staging_dir, 'vectors', 'full_text.npy'), 'wb') as f:
+        f.write(content)
+    return staging_dir
+
+
+def test_published_snapshot_verifies_and_becomes_current(tmp_path):
+    root = str(tmp_path)
+    snapshot_dir = publish_snapshot(root, _stage(root, 'v1'), 'v1', {'document_count': 0})
+
+    manifest = read_manifest(snapshot_dir)
+    assert current_snapshot(root) == snapshot_dir
+    assert manifest['version'] == 'v1'
+    assert manifest['files'] == {
+        os.path.join('vectors', 'full_text.npy'): file_checksum(os.path.join(snapshot_dir, 'vectors', 'full_text.npy'))
+    }
+
+
+def test_corrupted_file_is_rejected(tmp_path):
+    root = str(tmp_path)
+    snapshot_dir = publish_snapshot(root, _stage(root, 'v1'), 'v1', {'document_count': 0})
+    with open(os.path.join(snapshot_dir, 'vectors', 'full_text.npy'), 'r+b') as f:
+        f.write(b'X')
+
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        read_manifest(snapshot_dir)
+    read_manifest(snapshot_dir, verify=False)
+
+
+def test_prune_keeps_newest_and_current(tmp_path):
+    root = str(tmp_path)
+    for version in ('v1', 'v2', 'v3'):
+        publish_snapshot(root, _stage(root, version), version, {'document_count': 0})
+
+    prune_snapshots(root, keep=1)
+
+    assert sorted(entry for entry in os.listdir(root) if not entry.startswith(('.', 'CURRENT'))) == ['v3']
+
+
+def test_replica_keeps_serving_previous_snapshot_after_a_corrupt_one(store_factory, tmp_path):
+    from app.utils.snapshots import SnapshotFollower
+
+    primary = store_factory(NEAR_DUPLICATE_DETECTION=False)
+    primary.upsert_document(well_document(
+        "smith.pdf", "Smith 14-2 daily drilling report: drilled to 10,300 ft in the Wolfcamp shale"
+    ))
+    root = str(tmp_path / 'snapshots')
+    os.makedirs(root)
+    first = primary.export_snapshot(root)
+
+    replica = store_factory()
+    follower = SnapshotFollower(root, replica.load_snapshot, poll_seconds=3600)
+    try:
+        assert follower.loaded_snapshot == first
+        assert replica.snapshot_version == os.path.basename(first)
+
+        primary.upsert_document(well_document(
+            "jones.pdf", "Jones 3-10H completion report: fracture stimulated the Bone Spring sand in 40 stages"
+        ))
+        second = primary.export_snapshot(root)
+        with open(os.path.join(second, 'documents.seg'), 'r+b') as f:
+            f.write(b'corrupt')
+        follower.poll()
+
+        assert follower.loaded_snapshot == first
+        assert "Checksum mismatch" in follower.last_error
+        assert {result['metadata']['filename'] for result in replica.advanced_search("drilling report", limit=5)} == {'smith.pdf'}
+    finally:
+        follower.stop()
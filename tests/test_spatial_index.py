@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from app.utils.spatial_index import (
+    WellLocationIndex, haversine_km, normalize_plss, parse_coordinates, parse_proximity, plss_township
+)
+
+
+def _random_wells(count=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(31.0, 33.0, count), rng.uniform(-104.0, -101.0, count)
+
+
+@pytest.mark.parametrize('radius_km', [0.5, 5.0, 25.0, 500.0])
+def test_radius_query_matches_brute_force(radius_km):
+    latitudes, longitudes = _random_wells()
+    index = WellLocationIndex(latitudes, longitudes, list(range(len(latitudes))), cell_km=10.0)
+    origin = (31.95, -102.08)
+
+    distances = haversine_km(*origin, latitudes, longitudes)
+    expected = sorted(np.flatnonzero(distances <= radius_km).tolist(), key=lambda row: distances[row])
+    found = index.within(*origin, radius_km)
+
+    assert [key for key, _ in found] == expected
+    assert all(distance <= radius_km for _, distance in found)
+
+
+def test_haversine_distance_of_one_degree_of_latitude():
+    assert haversine_km(31.0, -102.0, np.array([32.0]), np.array([-102.0]))[0] == pytest.approx(111.2, abs=0.2)
+
+
+def test_empty_index_and_negative_radius():
+    assert WellLocationIndex([], [], []).within(31.9, -102.0, 10.0) == []
+    assert WellLocationIndex([31.9], [-102.0], ['a']).within(31.9, -102.0, -1.0) == []
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("31.9521, -102.0783", (31.9521, -102.0783)),
+    ("lat 31.95 long -102.08", (31.95, -102.08)),
+    ("31.9521 N 102.0783 W", (31.9521, -102.0783)),
+    ("31°57'07.6\"N 102°04'41.9\"W", (31 + 57 / 60 + 7.6 / 3600, -(102 + 4 / 60 + 41.9 / 3600))),
+])
+def test_parse_coordinates(text, expected):
+    assert parse_coordinates(text) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('text', ["Smith 14-2", "Sec 2 3", "depth 7000, 7500", "95.0, 200.0"])
+def test_well_numbers_and_out_of_range_pairs_are_not_coordinates(text):
+    assert parse_coordinates(text) is None
+
+
+def test_parse_proximity_converts_miles():
+    assert parse_proximity("Which wells are within 5 km of Smith 14-2?") == (5.0, "Smith 14-2")
+    radius, reference = parse_proximity("wells 3 miles from 31.95, -102.08")
+    assert radius == pytest.approx(3 * 1.609344) and reference == "31.95, -102.08"
+    assert parse_proximity("What is the total depth of Smith 14-2?") is None
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("Sec 14, T2S, R3W", "Sec 14 T2S R3W"),
+    ("Section 14 Township 2 South Range 3 West", "Sec 14 T2S R3W"),
+    ("T12N-R45E", "T12N R45E"),
+    ("Block 33, T&P RR Co Survey", ""),
+])
+def test_normalize_plss(text, expected):
+    assert normalize_plss(text) == expected
+
+
+def test_plss_township_ignores_the_section():
+    assert plss_township("Sec 14, T2S, R3W") == "T2S R3W"
+
+
+def test_location_filters_scope_retrieval_to_nearby_wells(store_factory):
+    from app.utils.fact_table import normalize_fact_records
+    from tests.conftest import well_document
+
+    store = store_factory(NEAR_DUPLICATE_DETECTION=False)
+    for filename, well, county, latitude, longitude in [
+        ("smith.pdf", "Smith 14-2", "Midland", 31.95, -102.08),
+        ("brown.pdf", "Brown 7-1", "Midland", 31.97, -102.05),
+        ("jones.pdf", "Jones 3-10H", "Reeves", 31.40, -103.50),
+    ]:
+        facts = normalize_fact_records({'wells': [
+            {'well_name': well, 'county': county, 'latitude': latitude, 'longitude': longitude}
+        ]})
+        store.upsert_document(well_document(
+            filename, f"{well} daily drilling report: drilled and cased through the Wolfcamp shale", facts
+        ))
+
+    def filenames(filters):
+        return {result['metadata']['filename'] for result in store.advanced_search("drilling report", 10, filters=filters)}
+
+    assert filenames({'near': "5 km of Smith 14-2"}) == {'smith.pdf', 'brown.pdf'}
+    assert filenames({'near': "1 km of Smith 14-2"}) == {'smith.pdf'}
+    assert filenames({'county': ["Reeves County"]}) == {'jones.pdf'}
+    assert filenames({'near': "5 km of Unknown 1-1"}) == set()
@@ -0,0 +1,49 @@
+import pytest
+
+from app.utils.text_index import BM25Index, expand_query, tokenize
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("Perforated 10,250-10,300 ft", ['10250', '10300', 'ft', 'perforated']),
+    ("from 7000-7500 ft", ['7000', '7500', 'ft']),
+    ("drilled 2019-05-12", ['2019-05-12', '2019', 'drilled']),
+    ("Smith 14-2", ['14-2', 'smith']),
+    ("Jones 3-10H", ['3-10h', 'jones']),
+    ("API 42-123-45678", ['4212345678', 'api']),
+    ("top at 7,250.0 feet", ['top', '7250', 'ft']),
+])
+def test_tokenize(text, expected):
+    assert sorted(tokenize(text)) == sorted(expected)
+
+
+def test_depth_range_does_not_produce_well_numbers():
+    tokens = tokenize("Perforations 10,250-10,300 ft and 10,400-10,450 ft")
+    assert not any('-' in token for token in tokens)
+
+
+def test_bm25_ranks_matching_document_first():
+    index = BM25Index()
+    index.add_document(0, "Smith 14-2 perforated 10,250-10,300 ft in the Wolfcamp")
+    index.add_document(1, "Jones 3-10H spudded 2019-05-12")
+    index.add_document(2, "General notes about the basin")
+
+    assert index.search("perforations 10,250 ft")[0][0] == 0
+    assert index.search("spud date 2019-05-12")[0][0] == 1
+    assert index.search("Jones 3-10H")[0][0] == 1
+
+
+def test_bm25_remove_document():
+    index = BM25Index()
+    index.add_document(0, "Wolfcamp shale")
+    index.add_document(1, "Spraberry sand")
+    index.remove_document(0, "Wolfcamp shale")
+
+    assert len(index) == 1
+    assert 'wolfcamp' not in index.postings
+    assert index.search("wolfcamp") == []
+
+
+def test_expand_query_adds_weighted_synonyms():
+    weights = expand_query("well depth")
+    assert weights['well'] == 1.0
+    assert 0 < weights['bore'] < 1.0